@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+bench_metadata.py
+
+Microbenchmark for make_report.render_metadata_column: the compiled section
+plan (report_i18n.section_plan) against the per-site walk of label_to_field
+it replaced, kept below as walk_metadata_column. Both are run on the same
+rows and must produce the same HTML.
+
+    python bench_metadata.py mmap-sites.csv [--repeat 5]
+
+The sites file is only needed for realistic rows; without one, 400
+synthetic rows with every field filled are used.
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Tuple
+
+import make_report
+from make_report import escape, get_filename, get_thumb_list, img_attrs
+from report_i18n import label_to_field
+
+
+def walk_metadata_column(row: dict) -> str:
+    """render_metadata_column as it was: sections rediscovered for every site."""
+    sections = []
+    current_heading = None
+    current_rows: List[Tuple[str, str]] = []
+
+    def flush():
+        nonlocal current_heading, current_rows, sections
+        if current_heading and current_rows:
+            sections.append({"heading": current_heading, "rows": current_rows})
+        current_heading = None
+        current_rows = []
+
+    for label, field in label_to_field.items():
+        if field == "heading":
+            flush()
+            current_heading = label
+            current_rows = []
+            continue
+        if not field:
+            continue
+        v = (row.get(field) or "").strip()
+        if not v:
+            continue
+        current_rows.append((label, v))
+
+    flush()
+
+    html_parts: List[str] = []
+
+    for sec in sections:
+        heading = sec["heading"]
+        rows = sec["rows"]
+        html_parts.append(f'<h3 class="sec-heading">{escape(heading)}</h3>')
+
+        if heading == "Geographic Info":
+            map_raw = (row.get("Map_THUMBNAILS_ss") or "").strip()
+            thumbs = get_thumb_list(map_raw)
+            map_thumb = thumbs[0] if thumbs else ""
+            map_title = get_filename(map_thumb)
+
+            lat = (row.get("point_y_s") or "").strip()
+            lon = (row.get("point_x_s") or "").strip()
+            have_coords = bool(lat and lon)
+            have_3rdcol = bool(map_thumb or have_coords)
+
+            meta_rows_html = []
+            for label, value in rows:
+                meta_rows_html.append(
+                    "<tr>"
+                    f"<th class='meta-label'>{escape(label)}</th>"
+                    f"<td class='meta-value'>{escape(value)}</td>"
+                    "</tr>"
+                )
+            meta_rows_str = "".join(meta_rows_html)
+
+            html_parts.append('<table class="meta-table"><tbody><tr>')
+            html_parts.append(
+                "<td class='geo-meta-cell' colspan='2'>"
+                "<table class='meta-table-inner'><tbody>"
+                f"{meta_rows_str}"
+                "</tbody></table>"
+                "</td>"
+            )
+
+            if have_3rdcol:
+                html_parts.append("<td class='geo-extra'>")
+                if map_thumb:
+                    html_parts.append(
+                        f'<img {img_attrs(map_thumb, "geo-map-thumb")} '
+                        f'title="{escape(map_title)}" '
+                        'class="geo-map-thumb" />'
+                    )
+                if have_coords:
+                    emb = (
+                        f"https://www.google.com/maps?q={escape(lat)},"
+                        f"{escape(lon)}&z=14&output=embed"
+                    )
+                    link = (
+                        f"https://www.google.com/maps?q={escape(lat)},"
+                        f"{escape(lon)}&z=14"
+                    )
+                    html_parts.append(
+                        f'<iframe src="{emb}" class="geo-iframe" '
+                        'loading="lazy"></iframe>'
+                    )
+                    html_parts.append(
+                        f'<div><a href="{link}" target="_blank" '
+                        'class="geo-link">Open in Google Maps</a></div>'
+                    )
+                html_parts.append("</td>")
+
+            html_parts.append("</tr></tbody></table>")
+        else:
+            html_parts.append('<table class="meta-table"><tbody>')
+            for label, value in rows:
+                html_parts.append(
+                    "<tr>"
+                    f"<th class='meta-label'>{escape(label)}</th>"
+                    f"<td class='meta-value'>{escape(value)}</td>"
+                    "</tr>"
+                )
+            html_parts.append("</tbody></table>")
+
+    return "\n".join(html_parts)
+
+
+def synthetic_rows(n: int = 400) -> List[dict]:
+    rows = []
+    for i in range(n):
+        row = {field: f"{field} value {i} <&>" for field in label_to_field.values() if field and field != "heading"}
+        row["point_y_s"], row["point_x_s"] = f"{18 + i / 1000:.6f}", f"{102 + i / 1000:.6f}"
+        rows.append(row)
+    return rows
+
+
+def best_of(render, rows: List[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            render(row)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the site metadata column, compiled plan vs. dict walk.")
+    parser.add_argument("tsv", nargs="?", help="merged sites file (default: synthetic rows)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each; the fastest counts")
+    args = parser.parse_args(argv)
+
+    make_report.set_url_prefix("aws")
+    rows = list(make_report.read_rows(args.tsv)) if args.tsv else synthetic_rows()
+    for row in rows:
+        if make_report.render_metadata_column(row) != walk_metadata_column(row):
+            print(f"output differs for site {row.get('siteid_s') or row.get('site_name_s')!r}", file=sys.stderr)
+            return 1
+
+    old = best_of(walk_metadata_column, rows, args.repeat)
+    new = best_of(make_report.render_metadata_column, rows, args.repeat)
+    print(f"{len(rows)} sites, best of {args.repeat}")
+    print(f"dict walk      {old / len(rows) * 1e6:8.1f} us/site")
+    print(f"compiled plan  {new / len(rows) * 1e6:8.1f} us/site   ({old / new:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+csv_profile.py
+
+Single-pass column profiler for the tab-separated files the ETL produces
+(4solr.*.csv, mmap-sites.csv, ...). It replaces the per-cell Counter in
+evaluate.py, which kept every distinct value of every column in memory.
+
+For every column it reports:
+
+    tokens        non-blank cells
+    blanks        blank cells (and the blank rate)
+    distinct      distinct non-blank values: exact while a column has at most
+                  --exact-below of them, then a HyperLogLog estimate
+                  (about 0.8% standard error); "exact" says which
+    min/max_len   shortest and longest non-blank value
+    top           the --top-k most frequent values (Space-Saving: for columns
+                  with many distinct values a count may be an upper bound, and
+                  "error" says by how much at most)
+
+Rows whose cell count differs from the header's are counted as errors and
+left out of the column statistics, as evaluate.py did.
+
+Large files are split into byte ranges at line boundaries and scanned by
+--jobs processes; the partial profiles are merged. The files are written
+with no quoting, so a newline always ends a record.
+
+Usage:
+    python csv_profile.py FILE [--json] [--jobs N] [--top-k 10] [--exact-below 100000]
+    python csv_profile.py FILE --fail-on-errors --require-distinct id=12345
+
+--fail-on-errors exits 1 if any row is malformed; --require-distinct
+COLUMN=N exits 1 unless COLUMN has exactly N distinct values (use it as a
+quality gate before loading a core).
+"""
+
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+DELIM = "\t"
+EXACT_BELOW = 100_000     # distinct values kept exactly per column before switching to HLL
+HLL_PRECISION = 14        # 2**14 registers, 16 KB per column
+TOP_K = 10
+MAX_BAD_ROWS = 100        # malformed rows kept as examples
+MIN_RANGE_BYTES = 8 << 20  # don't split files into ranges smaller than this
+BATCH_ROWS = 5000         # rows transposed into columns at a time
+
+
+# --- sketches ----------------------------------------------------------------
+
+class HyperLogLog:
+    def __init__(self, p=HLL_PRECISION):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        idx = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small sets
+        return round(raw)
+
+
+class DistinctCounter:
+    """Exact set of values up to ``exact_below``, then a HyperLogLog."""
+
+    def __init__(self, exact_below=EXACT_BELOW):
+        self.exact_below = exact_below
+        self.values = set()
+        self.hll = None
+
+    @property
+    def exact(self):
+        return self.hll is None
+
+    def update(self, values):
+        if self.hll is None:
+            self.values.update(values)
+            if len(self.values) > self.exact_below:
+                self._spill()
+        else:
+            add = self.hll.add
+            for v in set(values):
+                add(v)
+
+    def _spill(self):
+        self.hll = HyperLogLog()
+        for v in self.values:
+            self.hll.add(v)
+        self.values = None
+
+    def merge(self, other):
+        if self.hll is None and other.hll is None:
+            self.values |= other.values
+            if len(self.values) > self.exact_below:
+                self._spill()
+            return
+        if self.hll is None:
+            self._spill()
+        if other.hll is None:
+            for v in other.values:
+                self.hll.add(v)
+        else:
+            self.hll.merge(other.hll)
+
+    def count(self):
+        return len(self.values) if self.hll is None else self.hll.estimate()
+
+
+class TopK:
+    """Space-Saving heavy hitters: at most ``capacity`` monitored values.
+
+    A min-heap with one entry per monitored value finds the value to evict;
+    entries go stale as counts grow and are refreshed when they surface.
+    A value that replaced an evicted one inherits its count as ``errors``, so
+    count - error is a guaranteed lower bound.
+    """
+
+    def __init__(self, k=TOP_K, capacity=None):
+        self.k = k
+        self.capacity = capacity or max(10 * k, 100)
+        self.counts = {}
+        self.errors = {}
+        self.heap = []
+
+    def add(self, value, n=1):
+        counts = self.counts
+        c = counts.get(value)
+        if c is not None:
+            counts[value] = c + n
+            return
+        if len(counts) < self.capacity:
+            counts[value] = n
+            heapq.heappush(self.heap, (n, value))
+            return
+        heap = self.heap
+        while True:
+            low, victim = heap[0]
+            current = counts[victim]
+            if current == low:
+                break
+            heapq.heapreplace(heap, (current, victim))
+        del counts[victim]
+        self.errors.pop(victim, None)
+        counts[value] = low + n
+        self.errors[value] = low
+        heapq.heapreplace(heap, (low + n, value))
+
+    def update(self, values):
+        for v, n in Counter(values).items():
+            self.add(v, n)
+
+    def merge(self, other):
+        for v, c in other.counts.items():
+            self.counts[v] = self.counts.get(v, 0) + c
+        for v, e in other.errors.items():
+            self.errors[v] = self.errors.get(v, 0) + e
+        if len(self.counts) > self.capacity:
+            keep = heapq.nlargest(self.capacity, self.counts.items(), key=lambda kv: kv[1])
+            self.counts = dict(keep)
+            self.errors = {v: e for v, e in self.errors.items() if v in self.counts}
+        self.heap = [(c, v) for v, c in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def top(self):
+        """[(value, count, error)] for the k most frequent values.
+
+        Values not seen at least twice for certain (count - error < 2) are
+        left out: in a column of unique ids they are noise.
+        """
+        items = [(v, c, self.errors.get(v, 0)) for v, c in self.counts.items()]
+        items = [t for t in items if t[1] - t[2] >= 2]
+        return sorted(items, key=lambda t: (-t[1], t[0]))[:self.k]
+
+
+# --- profiles ----------------------------------------------------------------
+
+class ColumnProfile:
+    def __init__(self, name, exact_below=EXACT_BELOW, top_k=TOP_K):
+        self.name = name
+        self.tokens = 0
+        self.blanks = 0
+        self.min_len = None
+        self.max_len = 0
+        self.distinct = DistinctCounter(exact_below)
+        self.top = TopK(top_k) if top_k else None
+
+    def update(self, cells):
+        """Add one batch of this column's cells."""
+        values = [c for c in cells if c != ""]
+        self.blanks += len(cells) - len(values)
+        if not values:
+            return
+        self.tokens += len(values)
+        lens = list(map(len, values))
+        low, high = min(lens), max(lens)
+        if self.min_len is None or low < self.min_len:
+            self.min_len = low
+        if high > self.max_len:
+            self.max_len = high
+        self.distinct.update(values)
+        if self.top is not None:
+            self.top.update(values)
+
+    def merge(self, other):
+        self.tokens += other.tokens
+        self.blanks += other.blanks
+        if other.min_len is not None and (self.min_len is None or other.min_len < self.min_len):
+            self.min_len = other.min_len
+        self.max_len = max(self.max_len, other.max_len)
+        self.distinct.merge(other.distinct)
+        if self.top is not None:
+            self.top.merge(other.top)
+
+    def as_dict(self):
+        cells = self.tokens + self.blanks
+        d = {
+            "column": self.name,
+            "tokens": self.tokens,
+            "blanks": self.blanks,
+            "blank_rate": round(self.blanks / cells, 6) if cells else 0.0,
+            "distinct": self.distinct.count(),
+            "exact": self.distinct.exact,
+            "min_len": self.min_len,
+            "max_len": self.max_len,
+        }
+        if self.top is not None:
+            d["top"] = [{"value": v, "count": c, "error": e} for v, c, e in self.top.top()]
+        return d
+
+
+class FileProfile:
+    def __init__(self, header, exact_below=EXACT_BELOW, top_k=TOP_K, max_bad_rows=MAX_BAD_ROWS):
+        self.header = header
+        self.columns = [ColumnProfile(h, exact_below, top_k) for h in header]
+        self.rows = 0
+        self.errors = 0
+        self.bad_rows = []
+        self.max_bad_rows = max_bad_rows
+
+    def add_rows(self, rows):
+        width = len(self.header)
+        batch = []
+        for row in rows:
+            if len(row) != width:
+                self.errors += 1
+                if len(self.bad_rows) < self.max_bad_rows:
+                    self.bad_rows.append(row)
+                continue
+            batch.append(row)
+            if len(batch) >= BATCH_ROWS:
+                self._add_batch(batch)
+                batch = []
+        if batch:
+            self._add_batch(batch)
+
+    def _add_batch(self, batch):
+        self.rows += len(batch)
+        for col, cells in zip(self.columns, zip(*batch)):
+            col.update(cells)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.errors += other.errors
+        self.bad_rows += other.bad_rows[:max(self.max_bad_rows - len(self.bad_rows), 0)]
+        for a, b in zip(self.columns, other.columns):
+            a.merge(b)
+
+    def column(self, name):
+        for col in self.columns:
+            if col.name == name:
+                return col
+        raise KeyError(name)
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "errors": self.errors,
+            "columns": [c.as_dict() for c in self.columns],
+        }
+
+
+# --- scanning ----------------------------------------------------------------
+
+def reader(lines):
+    return csv.reader(lines, delimiter=DELIM, quoting=csv.QUOTE_NONE, quotechar=chr(255))
+
+
+def read_header(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        first = f.readline()
+    return next(reader([first]), [])
+
+
+def split_ranges(path, jobs):
+    """Byte ranges (start, end) covering the data lines, one per job."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        n = max(1, min(jobs, (size - start) // MIN_RANGE_BYTES or 1))
+        bounds = [start]
+        for i in range(1, n):
+            f.seek(start + (size - start) * i // n)
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+        bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _range_lines(f, end):
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        yield line.decode("utf-8")
+
+
+def scan_range(path, start, end, header, exact_below=EXACT_BELOW, top_k=TOP_K, max_bad_rows=MAX_BAD_ROWS):
+    prof = FileProfile(header, exact_below, top_k, max_bad_rows)
+    with open(path, "rb") as f:
+        f.seek(start)
+        prof.add_rows(reader(_range_lines(f, end)))
+    return prof
+
+
+def profile_file(path, jobs=1, exact_below=EXACT_BELOW, top_k=TOP_K, max_bad_rows=MAX_BAD_ROWS):
+    """Profile ``path``; returns a FileProfile (None if the file is empty)."""
+    header = read_header(path)
+    if not header:
+        return None
+    ranges = split_ranges(path, jobs)
+    prof = FileProfile(header, exact_below, top_k, max_bad_rows)
+    if len(ranges) <= 1:
+        for start, end in ranges:
+            prof.merge(scan_range(path, start, end, header, exact_below, top_k, max_bad_rows))
+        return prof
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(scan_range, path, start, end, header, exact_below, top_k, max_bad_rows)
+                   for start, end in ranges]
+        for fut in futures:  # in file order, so bad_rows keep their order
+            prof.merge(fut.result())
+    return prof
+
+
+def print_table(prof, out=sys.stdout):
+    out.write("column\ttokens\tblanks\tblank_rate\tdistinct\texact\tmin_len\tmax_len\ttop\n")
+    for c in prof.as_dict()["columns"]:
+        top = ", ".join(f"{t['value']}({'' if not t['error'] else '<='}{t['count']})" for t in c.get("top", [])[:3])
+        out.write(f"{c['column']}\t{c['tokens']}\t{c['blanks']}\t{c['blank_rate']:.3f}\t{c['distinct']}\t"
+                  f"{'yes' if c['exact'] else '~'}\t{c['min_len'] if c['min_len'] is not None else ''}\t"
+                  f"{c['max_len']}\t{top}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the columns of a tab-separated file in one pass.")
+    parser.add_argument("file")
+    parser.add_argument("--json", action="store_true", help="write the profile as JSON")
+    parser.add_argument("--jobs", type=int, default=1, help="processes scanning byte ranges in parallel")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="most frequent values per column (0: none)")
+    parser.add_argument("--exact-below", type=int, default=EXACT_BELOW,
+                        help="count distinct values exactly up to this many per column, then estimate")
+    parser.add_argument("--fail-on-errors", action="store_true",
+                        help="exit 1 if any row has a different number of cells than the header")
+    parser.add_argument("--require-distinct", action="append", default=[], metavar="COLUMN=N",
+                        help="exit 1 unless COLUMN has exactly N distinct values (repeatable)")
+    args = parser.parse_args(argv)
+
+    prof = profile_file(args.file, jobs=args.jobs, exact_below=args.exact_below, top_k=args.top_k)
+    if prof is None:
+        sys.stderr.write(f"{args.file}: empty file\n")
+        return 1
+    if args.json:
+        json.dump(prof.as_dict(), sys.stdout, ensure_ascii=False, indent=1)
+        sys.stdout.write("\n")
+    else:
+        print_table(prof)
+
+    status = 0
+    if args.fail_on_errors and prof.errors:
+        sys.stderr.write(f"{args.file}: {prof.errors} row(s) with the wrong number of cells\n")
+        status = 1
+    for req in args.require_distinct:
+        name, _, want = req.partition("=")
+        col = prof.column(name)
+        if not col.distinct.exact or col.distinct.count() != int(want):
+            sys.stderr.write(f"{args.file}: {name} has {col.distinct.count()} distinct values, expected {want}"
+                             f"{'' if col.distinct.exact else ' (estimated: raise --exact-below)'}\n")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
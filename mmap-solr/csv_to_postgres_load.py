@@ -19,14 +19,23 @@ Notes:
 - This script treats Postgres identifiers as CASE-SENSITIVE by *quoting* them.
 - If you pass a schema-qualified table, use: schema.table (quotes are optional).
 - CSV values are inserted as text; Postgres will cast when possible.
+- --mode copy streams each chunk of rows through COPY into a temp staging
+  table and inserts it with one INSERT ... SELECT (a few round trips per chunk
+  instead of several per row). A chunk that fails is replayed with the
+  per-row savepoint path, so the FAILED ROWS REPORT is the same either way.
+- --workers N loads chunks on N connections at once (either mode).
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
+import io
 import sys
-from typing import Dict, List, Tuple, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 
 def normalize_csv_value(v, null_blank: bool):
@@ -158,6 +167,424 @@ def read_mapping(mapping_csv_path: str) -> List[Tuple[str, str]]:
         pairs.append((_strip_optional_quotes(table_col), csv_col))
     return pairs
 
+# --- COPY fast path ----------------------------------------------------------
+
+STAGE_TABLE = "_csv_stage"
+ROW_NO_COL = "_csv_row"
+
+
+def copy_text_value(v) -> str:
+    """Render one value in COPY text format (NULL is \\N)."""
+    if v is None:
+        return "\\N"
+    s = str(v)
+    return (s.replace("\\", "\\\\").replace("\t", "\\t")
+             .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_text_rows(rows) -> str:
+    """COPY text-format payload for (row_number, values) pairs; row number goes last."""
+    return "".join(
+        "\t".join([copy_text_value(v) for v in values] + [str(row_number)]) + "\n"
+        for row_number, values in rows
+    )
+
+
+def _copy_in(cur, copy_sql, payload: str) -> None:
+    """COPY ... FROM STDIN with either psycopg2 or psycopg (v3)."""
+    if hasattr(cur, "copy_expert"):  # psycopg2
+        cur.copy_expert(copy_sql.as_string(cur), io.StringIO(payload))
+    else:
+        with cur.copy(copy_sql) as cp:
+            cp.write(payload)
+
+
+@dataclass
+class LoadContext:
+    """Everything the per-chunk loaders need besides the rows themselves."""
+    sql: Any
+    table_ident: Any
+    mapping: List[Tuple[str, str]]
+    insert_sql: Any
+    args: argparse.Namespace
+    dedupe_cols: List[str] = field(default_factory=list)
+    # 'conflict' or 'antijoin' once resolved (see resolve_dedupe_strategy)
+    dedupe_strategy: Optional[str] = None
+    # dedupe columns declared NOT NULL in the target (plain = suffices for them)
+    not_null: Set[str] = field(default_factory=set)
+    probe_sql: Dict[Tuple[bool, ...], Any] = field(default_factory=dict)
+    report_progress: bool = True
+
+
+UNIQUE_INDEX_SQL = """
+SELECT array_agg(a.attname::text ORDER BY k.ord)
+FROM pg_index i
+CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+WHERE i.indrelid = %s::regclass
+  AND i.indisunique AND i.indisvalid
+  AND i.indpred IS NULL AND i.indexprs IS NULL
+GROUP BY i.indexrelid
+"""
+
+
+NOT_NULL_SQL = """
+SELECT a.attname::text
+FROM pg_attribute a
+WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped AND a.attnotnull
+"""
+
+
+def not_null_columns(cur, table_name: str) -> Set[str]:
+    cur.execute(NOT_NULL_SQL, (table_name,))
+    return {r[0] for r in cur.fetchall()}
+
+
+def has_unique_index(cur, table_name: str, cols: List[str]) -> bool:
+    """True if a plain (non-partial, non-expression) unique index covers exactly ``cols``."""
+    cur.execute(UNIQUE_INDEX_SQL, (table_name,))
+    return any(set(r[0]) == set(cols) for r in cur.fetchall())
+
+
+def resolve_dedupe_strategy(cur, ctx: LoadContext, table_name: str) -> str:
+    """Pick how duplicates are detected, entirely inside Postgres.
+
+    - conflict: ``INSERT ... ON CONFLICT (<dedupe cols>) DO NOTHING``; needs a
+      unique index on exactly those columns (auto uses it when there is one).
+    - antijoin: skip rows whose key already exists (NULL keys match each
+      other), probed per row or joined per chunk; see dedupe_match_sql.
+    """
+    strategy = ctx.args.dedupe_strategy
+    if strategy == "auto":
+        strategy = "conflict" if has_unique_index(cur, table_name, ctx.dedupe_cols) else "antijoin"
+    elif strategy == "conflict" and not has_unique_index(cur, table_name, ctx.dedupe_cols):
+        raise ValueError(
+            f"--dedupe-strategy conflict needs a unique index on ({', '.join(ctx.dedupe_cols)}) "
+            f"of {table_name}; use antijoin or auto"
+        )
+    return strategy
+
+
+def dedupe_match_sql(ctx: LoadContext, other):
+    """Match every dedupe column of ``t`` to ``other(k)``, NULL matching NULL.
+
+    ``IS NOT DISTINCT FROM`` would say the same, but it is not indexable and
+    rules out hash and merge joins, so NOT NULL columns get a plain ``=`` and
+    only nullable ones the spelled-out ``(t.k = x OR (t.k IS NULL AND x IS NULL))``.
+    """
+    sql = ctx.sql
+    parts = []
+    for c in ctx.dedupe_cols:
+        col, val = sql.SQL("t.{}").format(sql.Identifier(c)), other(c)
+        if c in ctx.not_null:
+            parts.append(sql.SQL("{} = {}").format(col, val))
+        else:
+            parts.append(sql.SQL("({col} = {val} OR ({col} IS NULL AND {val} IS NULL))").format(col=col, val=val))
+    return sql.SQL(" AND ").join(parts)
+
+
+def probe(ctx: LoadContext, key: tuple):
+    """(query, params) telling whether a row with ``key`` is already in the table.
+
+    Each key column is compared with ``= %s``, or ``IS NULL`` when the key's
+    value is None, so the probe is an index lookup whatever the nulls; one
+    query is built per pattern of NULLs.
+    """
+    nulls = tuple(v is None for v in key)
+    query = ctx.probe_sql.get(nulls)
+    if query is None:
+        sql = ctx.sql
+        match = sql.SQL(" AND ").join([
+            sql.SQL("t.{} IS NULL" if is_null else "t.{} = %s").format(sql.Identifier(c))
+            for c, is_null in zip(ctx.dedupe_cols, nulls)
+        ])
+        query = ctx.probe_sql[nulls] = sql.SQL("SELECT 1 FROM {} t WHERE {} LIMIT 1").format(ctx.table_ident, match)
+    return query, tuple(v for v in key if v is not None)
+
+
+def conflict_clause(ctx: LoadContext):
+    sql = ctx.sql
+    return sql.SQL(" ON CONFLICT ({}) DO NOTHING").format(
+        sql.SQL(", ").join([sql.Identifier(c) for c in ctx.dedupe_cols]))
+
+
+@dataclass
+class LoadStats:
+    inserted: int = 0
+    skipped_dupes: int = 0
+    failures: List[dict] = field(default_factory=list)
+    copied_chunks: int = 0
+    fallback_chunks: int = 0
+
+
+def mapped_values(ctx: LoadContext, values: list) -> dict:
+    return {ctx.mapping[i][0]: values[i] for i in range(len(values))}
+
+
+def insert_rows(conn, cur, ctx: LoadContext, rows, stats: LoadStats) -> None:
+    """Insert (row_number, values) pairs one at a time.
+
+    Each row gets its own savepoint so a single bad row does not roll back
+    prior successful inserts; failures are collected for the report. The
+    duplicate probe runs under it too: comparing the CSV value with the
+    column's type can fail just like the insert.
+    """
+    args = ctx.args
+    batch = 0
+    for row_count, values in rows:
+        values_by_table_col = mapped_values(ctx, values)
+        cur.execute("SAVEPOINT row_sp")
+        try:
+            if ctx.dedupe_strategy == "antijoin":
+                key = make_dedupe_key(values_by_table_col, ctx.dedupe_cols)
+                query, params = probe(ctx, key)
+                if args.debug and row_count == 1:
+                    # the probe should be an index scan; a Seq Scan here means a missing index
+                    cur.execute(ctx.sql.SQL("EXPLAIN ") + query, params)
+                    plan = "\n  ".join(r[0] for r in cur.fetchall())
+                    print(f"[DEBUG] duplicate probe plan:\n  {plan}", file=sys.stderr)
+                cur.execute(query, params)
+                if cur.fetchone() is not None:
+                    stats.skipped_dupes += 1
+                    cur.execute("RELEASE SAVEPOINT row_sp")
+                    if args.debug and row_count <= 5:
+                        print(f"[DEBUG] row {row_count} skipped as duplicate on {ctx.dedupe_cols}: {key}", file=sys.stderr)
+                    continue
+
+            if args.debug and row_count <= 5:
+                print(f"[DEBUG] row {row_count} mapped values: {values_by_table_col}", file=sys.stderr)
+            cur.execute(ctx.insert_sql, values)
+            if ctx.dedupe_strategy == "conflict" and cur.rowcount == 0:
+                stats.skipped_dupes += 1
+                cur.execute("RELEASE SAVEPOINT row_sp")
+                continue
+            stats.inserted += 1
+            batch += 1
+            cur.execute("RELEASE SAVEPOINT row_sp")
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT row_sp")
+            cur.execute("RELEASE SAVEPOINT row_sp")
+            stats.failures.append({
+                "row_number": row_count,
+                "error": str(e),
+                "values": values,
+                "mapped": values_by_table_col,
+            })
+            continue
+
+        if args.commit_every > 0 and batch >= args.commit_every:
+            conn.commit()
+            batch = 0
+            if ctx.report_progress and stats.inserted % (args.commit_every * 5) == 0:
+                print(f"... inserted {stats.inserted} rows", file=sys.stderr)
+
+
+def create_stage_table(cur, ctx: LoadContext) -> None:
+    """Temp table with the target's column types plus the CSV row number.
+
+    Typed columns make COPY reject bad values for the whole chunk, which then
+    falls back to the per-row path to pinpoint them.
+    """
+    sql = ctx.sql
+    cols = sql.SQL(", ").join([sql.Identifier(tc) for tc, _ in ctx.mapping])
+    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(STAGE_TABLE)))
+    cur.execute(sql.SQL("CREATE TEMP TABLE {} AS SELECT {} FROM {} WITH NO DATA").format(
+        sql.Identifier(STAGE_TABLE), cols, ctx.table_ident))
+    cur.execute(sql.SQL("ALTER TABLE {} ADD COLUMN {} bigint").format(
+        sql.Identifier(STAGE_TABLE), sql.Identifier(ROW_NO_COL)))
+
+
+def stage_insert_sql(ctx: LoadContext):
+    """Set-based INSERT ... SELECT from the staging table, in CSV order.
+
+    With --dedupe-skip only the first CSV row per key is kept (DISTINCT ON)
+    and keys already in the target are skipped with an anti-join or by
+    ON CONFLICT DO NOTHING, depending on the dedupe strategy. Under conflict
+    a key with a NULL in it never conflicts, so, as in the per-row path,
+    such rows all go in: they bypass the DISTINCT ON.
+    """
+    sql = ctx.sql
+    cols = [sql.Identifier(tc) for tc, _ in ctx.mapping]
+    cols_sql = sql.SQL(", ").join(cols)
+    s_cols_sql = sql.SQL(", ").join([sql.SQL("s.{}").format(c) for c in cols])
+    stage = sql.Identifier(STAGE_TABLE)
+    row_no = sql.Identifier(ROW_NO_COL)
+    if not ctx.args.dedupe_skip:
+        return sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} s ORDER BY s.{}").format(
+            ctx.table_ident, cols_sql, s_cols_sql, stage, row_no)
+    keys_sql = sql.SQL(", ").join([sql.Identifier(c) for c in ctx.dedupe_cols])
+    firsts = sql.SQL("SELECT DISTINCT ON ({keys}) * FROM {stage}{where} ORDER BY {keys}, {row_no}")
+    if ctx.dedupe_strategy == "conflict":
+        key_cols = [sql.Identifier(c) for c in ctx.dedupe_cols]
+        all_set = sql.SQL(" AND ").join([sql.SQL("{} IS NOT NULL").format(c) for c in key_cols])
+        any_null = sql.SQL(" OR ").join([sql.SQL("{} IS NULL").format(c) for c in key_cols])
+        firsts = sql.SQL("({}) UNION ALL SELECT * FROM {} WHERE {}").format(
+            firsts.format(keys=keys_sql, stage=stage, where=sql.SQL(" WHERE ") + all_set, row_no=row_no),
+            stage, any_null)
+        where, tail = sql.SQL(""), conflict_clause(ctx)
+    else:
+        firsts = firsts.format(keys=keys_sql, stage=stage, where=sql.SQL(""), row_no=row_no)
+        match = dedupe_match_sql(ctx, lambda c: sql.SQL("s.{}").format(sql.Identifier(c)))
+        where, tail = sql.SQL(" WHERE NOT EXISTS (SELECT 1 FROM {} t WHERE {})").format(ctx.table_ident, match), sql.SQL("")
+    return sql.SQL(
+        "INSERT INTO {table} ({cols}) "
+        "SELECT {s_cols} FROM ({firsts}) s"
+        "{where} ORDER BY s.{row_no}{tail}"
+    ).format(table=ctx.table_ident, cols=cols_sql, s_cols=s_cols_sql, firsts=firsts,
+             where=where, row_no=row_no, tail=tail)
+
+
+def copy_chunk(conn, cur, ctx: LoadContext, rows, stats: LoadStats) -> None:
+    """Load one chunk via COPY into the staging table + one INSERT ... SELECT.
+
+    If anything in the chunk fails (a value COPY cannot cast, a constraint
+    violation, ...) the chunk is rolled back and replayed through the
+    per-row savepoint path so the failed rows are reported individually.
+    """
+    sql = ctx.sql
+    stage = sql.Identifier(STAGE_TABLE)
+    copy_cols = sql.SQL(", ").join(
+        [sql.Identifier(tc) for tc, _ in ctx.mapping] + [sql.Identifier(ROW_NO_COL)])
+    cur.execute("SAVEPOINT chunk_sp")
+    try:
+        cur.execute(sql.SQL("TRUNCATE {}").format(stage))
+        _copy_in(cur, sql.SQL("COPY {} ({}) FROM STDIN").format(stage, copy_cols), copy_text_rows(rows))
+        cur.execute(stage_insert_sql(ctx))
+        inserted = cur.rowcount
+        cur.execute("RELEASE SAVEPOINT chunk_sp")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT chunk_sp")
+        cur.execute("RELEASE SAVEPOINT chunk_sp")
+        stats.fallback_chunks += 1
+        if ctx.args.debug:
+            print(f"[DEBUG] chunk starting at row {rows[0][0]} fell back to per-row inserts: {e}", file=sys.stderr)
+        insert_rows(conn, cur, ctx, rows, stats)
+        conn.commit()
+        return
+    conn.commit()
+    stats.copied_chunks += 1
+    stats.inserted += inserted
+    stats.skipped_dupes += len(rows) - inserted
+    if ctx.report_progress:
+        print(f"... inserted {stats.inserted} rows", file=sys.stderr)
+
+
+def read_rows(reader, mapping, null_blank: bool):
+    """Yield (csv_row_number, normalized values in mapping order)."""
+    for row_count, row in enumerate(reader, start=1):
+        yield row_count, [normalize_csv_value(row.get(csv_col, None), null_blank) for _, csv_col in mapping]
+
+
+def chunked(iterable, size: int):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def drop_file_duplicates(rows, ctx: LoadContext, stats: LoadStats):
+    """Skip rows whose dedupe key already appeared earlier in the CSV.
+
+    Used with --workers: once every key occurs only once in the input, no two
+    chunks can race for the same key, so which row wins (the first one in the
+    file) does not depend on scheduling. Under the conflict strategy keys
+    with a NULL never conflict, so those rows are all kept.
+    """
+    table_cols = [tc for tc, _ in ctx.mapping]
+    key_idx = [table_cols.index(c) for c in ctx.dedupe_cols]
+    seen = set()
+    for row_count, values in rows:
+        key = tuple(values[i] for i in key_idx)
+        if ctx.dedupe_strategy == "conflict" and None in key:
+            yield row_count, values
+            continue
+        if key in seen:
+            stats.skipped_dupes += 1
+            continue
+        seen.add(key)
+        yield row_count, values
+
+
+def load_chunk(conn, cur, ctx: LoadContext, rows, stats: LoadStats) -> None:
+    if ctx.args.mode == "copy":
+        copy_chunk(conn, cur, ctx, rows, stats)
+    else:
+        insert_rows(conn, cur, ctx, rows, stats)
+        conn.commit()
+
+
+def merge_stats(total: LoadStats, part: LoadStats) -> None:
+    total.inserted += part.inserted
+    total.skipped_dupes += part.skipped_dupes
+    total.failures.extend(part.failures)
+    total.copied_chunks += part.copied_chunks
+    total.fallback_chunks += part.fallback_chunks
+
+
+def load_parallel(connect, ctx: LoadContext, rows, stats: LoadStats) -> None:
+    """Load chunks concurrently, one connection per worker thread.
+
+    At most two chunks per worker are read ahead, so memory stays bounded by
+    the chunk size rather than the file size. Results are merged as chunks
+    finish; failures are sorted back into CSV order at the end.
+    """
+    args = ctx.args
+    ctx.report_progress = False
+    local = threading.local()
+    conns = []
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+    slots = threading.BoundedSemaphore(args.workers * 2)
+
+    def worker_conn():
+        if not hasattr(local, "conn"):
+            conn = connect(args.conn)
+            with lock:
+                conns.append(conn)
+            cur = conn.cursor()
+            if args.mode == "copy":
+                create_stage_table(cur, ctx)
+                conn.commit()
+            local.conn, local.cur = conn, cur
+        return local.conn, local.cur
+
+    def run(chunk):
+        conn, cur = worker_conn()
+        part = LoadStats()
+        load_chunk(conn, cur, ctx, chunk, part)
+        return part
+
+    def done(fut):
+        slots.release()
+        if fut.exception() is not None:
+            errors.append(fut.exception())
+            return
+        with lock:
+            merge_stats(stats, fut.result())
+            print(f"... inserted {stats.inserted} rows", file=sys.stderr)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for chunk in chunked(rows, max(args.chunk_size, 1)):
+                slots.acquire()
+                if errors:
+                    break
+                pool.submit(run, chunk).add_done_callback(done)
+    finally:
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    if errors:
+        raise errors[0]
+    stats.failures.sort(key=lambda f: f["row_number"])
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Load CSV into a Postgres table using a mapping config.")
     parser.add_argument("csv_file", help="Input CSV file to load")
@@ -170,10 +597,24 @@ def main(argv: Optional[List[str]] = None) -> int:
     parser.add_argument("--dry-run", action="store_true", help="Parse and validate, but do not insert")
     parser.add_argument("--debug", action="store_true", help="Print diagnostics (effective options + first few rows values)")
     parser.add_argument("--commit-every", type=int, default=1000, help="Commit every N rows (default: 1000)")
+    parser.add_argument("--mode", choices=("row", "copy"), default="row",
+                        help="row: one INSERT per row inside a savepoint (default). "
+                             "copy: COPY each chunk into a temp staging table and insert it with one "
+                             "INSERT ... SELECT; chunks that fail are replayed row by row.")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="Rows per COPY chunk in --mode copy, and per work unit with --workers (default: 10000)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Load chunks in parallel on this many connections (default: 1). With --dedupe-skip, "
+                             "a key repeated in the CSV is kept from its first row only, even if that row fails.")
     parser.add_argument("--dedupe-skip", action="store_true",
                         help="Skip inserting rows that match an existing record on the dedupe key (see --dedupe-cols).")
     parser.add_argument("--dedupe-cols", default="Site_Name,Revisits",
                         help="Comma-separated target table column names that define uniqueness. Default: Site_Name,Revisits")
+    parser.add_argument("--dedupe-strategy", choices=("auto", "conflict", "antijoin"), default="auto",
+                        help="How --dedupe-skip finds duplicates, in the database: conflict uses "
+                             "INSERT ... ON CONFLICT DO NOTHING and needs a unique index on the dedupe columns "
+                             "(note that NULL keys never conflict there); antijoin checks for an existing row "
+                             "with the same key. auto (default) uses conflict when such an index exists.")
     args = parser.parse_args(argv)
 
     db, sql, connect = _import_psycopg()
@@ -208,7 +649,6 @@ def main(argv: Optional[List[str]] = None) -> int:
             )
 
         row_count = 0
-        inserted = 0
 
         if args.dry_run:
             # Just count/validate
@@ -224,85 +664,54 @@ def main(argv: Optional[List[str]] = None) -> int:
         conn = connect(args.conn)
         try:
             cur = conn.cursor()
-            failures = []
-            skipped_dupes = 0
-            existing_keys = set()
-            dedupe_cols = [c.strip() for c in args.dedupe_cols.split(',') if c.strip()]
+            ctx = LoadContext(sql=sql, table_ident=table_ident, mapping=mapping,
+                              insert_sql=insert_sql, args=args)
+            stats = LoadStats()
+            ctx.dedupe_cols = [c.strip() for c in args.dedupe_cols.split(',') if c.strip()]
             if args.dedupe_skip:
-                if not dedupe_cols:
+                if not ctx.dedupe_cols:
                     raise ValueError('--dedupe-cols resolved to empty list')
-                key_cols_sql = sql.SQL(', ').join([sql.Identifier(c) for c in dedupe_cols])
-                preload_sql = sql.SQL('SELECT {} FROM {}').format(key_cols_sql, table_ident)
-                cur.execute(preload_sql)
-                for r in cur.fetchall():
-                    existing_keys.add(tuple(r))
+                unknown = [c for c in ctx.dedupe_cols if c not in {tc for tc, _ in mapping}]
+                if unknown:
+                    raise ValueError("--dedupe-cols must be mapped table columns; not mapped: " + ", ".join(unknown))
+                ctx.dedupe_strategy = resolve_dedupe_strategy(cur, ctx, table_ident.as_string(conn))
+                if ctx.dedupe_strategy == "conflict":
+                    ctx.insert_sql = insert_sql + conflict_clause(ctx)
+                else:
+                    ctx.not_null = not_null_columns(cur, table_ident.as_string(conn)) & set(ctx.dedupe_cols)
                 if args.debug:
-                    print(f"[DEBUG] preloaded {len(existing_keys)} existing key(s) for dedupe on {dedupe_cols}", file=sys.stderr)
+                    print(f"[DEBUG] dedupe on {ctx.dedupe_cols} using strategy {ctx.dedupe_strategy}", file=sys.stderr)
             if args.debug:
-                print(f"[DEBUG] null_blank={args.null_blank} delimiter={args.delimiter!r} encoding={args.encoding} commit_every={args.commit_every}", file=sys.stderr)
-            batch = 0
-            failures = []
-            for row in reader:
-                row_count += 1
-                values = []
-                for _, csv_col in mapping:
-                    raw = row.get(csv_col, None)
-                    v = normalize_csv_value(raw, args.null_blank)
-                    values.append(v)
-                values_by_table_col = {mapping[i][0]: values[i] for i in range(len(values))}
-                if args.dedupe_skip:
-                    key = make_dedupe_key(values_by_table_col, dedupe_cols)
-                    if key in existing_keys:
-                        skipped_dupes += 1
-                        if args.debug and row_count <= 5:
-                            print(f"[DEBUG] row {row_count} skipped as duplicate on {dedupe_cols}: {key}", file=sys.stderr)
-                        continue
-
-                if args.debug and row_count <= 5:
-                    preview = values_by_table_col
-                    print(f"[DEBUG] row {row_count} mapped values: {preview}", file=sys.stderr)
-                # Use a savepoint so a single bad row does not rollback prior successful inserts
-                cur.execute("SAVEPOINT row_sp")
-                try:
-                    cur.execute(insert_sql, values)
-                    inserted += 1
-                    batch += 1
-                    if args.dedupe_skip:
-                        existing_keys.add(make_dedupe_key(values_by_table_col, dedupe_cols))
-                    cur.execute("RELEASE SAVEPOINT row_sp")
-                except Exception as e:
-                    cur.execute("ROLLBACK TO SAVEPOINT row_sp")
-                    cur.execute("RELEASE SAVEPOINT row_sp")
-                    failures.append({
-                        "row_number": row_count,
-                        "error": str(e),
-                        "values": values,
-                        "mapped": values_by_table_col,
-                    })
-                    continue
-                except Exception as e:
-                    conn.rollback()
-                    failures.append({
-                        "row_number": row_count,
-                        "error": str(e),
-                        "values": values,
-                    })
-                    continue
+                print(f"[DEBUG] null_blank={args.null_blank} delimiter={args.delimiter!r} encoding={args.encoding} "
+                      f"commit_every={args.commit_every} mode={args.mode} chunk_size={args.chunk_size} "
+                      f"workers={args.workers}", file=sys.stderr)
 
-                if args.commit_every > 0 and batch >= args.commit_every:
-                    conn.commit()
-                    batch = 0
-                    if inserted % (args.commit_every * 5) == 0:
-                        print(f"... inserted {inserted} rows", file=sys.stderr)
+            rows = read_rows(reader, mapping, args.null_blank)
+            if args.workers > 1:
+                file_dupes = LoadStats()
+                if args.dedupe_skip:
+                    rows = drop_file_duplicates(rows, ctx, file_dupes)
+                conn.commit()
+                load_parallel(connect, ctx, rows, stats)
+                merge_stats(stats, file_dupes)
+            elif args.mode == "copy":
+                create_stage_table(cur, ctx)
+                for chunk in chunked(rows, max(args.chunk_size, 1)):
+                    copy_chunk(conn, cur, ctx, chunk, stats)
+            else:
+                insert_rows(conn, cur, ctx, rows, stats)
+            if args.debug and args.mode == "copy":
+                print(f"[DEBUG] {stats.copied_chunks} chunk(s) copied, "
+                      f"{stats.fallback_chunks} replayed row by row", file=sys.stderr)
 
-            
             conn.commit()
 
-            print(f"Done. Inserted {inserted} row(s) into {args.table}.")
+            print(f"Done. Inserted {stats.inserted} row(s) into {args.table}.")
 
             if args.dedupe_skip:
-                print(f"Skipped duplicates: {skipped_dupes}")
+                print(f"Skipped duplicates: {stats.skipped_dupes}")
 
+            failures = stats.failures
             if failures:
                 print("\n=== FAILED ROWS REPORT ===")
                 print(f"Failed rows: {len(failures)}")
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+derivatives.py
+
+Build "derivative" (smaller) images in a parallel directory tree, like
+make_derivatives.sh, but incrementally.
+
+A manifest (SQLite, DERIVATIVES_DIR/.derivatives-manifest.sqlite) records for
+every original: its mtime, size and SHA-256, the derivative it produced and
+the parameters used (--size, --quality). On each run:
+
+  - originals whose mtime and size are unchanged are skipped without reading
+    them, so a run with nothing to do only stats the tree;
+  - originals whose mtime/size changed are hashed; if the content is the same
+    only the manifest is updated, otherwise the derivative is rebuilt;
+  - a change of --size/--quality rebuilds everything;
+  - derivatives whose original has gone are deleted (only files recorded in
+    the manifest are ever deleted, hand-placed files are left alone).
+
+Conversions run on a process pool (one ImageMagick `convert` per worker,
+--jobs defaults to the number of cores). Each derivative is written to a
+temporary name and renamed, so an interrupted run never leaves a truncated
+file that looks finished.
+
+Usage:
+    python derivatives.py [options] ORIGINAL_DIR DERIVATIVES_DIR
+
+Options match make_derivatives.sh (--clean, --size, --quality, --dry-run),
+plus --jobs N and --adopt (record existing derivatives made by the old shell
+script instead of rebuilding them on the first run).
+
+Responsive variants: --sizes 160,320 also makes copies of each derivative
+at those widths under DERIVATIVES_DIR/_variants/<width>/, named after the
+content (<name>.<hash>.jpg, the hash covering the original's SHA-256 and
+the parameters), so a web server can let browsers cache them for good.
+--lqip adds a tiny blurred placeholder per image, as a data: URI. Both are
+listed in _variants/manifest.json, which make_report.py --variants reads:
+
+    {"size": 512, "images": {"<derivative path>": {"srcset": {"160": "_variants/160/...", ...},
+                                                  "lqip": "data:image/jpeg;base64,..."}}}
+
+Variants of removed or rebuilt derivatives are deleted.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".tif", ".tiff", ".webp", ".pdf"}
+MANIFEST_NAME = ".derivatives-manifest.sqlite"
+RESULT_FILE = "files-to-convert-converted.txt"
+VARIANTS_DIR = "_variants"
+VARIANTS_MANIFEST = "manifest.json"
+LQIP_WIDTH = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS derivatives (
+    src     TEXT PRIMARY KEY,   -- path relative to ORIGINAL_DIR
+    dest    TEXT NOT NULL,      -- path relative to DERIVATIVES_DIR
+    mtime   INTEGER NOT NULL,   -- st_mtime_ns of the original
+    size    INTEGER NOT NULL,
+    sha256  TEXT NOT NULL,
+    params  TEXT NOT NULL,
+    built   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    dest    TEXT NOT NULL,      -- derivative, relative to DERIVATIVES_DIR
+    width   INTEGER NOT NULL,   -- 0 for the LQIP placeholder
+    path    TEXT NOT NULL,      -- relative to DERIVATIVES_DIR ('' for the placeholder)
+    tag     TEXT NOT NULL,      -- content hash the variant was made from
+    data    TEXT,               -- the placeholder's data: URI
+    PRIMARY KEY (dest, width)
+)
+"""
+
+
+def dest_rel_for(rel: str) -> str:
+    """Derivative path for an original: PDFs and .tif become .jpg, others keep their name."""
+    base, ext = os.path.splitext(rel)
+    if ext.lower() in (".pdf", ".tif"):
+        return base + ".jpg"
+    return rel
+
+
+def params_key(size: int, quality: int) -> str:
+    return f"size={size};quality={quality};density=200"
+
+
+def convert_cmd(src: str, dest: str, size: int, quality: int) -> list:
+    # on ubuntu, it's still called convert
+    cmd = ["convert", "-density", "200"]
+    cmd.append(src + "[0]" if src.lower().endswith(".pdf") else src)
+    cmd += [
+        "-background", "white", "-alpha", "remove",
+        "-resize", f"{size}x{size}>",
+        "-strip",
+        "-interlace", "JPEG",
+        "-sampling-factor", "4:2:0",
+        "-quality", str(quality),
+        dest,
+    ]
+    return cmd
+
+
+def variant_tag(sha: str, params: str) -> str:
+    return hashlib.sha256(f"{sha};{params}".encode("ascii")).hexdigest()[:12]
+
+
+def variant_rel(dest_rel: str, width: int, tag: str) -> str:
+    base, _ = os.path.splitext(dest_rel)
+    return os.path.join(VARIANTS_DIR, str(width), f"{base}.{tag}.jpg")
+
+
+def variant_cmd(src: str, dest: str, width: int, quality: int) -> list:
+    return ["convert", src, "-resize", f"{width}x>", "-strip", "-interlace", "JPEG",
+            "-sampling-factor", "4:2:0", "-quality", str(quality), dest]
+
+
+def sha256_file(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def scan_originals(original_dir: str):
+    """Yield (rel, mtime_ns, size) for every candidate image under original_dir, sorted."""
+    for root, dirs, files in os.walk(original_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTS:
+                continue
+            path = os.path.join(root, name)
+            st = os.stat(path)
+            yield os.path.relpath(path, original_dir), st.st_mtime_ns, st.st_size
+
+
+# --- worker-side jobs (run in the process pool) ------------------------------
+
+def hash_job(src: str):
+    return sha256_file(src)
+
+
+def build_job(src: str, dest: str, size: int, quality: int, known_sha: str = None):
+    """Hash (unless known) and convert one original; returns (sha256, error or None)."""
+    sha = known_sha or sha256_file(src)
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    head, tail = os.path.split(dest)
+    base, ext = os.path.splitext(tail)
+    tmp = os.path.join(head, f".{base}.tmp{os.getpid()}{ext}")
+    proc = subprocess.run(convert_cmd(src, tmp, size, quality), capture_output=True, text=True)
+    if proc.returncode != 0 or not os.path.exists(tmp):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return sha, (proc.stderr or f"convert exited with {proc.returncode}").strip()
+    os.replace(tmp, dest)
+    return sha, None
+
+
+def variants_job(src: str, outputs: list, quality: int, lqip: bool):
+    """Make the width variants ``outputs`` [(width, dest)] of one derivative.
+
+    Returns (lqip data URI or None, error or None).
+    """
+    for width, dest in outputs:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + f".tmp{os.getpid()}.jpg"
+        proc = subprocess.run(variant_cmd(src, tmp, width, quality), capture_output=True, text=True)
+        if proc.returncode != 0 or not os.path.exists(tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return None, (proc.stderr or f"convert exited with {proc.returncode}").strip()
+        os.replace(tmp, dest)
+    if not lqip:
+        return None, None
+    proc = subprocess.run(["convert", src, "-resize", f"{LQIP_WIDTH}x>", "-strip", "-quality", "30", "jpg:-"],
+                          capture_output=True)
+    if proc.returncode != 0 or not proc.stdout:
+        return None, (proc.stderr.decode("utf-8", "replace") or "placeholder failed").strip()
+    return "data:image/jpeg;base64," + base64.b64encode(proc.stdout).decode("ascii"), None
+
+
+# --- manifest-driven build ---------------------------------------------------
+
+def open_manifest(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def plan(db, original_dir, derivatives_dir, params, adopt):
+    """Compare the tree with the manifest.
+
+    Returns (unchanged, to_check, to_build, adopted) where to_check holds
+    originals whose mtime/size moved but whose content may not have.
+    """
+    known = {row[0]: row[1:] for row in db.execute(
+        "SELECT src, dest, mtime, size, sha256, params FROM derivatives")}
+    unchanged, to_check, to_build, adopted = [], [], [], []
+    seen = set()
+    for rel, mtime, size in scan_originals(original_dir):
+        seen.add(rel)
+        dest_rel = dest_rel_for(rel)
+        dest_exists = os.path.exists(os.path.join(derivatives_dir, dest_rel))
+        rec = known.get(rel)
+        if rec is None:
+            if adopt and dest_exists:
+                adopted.append((rel, dest_rel, mtime, size))
+            else:
+                to_build.append((rel, dest_rel, mtime, size, None))
+            continue
+        _, old_mtime, old_size, old_sha, old_params = rec
+        if old_params != params or not dest_exists:
+            to_build.append((rel, dest_rel, mtime, size, None))
+        elif old_mtime == mtime and old_size == size:
+            unchanged.append(dest_rel)
+        else:
+            to_check.append((rel, dest_rel, mtime, size, old_sha))
+    orphans = [(src, rec[0]) for src, rec in known.items() if src not in seen]
+    return unchanged, to_check, to_build, adopted, orphans
+
+
+def remove_orphans(db, derivatives_dir, orphans, dry_run):
+    for src, dest_rel in orphans:
+        dest = os.path.join(derivatives_dir, dest_rel)
+        if dry_run:
+            print(f"[dry-run] rm {dest}")
+            continue
+        if os.path.exists(dest):
+            os.remove(dest)
+        db.execute("DELETE FROM derivatives WHERE src = ?", (src,))
+
+
+def record(db, rel, dest_rel, mtime, size, sha, params):
+    db.execute(
+        "INSERT OR REPLACE INTO derivatives (src, dest, mtime, size, sha256, params, built) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (rel, dest_rel, mtime, size, sha, params, time.time()),
+    )
+
+
+def parse_sizes(text: str) -> list:
+    return sorted({int(w) for w in text.split(",") if w.strip()}) if text else []
+
+
+def plan_variants(db, derivatives_dir, params, sizes, lqip):
+    """Variant work for every recorded derivative, and stale variants to delete.
+
+    Returns (jobs, stale) where jobs maps dest_rel to ([(width, path)], tag, want_lqip).
+    """
+    have = {}
+    for dest, width, path, tag in db.execute("SELECT dest, width, path, tag FROM variants"):
+        have[(dest, width)] = (path, tag)
+    jobs, keep = {}, set()
+    for dest_rel, sha in db.execute("SELECT dest, sha256 FROM derivatives"):
+        tag = variant_tag(sha, params)
+        todo = []
+        for width in sizes:
+            path = variant_rel(dest_rel, width, tag)
+            keep.add((dest_rel, width))
+            if have.get((dest_rel, width)) != (path, tag) or not os.path.exists(os.path.join(derivatives_dir, path)):
+                todo.append((width, path))
+        want_lqip = False
+        if lqip:
+            keep.add((dest_rel, 0))
+            want_lqip = have.get((dest_rel, 0), (None, None))[1] != tag
+        if todo or want_lqip:
+            jobs[dest_rel] = (todo, tag, want_lqip)
+    stale = [(dest, width, path) for (dest, width), (path, _) in have.items() if (dest, width) not in keep]
+    return jobs, stale
+
+
+def build_variants(db, pool, derivatives_dir, params, sizes, quality, lqip, dry_run):
+    """Bring _variants/ in line with the derivatives; returns (made, removed, failed)."""
+    jobs, stale = plan_variants(db, derivatives_dir, params, sizes, lqip)
+    for dest, width, path in stale:
+        if dry_run:
+            print(f"[dry-run] rm {os.path.join(derivatives_dir, path)}" if path else f"[dry-run] drop placeholder {dest}")
+            continue
+        if path and os.path.exists(os.path.join(derivatives_dir, path)):
+            os.remove(os.path.join(derivatives_dir, path))
+        db.execute("DELETE FROM variants WHERE dest = ? AND width = ?", (dest, width))
+    if dry_run:
+        for dest_rel, (todo, _, want_lqip) in jobs.items():
+            for width, path in todo:
+                print("[dry-run] " + " ".join(variant_cmd(os.path.join(derivatives_dir, dest_rel),
+                                                          os.path.join(derivatives_dir, path), width, quality)))
+        return len(jobs), len(stale), []
+    futures = {
+        pool.submit(variants_job, os.path.join(derivatives_dir, dest_rel),
+                    [(w, os.path.join(derivatives_dir, p)) for w, p in todo], quality, want_lqip): dest_rel
+        for dest_rel, (todo, _, want_lqip) in jobs.items()
+    }
+    failed = []
+    for fut in as_completed(futures):
+        dest_rel = futures[fut]
+        todo, tag, want_lqip = jobs[dest_rel]
+        data, err = fut.result()
+        if err:
+            failed.append((dest_rel, err))
+            continue
+        for width, path in todo:
+            old = db.execute("SELECT path FROM variants WHERE dest = ? AND width = ?", (dest_rel, width)).fetchone()
+            if old and old[0] != path and os.path.exists(os.path.join(derivatives_dir, old[0])):
+                os.remove(os.path.join(derivatives_dir, old[0]))
+            db.execute("INSERT OR REPLACE INTO variants (dest, width, path, tag, data) VALUES (?, ?, ?, ?, NULL)",
+                       (dest_rel, width, path, tag))
+        if want_lqip:
+            db.execute("INSERT OR REPLACE INTO variants (dest, width, path, tag, data) VALUES (?, 0, '', ?, ?)",
+                       (dest_rel, tag, data))
+    return len(jobs) - len(failed), len(stale), failed
+
+
+def write_variants_manifest(db, derivatives_dir, size):
+    images = {}
+    for dest, width, path, data in db.execute("SELECT dest, width, path, data FROM variants ORDER BY dest, width"):
+        entry = images.setdefault(dest, {"srcset": {}})
+        if width:
+            entry["srcset"][str(width)] = path
+        else:
+            entry["lqip"] = data
+    out = os.path.join(derivatives_dir, VARIANTS_DIR, VARIANTS_MANIFEST)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"size": size, "images": images}, f, ensure_ascii=False, sort_keys=True)
+    os.replace(out + ".tmp", out)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Incrementally build derivative images in a parallel directory tree.")
+    parser.add_argument("original_dir")
+    parser.add_argument("derivatives_dir")
+    parser.add_argument("--clean", action="store_true",
+                        help="Remove existing contents of DERIVATIVES_DIR (and the manifest) first")
+    parser.add_argument("--size", type=int, default=512, help="Max pixel dimension (default: 512)")
+    parser.add_argument("--quality", type=int, default=65, help="JPEG quality (default: 65)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Show what would be done, but do not run ImageMagick")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Parallel conversions (default: number of cores)")
+    parser.add_argument("--adopt", action="store_true",
+                        help="Record existing derivatives that are not in the manifest instead of rebuilding them")
+    parser.add_argument("--sizes", default="",
+                        help="Comma-separated widths of responsive variants to make under _variants/ (e.g. 160,320)")
+    parser.add_argument("--lqip", action="store_true",
+                        help=f"Also make a {LQIP_WIDTH}px placeholder per image (listed in _variants/manifest.json)")
+    args = parser.parse_args(argv)
+    sizes = [w for w in parse_sizes(args.sizes) if w < args.size]
+
+    original_dir = args.original_dir.rstrip("/") or "/"
+    derivatives_dir = args.derivatives_dir.rstrip("/") or "/"
+    if not os.path.isdir(original_dir):
+        sys.stderr.write(f"Could not find directory: {original_dir}\n")
+        return 1
+    os.makedirs(derivatives_dir, exist_ok=True)
+
+    if args.clean and derivatives_dir != "/" and not args.dry_run:
+        print(f"Cleaning derivatives directory: {derivatives_dir}")
+        for name in os.listdir(derivatives_dir):
+            path = os.path.join(derivatives_dir, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    params = params_key(args.size, args.quality)
+    db = open_manifest(os.path.join(derivatives_dir, MANIFEST_NAME))
+    unchanged, to_check, to_build, adopted, orphans = plan(
+        db, original_dir, derivatives_dir, params, args.adopt)
+
+    remove_orphans(db, derivatives_dir, orphans, args.dry_run)
+
+    done = list(unchanged)
+    failed = []
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        # Originals that were touched but maybe not edited: hash before rebuilding.
+        checks = {pool.submit(hash_job, os.path.join(original_dir, rel)): (rel, dest_rel, mtime, size, old_sha)
+                  for rel, dest_rel, mtime, size, old_sha in to_check}
+        for rel, dest_rel, mtime, size in adopted:
+            checks[pool.submit(hash_job, os.path.join(original_dir, rel))] = (rel, dest_rel, mtime, size, None)
+        for fut in as_completed(checks):
+            rel, dest_rel, mtime, size, old_sha = checks[fut]
+            sha = fut.result()
+            if old_sha is None or sha == old_sha:
+                # adopted, or same bytes with a new mtime: keep the derivative
+                if not args.dry_run:
+                    record(db, rel, dest_rel, mtime, size, sha, params)
+                done.append(dest_rel)
+            else:
+                to_build.append((rel, dest_rel, mtime, size, sha))
+
+        if args.dry_run:
+            for rel, dest_rel, _, _, _ in to_build:
+                cmd = convert_cmd(os.path.join(original_dir, rel),
+                                  os.path.join(derivatives_dir, dest_rel), args.size, args.quality)
+                print("[dry-run] " + " ".join(cmd))
+                done.append(dest_rel)
+        else:
+            builds = {
+                pool.submit(build_job, os.path.join(original_dir, rel),
+                            os.path.join(derivatives_dir, dest_rel),
+                            args.size, args.quality, sha): (rel, dest_rel, mtime, size)
+                for rel, dest_rel, mtime, size, sha in to_build
+            }
+            for n, fut in enumerate(as_completed(builds), start=1):
+                rel, dest_rel, mtime, size = builds[fut]
+                sha, err = fut.result()
+                if err:
+                    failed.append((rel, err))
+                    continue
+                record(db, rel, dest_rel, mtime, size, sha, params)
+                done.append(dest_rel)
+                if n % 100 == 0:
+                    db.commit()
+                    print(f"... {n} of {len(builds)} converted", file=sys.stderr)
+        db.commit()
+
+        variants_note = ""
+        variant_failures = []
+        if sizes or args.lqip:
+            made, removed, variant_failures = build_variants(
+                db, pool, derivatives_dir, params, sizes, args.quality, args.lqip, args.dry_run)
+            variants_note = f"; variants: {made} image(s) updated, {removed} stale removed"
+            if not args.dry_run:
+                db.commit()
+                write_variants_manifest(db, derivatives_dir, args.size)
+    db.commit()
+    db.close()
+
+    with open(RESULT_FILE, "w", encoding="utf-8") as f:
+        for dest_rel in sorted(done):
+            f.write(os.path.join(derivatives_dir, dest_rel) + "\n")
+
+    n_built = len(to_build) - len(failed)
+    print(f"{len(done) + len(failed)} files processed: {n_built} converted, "
+          f"{len(done) - n_built} up to date, {len(orphans)} orphaned derivative(s) removed, "
+          f"{len(failed)} failed{variants_note}")
+    for rel, err in variant_failures:
+        print(f"  VARIANTS FAILED {rel}: {err}", file=sys.stderr)
+    for rel, err in failed:
+        print(f"  FAILED {rel}: {err}", file=sys.stderr)
+    print(f"Wrote: {os.path.abspath(RESULT_FILE)}")
+    return 1 if failed or variant_failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
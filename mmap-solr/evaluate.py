@@ -3,7 +3,7 @@
 # check that all the rows have the same number of cells as the header
 #
 # e.g.
-# python evaluate.py 4solr.pahma.public.csv checked.csv > counts.csv
+# python evaluate.py 4solr.pahma.public.csv > counts.csv
 # head -4 counts.csv | expand -20
 #
 # id                  748756              748756
@@ -11,44 +11,59 @@
 # objcount_s          911                 737182
 # objcountnote_s      1550                58810
 #
+# The counting is done by csv_profile.py in one pass without keeping every
+# value: a column with more than csv_profile.EXACT_BELOW distinct values gets
+# an estimated type count, printed with a leading "~".
+#
+# The optional second argument still receives a copy of the well-formed rows
+# (python evaluate.py in.csv checked.csv), but nothing needs it any more.
+#
+
+import csv
+import sys
 
-import sys, csv, collections
-from collections import Counter
+import csv_profile
 
 delim = "\t"
 
-types = {}
-errors = 0
-
-with open(sys.argv[2], 'w', newline="", encoding="utf-8") as f2:
-    writer = csv.writer(f2, delimiter=delim, quoting=csv.QUOTE_NONE, quotechar=chr(255), escapechar='\\')
-    with open(sys.argv[1], 'r', newline="", encoding="utf-8") as f1:
-        reader = csv.reader(f1, delimiter=delim, quoting=csv.QUOTE_NONE, quotechar=chr(255))
-        for lineno, row in enumerate(reader):
-            if lineno == 0:
-                header = row
-                writer.writerow(row)
-                for col in header:
-                    types[col] = Counter()
-                column_count = len(header)
-            else:
-                if len(row) != column_count:
-                    print("%s%s%s" % ('error', delim, delim.join(row).encode('utf-8')))
-                    errors += 1
-                    continue
-                for i, cell in enumerate(row):
-                    if cell != '':
-                        types[header[i]][cell] += 1
-                writer.writerow(row)
-
-if errors > 0:
-    print
-    print("%s errors seen (i.e. data row and header row w different counts.)" % errors)
-    print
-
-print("%s\t%s\t%s" % ('column', 'types', 'tokens'))
-try:
-    for key in header:
-        print("%s\t%s\t%s" % (key, len(types[key]), sum(types[key].values())))
-except:
-    print('evaluation incomplete: something went wrong -- empty file? not csv?')
+
+def write_checked(src, dest, column_count):
+    with open(dest, 'w', newline="", encoding="utf-8") as f2:
+        writer = csv.writer(f2, delimiter=delim, quoting=csv.QUOTE_NONE, quotechar=chr(255), escapechar='\\')
+        with open(src, 'r', newline="", encoding="utf-8") as f1:
+            for row in csv_profile.reader(f1):
+                if len(row) == column_count:
+                    writer.writerow(row)
+
+
+def main(argv):
+    if not argv:
+        sys.stderr.write("Usage: python evaluate.py FILE [CHECKED_COPY]\n")
+        return 2
+    try:
+        prof = csv_profile.profile_file(argv[0], top_k=0, max_bad_rows=1000)
+    except (OSError, UnicodeDecodeError, csv.Error):
+        prof = None
+    if prof is None:
+        print("%s\t%s\t%s" % ('column', 'types', 'tokens'))
+        print('evaluation incomplete: something went wrong -- empty file? not csv?')
+        return 1
+    if len(argv) > 1:
+        write_checked(argv[0], argv[1], len(prof.header))
+
+    for row in prof.bad_rows:
+        print("%s%s%s" % ('error', delim, delim.join(row).encode('utf-8')))
+    if prof.errors > len(prof.bad_rows):
+        print("... and %s more" % (prof.errors - len(prof.bad_rows)))
+    if prof.errors > 0:
+        print("%s errors seen (i.e. data row and header row w different counts.)" % prof.errors)
+
+    print("%s\t%s\t%s" % ('column', 'types', 'tokens'))
+    for col in prof.columns:
+        types = col.distinct.count()
+        print("%s\t%s\t%s" % (col.name, types if col.distinct.exact else "~%s" % types, col.tokens))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -4,6 +4,7 @@ python csv_to_postgres_load.py \
   "$2" \
   "$3" \
   --null-blank \
+  --mode copy \
   --dedupe-skip \
   --dedupe-cols "Site_Name"
 
@@ -1,15 +1,44 @@
 #!/usr/bin/env python3
 # make_report.py — generates standalone HTML report for merged_sites.tsv
-
+#
+# The file is read twice: a first pass keeps only the few fields the indexes
+# and the all-sites map need (SUMMARY_FIELDS), a second pass renders the site
+# cards one at a time. Each section is written out as soon as it is rendered,
+# so memory use does not grow with the number of sites or images.
+#
+# With --mode paged the output is a directory instead: index.html has the
+# front matter and indexes and an empty slot per site, each site card is its
+# own fragment (cards/NNNNN.html) fetched when its slot nears the viewport,
+# and search.json is a compact index for the search box. Fragments whose
+# content has not changed are not rewritten.
+#
+# --langs en,lo,th writes one report per language from the same two passes:
+# each site's image lists are parsed once and its card rendered in every
+# language from that (labels come from report_i18n, with --translations;
+# untranslated text stays in English).
+
+import argparse
+import collections
+import contextlib
 import csv
+import hashlib
+import itertools
+import multiprocessing
+import os
 import sys
-import html
 import json
 import base64
 from datetime import datetime
 from pathlib import Path
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+from urllib.parse import quote
+
+import report_i18n
+from report_i18n import IMAGE_TYPES, OVERVIEW_TITLE, escape, section_plan, translate
+
+# Fields used by the index, the alphabetical index and the all-sites map.
+SUMMARY_FIELDS = ("siteid_s", "site_name_s", "nrprimrv_s", "point_x_s", "point_y_s")
 
 
 # --- Front/back matter
@@ -33,12 +62,21 @@ def make_site_anchor(row: dict) -> str:
     return "site-" + (raw or "site")
 
 
-def render_front_matter() -> str:
+def localized(path: str, lang: str) -> str:
+    """title_page.lo.html for title_page.html in Lao, if there is one; else the English file."""
+    if lang != "en":
+        stem, ext = os.path.splitext(path)
+        if os.path.exists(f"{stem}.{lang}{ext}"):
+            return f"{stem}.{lang}{ext}"
+    return path
+
+
+def render_front_matter(lang: str = "en") -> str:
     # title page, then intro, each separated by an explicit page break
-    title_html = read_snippet("title_page.html")
+    title_html = read_snippet(localized("title_page.html", lang))
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     title_html = title_html.replace("{DATE}", timestamp)
-    intro_html = read_snippet("introduction.html")
+    intro_html = read_snippet(localized("introduction.html", lang))
     return "\n".join([
         '<div class="front-matter">', title_html, '</div>',
         '<div class="page-break"></div>',
@@ -47,14 +85,18 @@ def render_front_matter() -> str:
     ])
 
 
-def render_index(rows: List[dict]) -> str:
+def site_name(row: dict, lang: str = "en") -> str:
+    return (row.get("site_name_s") or "").strip() or translate("(Unnamed site)", lang)
+
+
+def render_index(rows: List[dict], lang: str = "en") -> str:
     """
     Index keyed by Closest River (nrprimrv_s), placed after the introduction.
     """
     idx = {}
     for row in rows:
-        key = (row.get("nrprimrv_s") or "").strip() or "Unknown"
-        site = (row.get("site_name_s") or "").strip() or "(Unnamed site)"
+        key = (row.get("nrprimrv_s") or "").strip() or translate("Unknown", lang)
+        site = site_name(row, lang)
         anchor = make_site_anchor(row)
         idx.setdefault(key, []).append((site, anchor))
 
@@ -64,7 +106,7 @@ def render_index(rows: List[dict]) -> str:
 
     parts = []
     parts.append('<div class="index-section">')
-    parts.append('<h1 class="sec-heading">Sites by Closest River, in alphabetical order</h1>')
+    parts.append(f'<h1 class="sec-heading">{escape(translate("Sites by Closest River, in alphabetical order", lang))}</h1>')
     parts.append('<dl class="index-dl">')
     for k in keys:
         parts.append(f'<dt>{escape(k)}</dt>')
@@ -77,17 +119,18 @@ def render_index(rows: List[dict]) -> str:
 
 # --- Image popout overlay
 
-IMG_POPUP_OVERLAY = """
+IMG_POPUP_PANEL = """
 <div id="imgPopup">
   <div class="img-popup-panel">
     <div class="img-popup-topbar">
       <div id="imgPopupTitle" style="font-weight:700;"></div>
-      <div class="img-popup-close" onclick="hideImgPopup()">Close</div>
+      <div class="img-popup-close" onclick="hideImgPopup()">{close}</div>
     </div>
     <div id="imgPopupGrid" class="img-popup-grid"></div>
   </div>
-</div>
-<script>
+</div>"""
+
+IMG_POPUP_SCRIPT = """<script>
 function hideImgPopup(){
   const o=document.getElementById("imgPopup");
   o.classList.remove("open");
@@ -143,90 +186,88 @@ document.getElementById("imgPopup").addEventListener("click", function(e){
 </script>
 """
 
-# === LABEL → FIELD MAPPING
-label_to_field: Dict[str, str] = {
-    # --- Site Info ---
-    "Site Info": "heading",
-    "Site:": "site_name_s",
-    "Description:": "sitedesc_s",
-    "Date Recorded:": "year_recorded_s",
-    "Visit date:": "site_date_s",
-    "Access:": "acces_s",
-    "Nearest Village:": "vill_name_s",
-    "Closest River:": "nrprimrv_s",
-    "Closest Stream:": "nrsecrv_s",
-    "Visit Comments:": "visit_comm_s",
-    "Excavation Priority:": "exc_pri_s",
-
-    # --- Geographic Info ---
-    "Geographic Info": "heading",
-    "Latitude:": "point_y_s",
-    "Longitude:": "point_x_s",
-    "Length:": "dimena_s",
-    "Width:": "dimenb_s",
-    "Min Depth:": "estdepth_s",
-    "Max Depth:": "",
-    "Time Spent:": "time_spent_s",
-
-    # --- Site Characteristics ---
-    "Site Characteristics": "heading",
-    "Site Characteristics:": "site_characteristics_s",
-    "Site Characteristics Comments:": "site_comm_s",
-
-    # --- Site Conditions ---
-    "Site Conditions": "heading",
-    "Site Conditions Comments:": "condcomm_s",
-    "Caves:": "cave_fl_s",
-
-    # --- Recent Disturbance ---
-    "Recent Disturbance": "heading",
-    "Distubance:": "recent_disturbance_s",
-    "Disturbance Comments:": "distcomm_s",
-
-    # --- Past Site Functions ---
-    "Past Site Functions": "heading",
-    "Past Site Function:": "past_site_functions_s",
-    "Past Functions Comments:": "pastfcomm_s",
-
-    # --- Environmental Conditions ---
-    "Environmental Conditions": "heading",
-    "Environment:": "environment_s",
-    "Environmental Comments:": "envcomm_s",
-    "Vegetation:": "natveg_s",
-
-    # --- Artifact Info ---
-    "Artifact Info": "heading",
-    "Artifacts Present:": "artifacts_present_s",
-    "Artifacts:": "oth_art_s",
-    "Artifact Comments:": "artcomm_s",
-}
+def build_image_url(path: str) -> str:
+    if not path:
+        return ""
+    return f"{URL_PREFIX}{path}"
+
 
-# Image types (Map handled separately)
-IMAGE_TYPES: List[Tuple[str, str]] = [
-    ("General view", "General_view_THUMBNAILS_ss"),
-    ("Environment", "Environment_THUMBNAILS_ss"),
-    ("Feature", "Feature_THUMBNAILS_ss"),
-    ("Artifacts on site", "Artifacts_on_site_THUMBNAILS_ss"),
-    ("Action-process", "Action_process_THUMBNAILS_ss"),
-    ("Studio bag shot", "Studio_bag_shot_THUMBNAILS_ss"),
-    ("Studio artifact shot", "Studio_artifact_shot_THUMBNAILS_ss"),
-    ("Miscellaneous", "Miscellaneous_THUMBNAILS_ss"),
-    ("Speleothem", "Speleothem_THUMBNAILS_ss"),
-    ("Documents", "Documents_THUMBNAILS_ss"),
-    ("Misc", "Misc_THUMBNAILS_ss"),
-    ("Artifacts", "Artifacts_THUMBNAILS_ss"),
-    ("People", "People_THUMBNAILS_ss"),
-]
+# --- Responsive images (derivatives.py --sizes/--lqip, see load_variants)
 
+VARIANTS: Dict[str, dict] = {}   # derivative path -> {"srcset": {width: path}, "lqip": data URI}
+VARIANTS_SIZE = 512              # nominal width of the derivatives themselves
+LQIP = False
+LAZY = False                     # loading="lazy" on every image (paged mode only: a
+                                 # printed single file must have them all loaded)
+LAZY_ATTR = ' loading="lazy"'
 
-def escape(s: str) -> str:
-    return html.escape(s or "", quote=True)
+# rendered width of each kind of image, for the sizes attribute
+IMG_SIZES = {
+    "img-main": "(max-width: 800px) 100vw, 600px",
+    "img-small": "(max-width: 800px) 33vw, 200px",
+    "geo-map-thumb": "130px",
+}
 
 
-def build_image_url(path: str) -> str:
+def load_variants(path: Optional[str], lqip: bool = False, lazy: bool = False) -> None:
+    """Use the responsive variants listed in a _variants/manifest.json."""
+    global VARIANTS, VARIANTS_SIZE, LQIP, LAZY
+    LQIP = lqip
+    LAZY = lazy
     if not path:
-        return ""
-    return f"{URL_PREFIX}{path}"
+        return
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    VARIANTS = manifest.get("images", {})
+    VARIANTS_SIZE = int(manifest.get("size", VARIANTS_SIZE))
+
+
+# --- Static maps (sitemaps.py, see load_site_maps)
+
+SITE_MAPS: Dict[str, str] = {}           # "point_y_s,point_x_s" -> locator URL
+SITE_MAP_OVERVIEW: Optional[str] = None   # overview SVG, inlined so its site links work
+
+
+def load_site_maps(map_dir: Optional[str], report_dir: str = ".") -> None:
+    """Use the maps sitemaps.py wrote to ``map_dir``, linked relative to ``report_dir``."""
+    global SITE_MAPS, SITE_MAP_OVERVIEW
+    if not map_dir:
+        return
+    with open(os.path.join(map_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = Path(os.path.relpath(map_dir, report_dir)).as_posix()
+    SITE_MAPS = {k: quote(f"{base}/{p}") for k, p in manifest.get("sites", {}).items()}
+    SITE_MAP_OVERVIEW = Path(map_dir, manifest["overview"]).read_text(encoding="utf-8").strip()
+
+
+def srcset_url(path: str) -> str:
+    # srcset candidates are separated by blanks and commas, so those must be encoded
+    return build_image_url(quote(path, safe="/"))
+
+
+def img_attrs(path: str, css_class: str) -> str:
+    """The src attribute of an <img> for a derivative, plus srcset/sizes and a
+    placeholder when variants are known (otherwise just src)."""
+    attrs = f'src="{escape(build_image_url(path))}"'
+    v = VARIANTS.get(path)
+    if v and v.get("srcset"):
+        cands = [f"{srcset_url(p)} {w}w" for w, p in sorted(v["srcset"].items(), key=lambda kv: int(kv[0]))]
+        cands.append(f"{srcset_url(path)} {VARIANTS_SIZE}w")
+        attrs += f' srcset="{escape(", ".join(cands))}" sizes="{IMG_SIZES[css_class]}"'
+    if LAZY:
+        attrs += LAZY_ATTR
+    if LQIP and v and v.get("lqip"):
+        attrs += f' style="background:url({escape(v["lqip"])}) center/cover no-repeat"'
+    return attrs
+
+
+def popup_thumb(path: str) -> str:
+    """Image for the popup grid: the smallest variant at least 320px wide."""
+    widths = sorted((int(w), p) for w, p in VARIANTS.get(path, {}).get("srcset", {}).items())
+    for w, p in widths:
+        if w >= 320:
+            return build_image_url(p)
+    return build_image_url(path)
 
 
 def get_thumb_list(raw: str) -> List[str]:
@@ -241,45 +282,23 @@ def get_filename(path: str) -> str:
     return path.replace("\\", "/").split("/")[-1]
 
 
-def render_metadata_column(row: dict) -> str:
-    sections = []
-    current_heading = None
-    current_rows: List[Tuple[str, str]] = []
-
-    def flush():
-        nonlocal current_heading, current_rows, sections
-        if current_heading and current_rows:
-            sections.append({"heading": current_heading, "rows": current_rows})
-        current_heading = None
-        current_rows = []
-
-    for label, field in label_to_field.items():
-        if field == "heading":
-            flush()
-            current_heading = label
-            current_rows = []
-            continue
-        if not field:
-            continue
-        v = (row.get(field) or "").strip()
-        if not v:
-            continue
-        current_rows.append((label, v))
-
-    flush()
-
+def render_metadata_column(row: dict, lang: str = "en") -> str:
     html_parts: List[str] = []
 
-    for sec in sections:
-        heading = sec["heading"]
-        rows = sec["rows"]
-        html_parts.append(f'<h3 class="sec-heading">{escape(heading)}</h3>')
+    for sec in section_plan(lang):
+        rows = []
+        for slot in sec.slots:
+            v = (row.get(slot.field) or "").strip()
+            if v:
+                rows.append(f"{slot.row_html}{escape(v)}</td></tr>")
+        if not rows:
+            continue
+        html_parts.append(sec.heading_html)
 
-        if heading == "Geographic Info":
+        if sec.geo:
             map_raw = (row.get("Map_THUMBNAILS_ss") or "").strip()
             thumbs = get_thumb_list(map_raw)
             map_thumb = thumbs[0] if thumbs else ""
-            map_url = build_image_url(map_thumb)
             map_title = get_filename(map_thumb)
 
             lat = (row.get("point_y_s") or "").strip()
@@ -287,15 +306,7 @@ def render_metadata_column(row: dict) -> str:
             have_coords = bool(lat and lon)
             have_3rdcol = bool(map_thumb or have_coords)
 
-            meta_rows_html = []
-            for label, value in rows:
-                meta_rows_html.append(
-                    "<tr>"
-                    f"<th class='meta-label'>{escape(label)}</th>"
-                    f"<td class='meta-value'>{escape(value)}</td>"
-                    "</tr>"
-                )
-            meta_rows_str = "".join(meta_rows_html)
+            meta_rows_str = "".join(rows)
 
             html_parts.append('<table class="meta-table"><tbody><tr>')
             html_parts.append(
@@ -310,11 +321,33 @@ def render_metadata_column(row: dict) -> str:
                 html_parts.append("<td class='geo-extra'>")
                 if map_thumb:
                     html_parts.append(
-                        f'<img src="{escape(map_url)}" '
+                        f'<img {img_attrs(map_thumb, "geo-map-thumb")} '
                         f'title="{escape(map_title)}" '
                         'class="geo-map-thumb" />'
                     )
-                if have_coords:
+                locator = SITE_MAPS.get(f"{lat},{lon}") if have_coords else None
+                if locator:
+                    emb = (
+                        f"https://www.google.com/maps?q={escape(lat)},"
+                        f"{escape(lon)}&z=14&output=embed"
+                    )
+                    link = (
+                        f"https://www.google.com/maps?q={escape(lat)},"
+                        f"{escape(lon)}&z=14"
+                    )
+                    # the live map only loads if the locator is clicked
+                    html_parts.append(
+                        f'<a href="{link}" target="_blank" class="geo-locator" '
+                        f'data-embed="{emb}" onclick="return showLiveMap(this)">'
+                        f'<img src="{escape(locator)}" class="geo-locator-img" '
+                        f'alt="{escape(translate("Location map (click for a live map)", lang))}"'
+                        f'{LAZY_ATTR if LAZY else ""} /></a>'
+                    )
+                    html_parts.append(
+                        f'<div><a href="{link}" target="_blank" '
+                        f'class="geo-link">{escape(translate("Open in Google Maps", lang))}</a></div>'
+                    )
+                elif have_coords:
                     emb = (
                         f"https://www.google.com/maps?q={escape(lat)},"
                         f"{escape(lon)}&z=14&output=embed"
@@ -329,28 +362,31 @@ def render_metadata_column(row: dict) -> str:
                     )
                     html_parts.append(
                         f'<div><a href="{link}" target="_blank" '
-                        'class="geo-link">Open in Google Maps</a></div>'
+                        f'class="geo-link">{escape(translate("Open in Google Maps", lang))}</a></div>'
                     )
                 html_parts.append("</td>")
 
             html_parts.append("</tr></tbody></table>")
         else:
             html_parts.append('<table class="meta-table"><tbody>')
-            for label, value in rows:
-                html_parts.append(
-                    "<tr>"
-                    f"<th class='meta-label'>{escape(label)}</th>"
-                    f"<td class='meta-value'>{escape(value)}</td>"
-                    "</tr>"
-                )
+            html_parts.extend(rows)
             html_parts.append("</tbody></table>")
 
     return "\n".join(html_parts)
 
 
-def render_images_column(row: dict) -> str:
-    parts: List[str] = []
+class ImageBlock(NamedTuple):
+    """One image type of a site, with everything that does not depend on the language."""
+    type_label: str
+    n_images: int
+    items_b64: str      # the popup's images
+    main_html: str      # the main image, ending the img-all-wrap div
+    extras: Tuple[str, ...]
 
+
+def image_blocks(row: dict) -> List[ImageBlock]:
+    """Parse a site's image lists (done once however many languages are rendered)."""
+    blocks = []
     for type_label, field_name in IMAGE_TYPES:
         raw = (row.get(field_name) or "").strip()
         thumbs = get_thumb_list(raw)
@@ -364,12 +400,11 @@ def render_images_column(row: dict) -> str:
         for i, t in enumerate(thumbs):
             full_path = files[i] if i < len(files) and files[i] else t
             items.append({
-                "thumb": build_image_url(t),
+                "thumb": popup_thumb(t),
                 "full": build_image_url(t),
                 "title": get_filename(t)
             })
         items_b64 = base64.b64encode(json.dumps(items).encode("utf-8")).decode("ascii")
-        n_images = len(items)
 
         main = thumbs[0]
         extras = thumbs[1:4]  # up to 3 more
@@ -377,37 +412,50 @@ def render_images_column(row: dict) -> str:
         main_title = get_filename(main)
         main_full = main_url
 
+        # Main image (wrapped in a link to the full image)
+        main_html = (
+            f'<a href="{escape(main_full)}" target="_blank">'
+            f'<img {img_attrs(main, "img-main")} title="{escape(main_title)}" class="img-main" />'
+            f'</a></div>'
+        )
+
+        # Extra thumbnails (also wrapped links)
+        extra_parts = []
+        for i, t in enumerate(extras, start=1):
+            url = build_image_url(t)
+            title = get_filename(t)
+            full_u = url
+            extra_parts.append(
+                f'<a href="{escape(full_u)}" target="_blank">'
+                f'<img {img_attrs(t, "img-small")} title="{escape(title)}" class="img-small" />'
+                f'</a>'
+            )
+        blocks.append(ImageBlock(type_label, len(items), items_b64, main_html, tuple(extra_parts)))
+    return blocks
+
+
+def render_images_column(row: dict, lang: str = "en", blocks: Optional[List[ImageBlock]] = None) -> str:
+    parts: List[str] = []
+    site_name = (row.get("site_name_s") or "").strip()
+
+    for block in image_blocks(row) if blocks is None else blocks:
+        type_label = translate(block.type_label, lang)
+        n_images = block.n_images
         parts.append('<div class="img-type-block">')
-        site_name = (row.get("site_name_s") or "").strip()
-        popup_title = f"{site_name}, {n_images} {type_label} images"
+        popup_title = translate("{site}, {n} {type} images", lang).format(site=site_name, n=n_images, type=type_label)
 
         parts.append(
             f'<div class="img-type-heading">{escape(type_label)}</div>'
             f'<div class="img-all-wrap">'
             f'<a href="#" class="img-all-link" '
-            f'onclick="showImgPopupB64(\'{escape(popup_title)}\', \'{escape(items_b64)}\'); return false;">'
-            f'all {n_images} images</a>'
+            f'onclick="showImgPopupB64(\'{escape(popup_title)}\', \'{escape(block.items_b64)}\'); return false;">'
+            f'{escape(translate("all {n} images", lang).format(n=n_images))}</a>'
         )
+        parts.append(block.main_html)
 
-        # Main image (wrapped in a link to the full image)
-        parts.append(
-            f'<a href="{escape(main_full)}" target="_blank">'
-            f'<img src="{escape(main_url)}" title="{escape(main_title)}" class="img-main" />'
-            f'</a></div>'
-        )
-
-        # Extra thumbnails (also wrapped links)
-        if extras:
+        if block.extras:
             parts.append('<div class="img-small-row">')
-            for i, t in enumerate(extras, start=1):
-                url = build_image_url(t)
-                title = get_filename(t)
-                full_u = url
-                parts.append(
-                    f'<a href="{escape(full_u)}" target="_blank">'
-                    f'<img src="{escape(url)}" title="{escape(title)}" class="img-small" />'
-                    f'</a>'
-                )
+            parts.extend(block.extras)
             parts.append("</div>")
 
         parts.append("</div>")  # end type block
@@ -415,11 +463,11 @@ def render_images_column(row: dict) -> str:
     return "\n".join(parts)
 
 
-def render_site_div(row: dict) -> str:
+def render_site_div(row: dict, lang: str = "en", blocks: Optional[List[ImageBlock]] = None) -> str:
     site_name = escape(row.get("site_name_s", ""))
     anchor = make_site_anchor(row)
-    meta_html = render_metadata_column(row)
-    img_html = render_images_column(row)
+    meta_html = render_metadata_column(row, lang)
+    img_html = render_images_column(row, lang, blocks)
     return f'''
 <div class="site-card" id="{anchor}">
   <h2 class="site-title">{site_name}</h2>
@@ -431,7 +479,14 @@ def render_site_div(row: dict) -> str:
 '''.strip()
 
 
-def render_index_alpha(rows: List[dict]) -> str:
+def render_site_langs(job: Tuple[dict, Tuple[str, ...]]) -> Tuple[str, ...]:
+    """A site's cards in several languages, from one parse of its image lists."""
+    row, langs = job
+    blocks = image_blocks(row)
+    return tuple(render_site_div(row, lang, blocks) for lang in langs)
+
+
+def render_index_alpha(rows: List[dict], lang: str = "en") -> str:
     """
     Index of sites in alphabetical order, rendered in as many columns as needed,
     with a maximum of 60 rows per column.
@@ -439,7 +494,7 @@ def render_index_alpha(rows: List[dict]) -> str:
     """
     items = []
     for row in rows:
-        site = (row.get("site_name_s") or "").strip() or "(Unnamed site)"
+        site = site_name(row, lang)
         anchor = make_site_anchor(row)
 
         lat_raw = (row.get("point_y_s") or "").strip()
@@ -465,7 +520,7 @@ def render_index_alpha(rows: List[dict]) -> str:
 
     parts = []
     parts.append('<div class="index-section">')
-    parts.append('<h1 class="sec-heading">Sites in alphabetical order</h1>')
+    parts.append(f'<h1 class="sec-heading">{escape(translate("Sites in alphabetical order", lang))}</h1>')
     parts.append('<table class="alpha-index-table"><tr>')
 
     for col in cols:
@@ -484,7 +539,52 @@ def render_index_alpha(rows: List[dict]) -> str:
     return "\n".join(parts)
 
 
-def render_all_sites_map(rows: List[dict]) -> str:
+def map_popup_text(lang: str = "en") -> str:
+    """The marker popups' link text (already HTML-escaped), for ALL_SITES_MAP_INIT."""
+    text = {"report": escape(translate("Open in report", lang)),
+            "google": escape(translate("Open in Google Maps", lang))}
+    return f'<script id="all-sites-text" type="application/json">{json.dumps(text)}</script>'
+
+
+# Draws the points in #all-sites-data on #allSitesMap, once Leaflet (L) is loaded,
+# with the link text from #all-sites-text.
+ALL_SITES_MAP_INIT = """  function init(){
+    if(typeof L === "undefined"){ return; }
+    var dataEl = document.getElementById("all-sites-data");
+    if(!dataEl){ return; }
+    var ALL_SITES = JSON.parse(dataEl.textContent);
+    var TEXT = JSON.parse(document.getElementById("all-sites-text").textContent);
+
+    var map = L.map("allSitesMap", { zoomControl: true });
+    L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
+      maxZoom: 18,
+      attribution: '&copy; OpenStreetMap contributors'
+    }).addTo(map);
+
+    var bounds = [];
+    for(var i=0;i<ALL_SITES.length;i++){
+      var p = ALL_SITES[i];
+      var ll = [p.lat, p.lon];
+      bounds.push(ll);
+
+      var g = "https://www.google.com/maps?q=" + p.lat + "," + p.lon + "&z=14";
+      var html = ''
+        + '<div style="font-weight:700; margin-bottom:4px;">' + p.site + '</div>'
+        + '<div><a href="#' + p.anchor + '">' + TEXT.report + '</a></div>'
+        + '<div><a href="' + g + '" target="_blank">' + TEXT.google + '</a></div>';
+
+      L.marker(ll).addTo(map).bindPopup(html);
+    }
+    if(bounds.length){
+      map.fitBounds(bounds, { padding: [20,20] });
+    } else {
+      map.setView([0,0], 2);
+    }
+  }
+"""
+
+
+def render_all_sites_map(rows: List[dict], lang: str = "en") -> str:
     """
     Full-page interactive map of ALL sites with coordinates (Leaflet + OSM tiles).
     Uses a <script type="application/json"> block to safely embed data (no quoting issues).
@@ -501,59 +601,33 @@ def render_all_sites_map(rows: List[dict]) -> str:
         except ValueError:
             continue
 
-        site = (row.get("site_name_s") or "").strip() or "(Unnamed site)"
+        site = site_name(row, lang)
         anchor = make_site_anchor(row)
         pts.append({"site": site, "anchor": anchor, "lat": lat, "lon": lon})
 
+    heading = escape(translate("All Sites Map", lang))
     if not pts:
-        return '<div class="index-section"><h1 class="sec-heading">All Sites Map</h1><p>No coordinates found.</p></div>'
+        return (f'<div class="index-section"><h1 class="sec-heading">{heading}</h1>'
+                f'<p>{escape(translate("No coordinates found.", lang))}</p></div>')
 
     pts_json = json.dumps(pts)
+    if SITE_MAP_OVERVIEW is not None:
+        return render_static_sites_map(pts_json, lang)
 
     parts = []
     parts.append('<div class="index-section">')
-    parts.append('<h1 class="sec-heading">All Sites Map</h1>')
-    parts.append('<div class="map-note">Interactive map (pan/zoom). Markers link to the site entry and to Google Maps.</div>')
+    parts.append(f'<h1 class="sec-heading">{heading}</h1>')
+    note = translate("Interactive map (pan/zoom). Markers link to the site entry and to Google Maps.", lang)
+    parts.append(f'<div class="map-note">{escape(note)}</div>')
     parts.append('<div id="allSitesMap" class="all-sites-map"></div>')
     parts.append('<script id="all-sites-data" type="application/json">')
     parts.append(pts_json)
     parts.append('</script>')
+    parts.append(map_popup_text(lang))
     parts.append('<script>')
     parts.append("""
 (function(){
-  function init(){
-    if(typeof L === "undefined"){ return; }
-    var dataEl = document.getElementById("all-sites-data");
-    if(!dataEl){ return; }
-    var ALL_SITES = JSON.parse(dataEl.textContent);
-
-    var map = L.map("allSitesMap", { zoomControl: true });
-    L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
-      maxZoom: 18,
-      attribution: '&copy; OpenStreetMap contributors'
-    }).addTo(map);
-
-    var bounds = [];
-    for(var i=0;i<ALL_SITES.length;i++){
-      var p = ALL_SITES[i];
-      var ll = [p.lat, p.lon];
-      bounds.push(ll);
-
-      var g = "https://www.google.com/maps?q=" + p.lat + "," + p.lon + "&z=14";
-      var html = ''
-        + '<div style="font-weight:700; margin-bottom:4px;">' + p.site + '</div>'
-        + '<div><a href="#' + p.anchor + '">Open in report</a></div>'
-        + '<div><a href="' + g + '" target="_blank">Open in Google Maps</a></div>';
-
-      L.marker(ll).addTo(map).bindPopup(html);
-    }
-    if(bounds.length){
-      map.fitBounds(bounds, { padding: [20,20] });
-    } else {
-      map.setView([0,0], 2);
-    }
-  }
-  if(document.readyState === "loading"){
+""" + ALL_SITES_MAP_INIT + """  if(document.readyState === "loading"){
     document.addEventListener("DOMContentLoaded", init);
   } else {
     init();
@@ -565,28 +639,427 @@ def render_all_sites_map(rows: List[dict]) -> str:
     return "\n".join(parts)
 
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python make_report.py merged_sites.tsv <local|aws> > report.html", file=sys.stderr)
-        sys.exit(1)
+def render_static_sites_map(pts_json: str, lang: str = "en") -> str:
+    """The all-sites map as the pre-drawn overview from sitemaps.py; Leaflet is
+    only fetched, and the interactive map drawn, when the reader asks for it."""
+    parts = []
+    parts.append('<div class="index-section">')
+    parts.append(f'<h1 class="sec-heading">{escape(translate("All Sites Map", lang))}</h1>')
+    parts.append(f'<div class="map-note">{escape(translate("Click a site to go to its entry.", lang))} '
+                 '<button type="button" class="map-live-btn" onclick="showAllSitesMap(this)">'
+                 f'{escape(translate("Interactive map", lang))}</button></div>')
+    title = f"<title>{escape(OVERVIEW_TITLE)}</title>"
+    overview = SITE_MAP_OVERVIEW.replace(title, f"<title>{escape(translate(OVERVIEW_TITLE, lang))}</title>", 1)
+    parts.append(f'<div class="all-sites-static">{overview}</div>')
+    parts.append('<div id="allSitesMap" class="all-sites-map" style="display:none"></div>')
+    parts.append('<script id="all-sites-data" type="application/json">')
+    parts.append(pts_json)
+    parts.append('</script>')
+    parts.append(map_popup_text(lang))
+    parts.append('<script>')
+    parts.append("""
+function showAllSitesMap(btn){
+""" + ALL_SITES_MAP_INIT + """
+  btn.disabled = true;
+  var css = document.createElement("link");
+  css.rel = "stylesheet";
+  css.href = LEAFLET_URL + "leaflet.css";
+  document.head.appendChild(css);
+  var js = document.createElement("script");
+  js.src = LEAFLET_URL + "leaflet.js";
+  js.onload = function(){
+    document.querySelector(".all-sites-static").style.display = "none";
+    document.getElementById("allSitesMap").style.display = "block";
+    init();
+  };
+  document.head.appendChild(js);
+}
+""")
+    parts.append('</script>')
+    parts.append('</div>')
+    return "\n".join(parts)
 
-    global URL_PREFIX
 
-    if 'local' in sys.argv[2].lower():
+# Styles and script for the static maps (emitted once, before any site card)
+SITE_MAPS_SUPPORT = """
+<style>
+.all-sites-static svg { display: block; width: 1000px; max-width: 100%; height: auto; margin: 0 auto; border: 1px solid #ccc; }
+.all-sites-map { width: 1000px; max-width: 100%; height: 75vh; border: 1px solid #ccc; margin: 0 auto; }
+.map-live-btn { margin-left: 8px; }
+.geo-locator { display: block; }
+.geo-locator-img { width: 130px; height: 130px; border: 1px solid #ccc; border-radius: 2px; margin-bottom: 4px; cursor: pointer; }
+@media print { .map-live-btn { display: none; } }
+</style>
+<script>
+var LEAFLET_URL = "https://unpkg.com/leaflet@1.9.4/dist/";
+// swap a site's locator image for the live map, on the first click
+function showLiveMap(a){
+  var f = document.createElement("iframe");
+  f.src = a.getAttribute("data-embed");
+  f.className = "geo-iframe";
+  a.parentNode.replaceChild(f, a);
+  return false;
+}
+</script>
+"""
+
+
+class RenderCache:
+    """
+    Rendered site cards on disk, content-addressed by the row's fields plus a
+    template hash (the source of this module and report_i18n, the image URL
+    prefix, the site map URLs, and the image variants, site maps and
+    translations in use), so an edit to any of them renders every card
+    afresh. Each language's card has its own entry. Fragments not used by a
+    run are deleted at the end of it.
+    """
+
+    def __init__(self, root: str, template_files: Tuple[str, ...] = (__file__, report_i18n.__file__),
+                 data_files: Tuple[Optional[str], ...] = ()):
+        self.root = Path(root)
+        h = hashlib.sha256(URL_PREFIX.encode("utf-8"))
+        h.update(b"lqip" if LQIP else b"")
+        h.update(b"lazy" if LAZY else b"")
+        # locator URLs are relative to the report, so they differ with its location
+        h.update(json.dumps(SITE_MAPS, sort_keys=True).encode("utf-8"))
+        for name in template_files + tuple(f for f in data_files if f):
+            h.update(Path(name).read_bytes())
+        self.template_hash = h.hexdigest()
+        self.hits = 0
+        self.misses = 0
+        self.used = set()
+
+    def key(self, row: dict, lang: str = "en") -> str:
+        h = hashlib.sha256(self.template_hash.encode("ascii"))
+        h.update(lang.encode("utf-8"))
+        h.update(json.dumps(list(row.items()), ensure_ascii=False).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.html"
+
+    def get(self, key: str) -> Optional[str]:
+        self.used.add(key)
+        try:
+            return self._path(key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, fragment: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{key}.tmp{os.getpid()}")
+        tmp.write_text(fragment, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def lookup(self, row: dict, langs: Tuple[str, ...]) -> Tuple[List[str], List[Optional[str]], Tuple[int, ...]]:
+        """(keys, cards, indexes of the languages not cached) for one site."""
+        keys = [self.key(row, lang) for lang in langs]
+        cards = [self.get(k) for k in keys]
+        missing = tuple(i for i, card in enumerate(cards) if card is None)
+        self.hits += len(langs) - len(missing)
+        self.misses += len(missing)
+        return keys, cards, missing
+
+    def render(self, row: dict, langs: Tuple[str, ...] = ("en",)) -> Tuple[str, ...]:
+        keys, cards, missing = self.lookup(row, langs)
+        if missing:
+            for i, fragment in zip(missing, render_site_langs((row, tuple(langs[i] for i in missing)))):
+                cards[i] = fragment
+                self.put(keys[i], fragment)
+        return tuple(cards)
+
+    def prune(self) -> int:
+        removed = 0
+        for path in self.root.glob("*/*.html"):
+            if path.stem not in self.used:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def stats(self) -> str:
+        return f"site cards: {self.hits} cached, {self.misses} rendered"
+
+
+def render_cards(rows, langs: Tuple[str, ...] = ("en",), cache: Optional[RenderCache] = None,
+                 pool=None, jobs: int = 1) -> Iterator[Tuple[str, ...]]:
+    """
+    Site cards for ``rows``, in order: for each site, a tuple of its card in
+    each of ``langs``.
+    With a process pool, the rows are taken in batches; the cards a batch needs
+    (those not in the cache) are rendered by the pool while the previous batch
+    is being written, so only two batches are in memory at a time.
+    """
+    if pool is None:
+        for row in rows:
+            yield cache.render(row, langs) if cache else render_site_langs((row, langs))
+        return
+
+    def submit(chunk):
+        if cache:
+            looked_up = [cache.lookup(r, langs) for r in chunk]
+        else:
+            looked_up = [([None] * len(langs), [None] * len(langs), tuple(range(len(langs)))) for _ in chunk]
+        todo = [i for i, (_, _, missing) in enumerate(looked_up) if missing]
+        jobs_ = [(chunk[i], tuple(langs[j] for j in looked_up[i][2])) for i in todo]
+        result = pool.map_async(render_site_langs, jobs_, chunksize=max(1, len(todo) // (4 * jobs)))
+        return looked_up, todo, result
+
+    def finish(looked_up, todo, result):
+        for i, fragments in zip(todo, result.get()):
+            keys, cards, missing = looked_up[i]
+            for j, fragment in zip(missing, fragments):
+                cards[j] = fragment
+                if cache:
+                    cache.put(keys[j], fragment)
+        return [tuple(cards) for _, cards, _ in looked_up]
+
+    rows = iter(rows)
+    pending = None
+    while True:
+        chunk = list(itertools.islice(rows, 64 * jobs))
+        job = submit(chunk) if chunk else None
+        if pending:
+            yield from finish(*pending)
+        if job is None:
+            return
+        pending = job
+
+
+# --- Paged mode: a shell page plus one fragment per site, loaded on scroll
+
+PAGED_SEARCH = """
+<div class="paged-search">
+  <input type="search" id="siteSearch" placeholder="{placeholder}" autocomplete="off">
+  <ul id="siteSearchResults"></ul>
+</div>
+"""
+
+PAGED_LOADER = """
+<style>
+.site-slot { min-height: 480px; background: #fff; border-radius: 4px; padding: 12px; margin-bottom: 20px; }
+.paged-search { position: sticky; top: 0; z-index: 10; background: #f8f9fa; padding: 8px 0; }
+.paged-search input { width: 100%; font-size: 1rem; padding: 6px 8px; }
+#siteSearchResults { list-style: none; margin: 4px 0 0 0; padding: 0; max-height: 50vh; overflow: auto; background: #fff; }
+#siteSearchResults li { padding: 2px 8px; }
+@media print { .paged-search { display: none; } }
+</style>
+<script>
+(function(){
+  function load(slot){
+    if(slot.dataset.loading){ return; }
+    slot.dataset.loading = "1";
+    fetch(slot.dataset.card).then(function(r){ return r.text(); }).then(function(h){ slot.outerHTML = h; });
+  }
+  var slots = document.querySelectorAll(".site-slot");
+  if("IntersectionObserver" in window){
+    var io = new IntersectionObserver(function(entries){
+      entries.forEach(function(e){ if(e.isIntersecting){ io.unobserve(e.target); load(e.target); } });
+    }, { rootMargin: "1000px 0px" });
+    slots.forEach(function(s){ io.observe(s); });
+  } else {
+    slots.forEach(load);
+  }
+  function showHash(){
+    var el = location.hash && document.getElementById(location.hash.slice(1));
+    if(el && el.classList.contains("site-slot")){ load(el); }
+  }
+  window.addEventListener("hashchange", showHash);
+  showHash();
+
+  var index = null, box = document.getElementById("siteSearch"), out = document.getElementById("siteSearchResults");
+  function esc(s){ return String(s||"").replace(/&/g,"&amp;").replace(/</g,"&lt;").replace(/>/g,"&gt;").replace(/"/g,"&quot;"); }
+  function search(){
+    var q = box.value.trim().toLowerCase();
+    if(!q){ out.innerHTML = ""; return; }
+    var hits = [];
+    for(var i = 0; i < index.length && hits.length < 50; i++){
+      if(index[i][2].indexOf(q) >= 0){ hits.push(index[i]); }
+    }
+    out.innerHTML = hits.map(function(h){ return '<li><a href="#' + esc(h[1]) + '">' + esc(h[0]) + '</a></li>'; }).join("");
+  }
+  box.addEventListener("input", function(){
+    if(index){ search(); return; }
+    fetch("search.json").then(function(r){ return r.json(); }).then(function(d){ index = d; search(); });
+  });
+  out.addEventListener("click", function(){ box.value = ""; out.innerHTML = ""; });
+})();
+</script>
+"""
+
+SEARCH_FIELDS = ("site_name_s", "siteid_s", "vill_name_s", "nrprimrv_s")
+
+
+def render_site_slot(row: dict, card: str) -> str:
+    """Placeholder for a site card in paged mode; its fragment replaces it when scrolled into view."""
+    site_name = escape(row.get("site_name_s", ""))
+    return (f'<div class="site-slot" id="{make_site_anchor(row)}" data-card="{escape(card)}">'
+            f'<h2 class="site-title">{site_name}</h2></div>')
+
+
+def write_if_changed(path: str, text: str) -> bool:
+    """Write ``text`` unless the file already holds it (keeps mtimes, and HTTP caches, valid)."""
+    data = text.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def write_paged_cards(path: str, editions: List["Edition"], emits, cache: Optional[RenderCache], pool,
+                      jobs: int) -> None:
+    """Write cards/NNNNN.html and search.json in each edition's directory; emit a slot per site."""
+    for ed in editions:
+        os.makedirs(os.path.join(ed.paged_dir, "cards"), exist_ok=True)
+    langs = tuple(ed.lang for ed in editions)
+    search = []
+    n = 0
+    # render_cards reads ahead of the cards it yields; keep the rows in between
+    pending = collections.deque()
+
+    def remember(rows):
+        for row in rows:
+            pending.append(row)
+            yield row
+
+    for n, cards in enumerate(render_cards(remember(read_rows(path)), langs, cache, pool, jobs), start=1):
+        row = pending.popleft()
+        name = f"cards/{n:05d}.html"
+        for ed, emit, card in zip(editions, emits, cards):
+            write_if_changed(os.path.join(ed.paged_dir, name), card)
+            emit(render_site_slot(row, name))
+        text = " ".join((row.get(k) or "").strip() for k in SEARCH_FIELDS).lower()
+        search.append([{"site_name_s": row.get("site_name_s")}, make_site_anchor(row), text])
+    for ed in editions:
+        entries = [[site_name(named, ed.lang), anchor, text] for named, anchor, text in search]
+        search_json = json.dumps(entries, ensure_ascii=False, separators=(",", ":"))
+        card_dir = os.path.join(ed.paged_dir, "cards")
+        for name in os.listdir(card_dir):
+            if name.endswith(".html") and name[:-5].isdigit() and int(name[:-5]) > n:
+                os.remove(os.path.join(card_dir, name))
+        write_if_changed(os.path.join(ed.paged_dir, "search.json"), search_json)
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f, delimiter="\t")
+
+
+def read_site_summaries(path: str) -> List[dict]:
+    """First pass: just the SUMMARY_FIELDS of every site."""
+    return [{k: row.get(k) for k in SUMMARY_FIELDS} for row in read_rows(path)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the standalone HTML site report.")
+    parser.add_argument("tsv", help="merged sites file, e.g. mmap-sites.csv")
+    parser.add_argument("target", help="local or aws: where the images are served from")
+    parser.add_argument("-o", "--output",
+                        help="write the report here (default: standard output); a directory with --mode paged")
+    parser.add_argument("--mode", choices=("single", "paged"), default="single",
+                        help="single: one HTML file, for printing/PDF (default); paged: a small index.html "
+                             "plus one fragment per site loaded as it scrolls into view, and a search index")
+    parser.add_argument("--cache-dir", help="reuse site cards rendered by earlier runs, kept in this directory")
+    parser.add_argument("--jobs", type=int, default=1, help="render site cards in this many processes")
+    parser.add_argument("--variants", metavar="MANIFEST",
+                        help="_variants/manifest.json from derivatives.py --sizes: add srcset/sizes to images")
+    parser.add_argument("--lqip", action="store_true",
+                        help="show the manifest's tiny placeholders until images arrive (lazy-loaded in "
+                             "paged mode; the single file loads every image, for printing)")
+    parser.add_argument("--langs", default="en",
+                        help="comma-separated languages to write, from one pass over the data, e.g. en,lo,th; "
+                             "the first goes to --output, the others next to it with the language added "
+                             "(site_report.lo.html, or DIR.lo with --mode paged)")
+    parser.add_argument("--translations", metavar="JSON",
+                        help='translated labels and headings, {"lo": {"Site Info": "...", ...}, ...}; '
+                             "anything not translated stays in English")
+    parser.add_argument("--site-maps", metavar="DIR",
+                        help="static overview and locator maps made by sitemaps.py, used instead of "
+                             "live maps (which then load only on click)")
+    return parser.parse_args(argv)
+
+
+def set_url_prefix(target: str) -> bool:
+    global URL_PREFIX
+    if 'local' in target.lower():
         URL_PREFIX = "http://localhost:3002/mmap-images/"  # for local infrared server
-    elif 'aws' in sys.argv[2].lower():
+    elif 'aws' in target.lower():
         URL_PREFIX = "https://mmap-sites.johnblowe.com/mmap-images/"  # for jbs aws instance
     else:
-        print('second argument required: local or aws', file=sys.stderr)
+        return False
+    return True
 
-    path = sys.argv[1]
-    with open(path, encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        rows = list(reader)
 
-    print("<!DOCTYPE html><html><head><meta charset='utf-8'>")
-    print("<title>Site Report</title>")
-    print(r'''
+def init_worker(target: str, variants: Optional[str], lqip: bool, lazy: bool,
+                site_maps: Optional[str], report_dir: str, translations: Optional[str]) -> None:
+    set_url_prefix(target)
+    load_variants(variants, lqip, lazy)
+    load_site_maps(site_maps, report_dir)
+    report_i18n.load_translations(translations, warn=False)  # the parent has reported bad entries
+
+
+def edition_path(output: str, lang: str, first: bool, paged: bool) -> str:
+    """Where an edition goes: --output for the first language, e.g. site_report.lo.html for the others."""
+    if first:
+        return output
+    if paged:
+        return f"{output.rstrip('/')}.{lang}"
+    stem, ext = os.path.splitext(output)
+    return f"{stem}.{lang}{ext}"
+
+
+class Edition(NamedTuple):
+    """One language of the report, and where it goes (plus its directory in paged mode)."""
+    lang: str
+    out: TextIO
+    paged_dir: Optional[str] = None
+
+
+def writer(out: TextIO):
+    def emit(text: str) -> None:
+        out.write(text)
+        out.write("\n")
+    return emit
+
+
+def write_report(path: str, editions: List[Edition], cache: Optional[RenderCache] = None, pool=None,
+                 jobs: int = 1) -> None:
+    """
+    Write the report in each edition's language. The sites file is read the
+    same two times however many editions there are: the summaries are
+    shared, and each site's cards for all the languages come from one row.
+    """
+    sites = read_site_summaries(path)
+    emits = [writer(ed.out) for ed in editions]
+    for ed, emit in zip(editions, emits):
+        write_front(emit, sites, ed.lang, ed.paged_dir is not None)
+    if editions[0].paged_dir:
+        write_paged_cards(path, editions, emits, cache, pool, jobs)
+    else:
+        for cards in render_cards(read_rows(path), tuple(ed.lang for ed in editions), cache, pool, jobs):
+            for emit, card in zip(emits, cards):
+                emit(card)
+    for ed, emit in zip(editions, emits):
+        if ed.paged_dir:
+            emit(PAGED_LOADER)
+        emit(IMG_POPUP_PANEL.format(close=escape(translate("Close", ed.lang))))
+        emit(IMG_POPUP_SCRIPT)
+        emit("</div></body></html>")
+
+
+def write_front(emit, sites: List[dict], lang: str, paged: bool) -> None:
+    """Everything before the site cards: head, front matter, indexes and the all-sites map."""
+    emit("<!DOCTYPE html><html><head><meta charset='utf-8'>" if lang == "en" else
+         f"<!DOCTYPE html><html lang=\"{escape(lang)}\"><head><meta charset='utf-8'>")
+    emit(f"<title>{escape(translate('Site Report', lang))}</title>")
+    emit(r'''
 <style>
 body { font-family: -apple-system, Roboto, Arial, sans-serif; background: #f8f9fa; padding: 16px; font-size: 14px; }
 .site-card { background: #fff; border: none; border-radius: 4px; padding: 12px; margin-bottom: 20px; box-shadow: 0 1px 2px rgba(0,0,0,0.03); }
@@ -643,20 +1116,96 @@ body { font-family: -apple-system, Roboto, Arial, sans-serif; background: #f8f9f
     }
 </style>
 ''')
-    print("</head><body>")
-    print("<div style='max-width:1200px; margin:0 auto;'>")
-    print(render_front_matter())
-    print(render_index(rows))
-    print('<div class="page-break"></div>')
-    print(render_all_sites_map(rows))
-    print('<div class="page-break"></div>')
-    print(render_index_alpha(rows))
-    print('<div class="page-break"></div>')
-    for row in rows:
-        print(render_site_div(row))
-    print(IMG_POPUP_OVERLAY)
-    print("</div></body></html>")
+    emit("</head><body>")
+    emit("<div style='max-width:1200px; margin:0 auto;'>")
+    emit(render_front_matter(lang))
+    emit(render_index(sites, lang))
+    emit('<div class="page-break"></div>')
+    if SITE_MAP_OVERVIEW is not None:
+        emit(SITE_MAPS_SUPPORT)
+    emit(render_all_sites_map(sites, lang))
+    emit('<div class="page-break"></div>')
+    emit(render_index_alpha(sites, lang))
+    emit('<div class="page-break"></div>')
+    if paged:
+        emit(PAGED_SEARCH.format(placeholder=escape(translate("Find a site, village or river", lang))))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not set_url_prefix(args.target):
+        print('second argument required: local or aws', file=sys.stderr)
+        sys.exit(1)
 
+    paged = args.mode == "paged"
+    if paged and not args.output:
+        print('--mode paged needs --output DIR', file=sys.stderr)
+        sys.exit(1)
+    langs = list(dict.fromkeys(lang.strip() for lang in args.langs.split(",") if lang.strip()))
+    if not langs or not all(re.fullmatch(r"[a-z]{2,3}(-[A-Za-z0-9]+)?", lang) for lang in langs):
+        print(f'--langs {args.langs}: expected language codes such as en,lo,th', file=sys.stderr)
+        sys.exit(1)
+    if len(langs) > 1 and not args.output:
+        print('--langs with more than one language needs --output', file=sys.stderr)
+        sys.exit(1)
+    try:
+        report_i18n.load_translations(args.translations)
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"--translations {args.translations}: {e}", file=sys.stderr)
+        sys.exit(1)
+    for lang in langs:
+        if lang != "en" and lang not in report_i18n.TRANSLATIONS:
+            print(f"{lang}: no translations, its report will be in English", file=sys.stderr)
+    load_variants(args.variants, args.lqip, lazy=paged)
+    # the map URLs are relative to the page that shows them (all editions sit side by side)
+    report_dir = args.output if paged else os.path.dirname(args.output or "") or "."
+    site_maps_manifest = os.path.join(args.site_maps, "manifest.json") if args.site_maps else None
+    try:
+        load_site_maps(args.site_maps, report_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"--site-maps {args.site_maps}: {e}", file=sys.stderr)
+        sys.exit(1)
+    cache = None
+    if args.cache_dir:
+        cache = RenderCache(args.cache_dir, data_files=(args.variants, site_maps_manifest, args.translations))
+    pool = None
+    if args.jobs > 1:
+        # the workers need the module settings too (they are not inherited with spawn)
+        pool = multiprocessing.Pool(args.jobs, initializer=init_worker,
+                                    initargs=(args.target, args.variants, args.lqip, paged,
+                                              args.site_maps, report_dir, args.translations))
+    try:
+        if not args.output:
+            write_report(args.tsv, [Edition(langs[0], sys.stdout)], cache, pool, args.jobs)
+        else:
+            outputs = [edition_path(args.output, lang, i == 0, paged) for i, lang in enumerate(langs)]
+            targets = [os.path.join(o, "index.html") if paged else o for o in outputs]
+            if paged:
+                for o in outputs:
+                    os.makedirs(o, exist_ok=True)
+            # write next to the targets and rename, so a half-written report is never served
+            tmps = [f"{target}.tmp{os.getpid()}" for target in targets]
+            try:
+                with contextlib.ExitStack() as stack:
+                    editions = [
+                        Edition(lang, stack.enter_context(open(tmp, "w", encoding="utf-8", buffering=1 << 20)),
+                                o if paged else None)
+                        for lang, tmp, o in zip(langs, tmps, outputs)
+                    ]
+                    write_report(args.tsv, editions, cache, pool, args.jobs)
+                for tmp, target in zip(tmps, targets):
+                    os.replace(tmp, target)
+            finally:
+                for tmp in tmps:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    if cache:
+        removed = cache.prune()
+        print(f"{cache.stats()}, {removed} stale removed", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
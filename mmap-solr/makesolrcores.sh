@@ -25,6 +25,14 @@ if [ $# -ge 1 ]; then
     echo "Only recreating the one core ${SOLR_CORES}"
 fi
 
+# an optional second argument names the core whose configuration (fields,
+# synonyms, special fields) to use, e.g. to build a shadow core for a
+# blue/green reload:  ./makesolrcores.sh mmap-public-shadow mmap-public
+# (once only: after the first swap the shadow core sits in the live core's
+# old instance directory, so it can no longer be deleted and re-created by
+# name; the reload scripts reuse it and just empty it)
+CONFIG_NAME="${2:-}"
+
 function define_field_types()
 {
     # ====================
@@ -260,9 +268,10 @@ do
     define_field_types
     define_fields
     define_dynamic_fields
-    define_special_fields ${SOLR_CORE}
-    create_copy_fields ${SOLR_CORE}.fields.txt
-    create_synonyms ${SOLR_CORE}.synonyms.txt
+    SOLR_CONFIG=${CONFIG_NAME:-$SOLR_CORE}
+    define_special_fields ${SOLR_CONFIG}
+    create_copy_fields ${SOLR_CONFIG}.fields.txt
+    create_synonyms ${SOLR_CONFIG}.synonyms.txt
 
     # add all these to the 'catch-all' field
     copy_fields '*_s'   'text'
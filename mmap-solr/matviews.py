@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+matviews.py
+
+Materialized views holding the pre-joined rows that solr_sql/<table>.sql
+computes: tblArtifact_Master joined to one subtable. The nightly load can
+then read rows that are already joined instead of running 42 joins.
+
+    python matviews.py sql                  # print the DDL
+    python matviews.py create [--replace]   # create the views and their indexes
+    python matviews.py refresh [TABLE ...]  # refresh (concurrently when possible)
+    python matviews.py write-sql [--out solr_sql_mv]
+    python matviews.py status
+
+Columns are introspected for the master and all the subtables (those in
+export_tables.sh) with a single catalog query, instead of one
+information_schema query per table as crosswalk.py does. Each view is named
+solr_mv_<table> and has the same columns, in the same order, as the
+crosswalk query (master columns, then the subtable's own columns except
+MMAP_Artifact_ID and names the master already has), plus the subtable's
+primary key as mv_key_<column>.
+
+Every view gets a unique index on (master primary key, subtable primary
+key), which is what REFRESH MATERIALIZED VIEW CONCURRENTLY needs: a
+concurrent refresh computes the new contents, then only writes the rows
+that differ, and never blocks readers. A view whose subtable has no primary
+key (and no Record_No column) cannot have that index; it is refreshed the
+ordinary way and `status` says so. There is also an index on
+MMAP_Artifact_ID.
+
+write-sql writes solr_sql_mv/<table>.sql, a plain SELECT of the view's
+columns (without the mv_key_ ones), for solr_etl.py --sql-dir solr_sql_mv.
+Rerun create --replace and write-sql when a table's columns change.
+"""
+
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+import solr_etl
+
+MASTER_TABLE = "tblArtifact_Master"
+MASTER_ALIAS = "am"
+SHARED_KEY = "MMAP_Artifact_ID"
+VIEW_PREFIX = "solr_mv_"
+KEY_PREFIX = "mv_key_"
+SQL_MV_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solr_sql_mv")
+
+# Every column of the given tables, with whether it is part of the primary key.
+INTROSPECT_SQL = """
+SELECT c.relname, a.attname, coalesce(a.attnum = ANY (i.indkey), false) AS in_pk
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+LEFT JOIN pg_index i ON i.indrelid = c.oid AND i.indisprimary
+WHERE n.nspname = %s AND c.relkind IN ('r', 'p') AND c.relname = ANY (%s)
+ORDER BY c.relname, a.attnum
+"""
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+@dataclass
+class TableInfo:
+    columns: List[str]
+    key: List[str]
+
+
+@dataclass
+class ViewPlan:
+    table: str
+    view: str
+    select_sql: str           # the view's defining query
+    columns: List[str]        # what extraction selects, in crosswalk order
+    key: Optional[List[str]]  # columns of the unique index, None if there is none
+
+
+def in_pk(value):
+    return value in (True, "t", "true")
+
+
+def introspect(cur, tables, schema="public"):
+    """{table: TableInfo} for ``tables`` (and the master), from one query."""
+    cur.execute(INTROSPECT_SQL, (schema, [MASTER_TABLE] + list(tables)))
+    info = {}
+    for table, column, pk in cur.fetchall():
+        t = info.setdefault(table, TableInfo([], []))
+        t.columns.append(column)
+        if in_pk(pk):
+            t.key.append(column)
+    return info
+
+
+def row_key(t):
+    """Columns that identify a row: the primary key, else Record_No if there is one."""
+    if t.key:
+        return t.key
+    return ["Record_No"] if "Record_No" in t.columns else []
+
+
+def plan_view(master, table, sub, alias="j"):
+    """The view for one subtable, mirroring what crosswalk.py generates."""
+    columns = list(master.columns)
+    select = [f"{MASTER_ALIAS}.{quote_ident(c)}" for c in master.columns]
+    for col in sub.columns:
+        if col != SHARED_KEY and col not in master.columns:
+            columns.append(col)
+            select.append(f"{alias}.{quote_ident(col)}")
+    master_key, sub_key = row_key(master), row_key(sub)
+    key = None
+    if master_key and sub_key:
+        key = list(master_key)
+        for col in sub_key:
+            select.append(f"{alias}.{quote_ident(col)} AS {quote_ident(KEY_PREFIX + col)}")
+            key.append(KEY_PREFIX + col)
+    sql = (
+        "SELECT " + ",\n  ".join(select)
+        + f"\nFROM {quote_ident(MASTER_TABLE)} {MASTER_ALIAS}\n"
+        + f"JOIN {quote_ident(table)} {alias} ON {alias}.{quote_ident(SHARED_KEY)} = "
+        + f"{MASTER_ALIAS}.{quote_ident(SHARED_KEY)}"
+    )
+    return ViewPlan(table, VIEW_PREFIX + table, sql, columns, key)
+
+
+def plan_views(info, tables):
+    master = info.get(MASTER_TABLE)
+    if master is None:
+        raise SystemExit(f"{MASTER_TABLE} not found")
+    plans = []
+    for table in tables:
+        if table not in info:
+            print(f"skipping {table}: no such table", file=sys.stderr)
+            continue
+        plans.append(plan_view(master, table, info[table]))
+    return plans
+
+
+def create_sql(plan, replace=False):
+    view = quote_ident(plan.view)
+    stmts = []
+    if replace:
+        stmts.append(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+    stmts.append(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view} AS\n{plan.select_sql}\nWITH NO DATA")
+    if plan.key:
+        stmts.append(f"CREATE UNIQUE INDEX IF NOT EXISTS {quote_ident(plan.view[:55] + '_key')} "
+                     f"ON {view} ({', '.join(quote_ident(c) for c in plan.key)})")
+    stmts.append(f"CREATE INDEX IF NOT EXISTS {quote_ident(plan.view[:55] + '_artid')} "
+                 f"ON {view} ({quote_ident(SHARED_KEY)})")
+    return stmts
+
+
+def extract_sql(plan):
+    cols = ",\n  ".join(quote_ident(c) for c in plan.columns)
+    return f"SELECT {cols}\nFROM {quote_ident(plan.view)};\n"
+
+
+def view_state(cur, view):
+    """(exists, populated, has a unique index usable for CONCURRENTLY)."""
+    cur.execute("SELECT ispopulated FROM pg_matviews WHERE schemaname = current_schema() AND matviewname = %s",
+                (view,))
+    row = cur.fetchone()
+    if row is None:
+        return False, False, False
+    cur.execute(
+        "SELECT count(*) FROM pg_index i JOIN pg_class c ON c.oid = i.indrelid "
+        "WHERE c.relname = %s AND i.indisunique AND i.indpred IS NULL AND i.indexprs IS NULL",
+        (view,))
+    return True, in_pk(row[0]), int(cur.fetchone()[0]) > 0
+
+
+def refresh(conn, views):
+    """Refresh each view, concurrently when it is populated and uniquely indexed."""
+    for view in views:
+        with conn.cursor() as cur:
+            exists, populated, unique = view_state(cur, view)
+            if not exists:
+                print(f"{view}: missing (run create)", file=sys.stderr)
+                continue
+            how = "CONCURRENTLY " if populated and unique else ""
+            cur.execute(f"REFRESH MATERIALIZED VIEW {how}{quote_ident(view)}")
+        conn.commit()
+        print(f"{view}: refreshed{' concurrently' if how else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-joined materialized views for the artifact subtables.")
+    parser.add_argument("--conn", default=os.environ.get("CONNECT_STRING"),
+                        help="Postgres connection string (default: $CONNECT_STRING)")
+    parser.add_argument("--schema", default="public")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sql", help="print the DDL")
+    p_create = sub.add_parser("create", help="create the views and their indexes")
+    p_create.add_argument("--replace", action="store_true", help="drop and recreate existing views")
+    p_refresh = sub.add_parser("refresh", help="refresh the views")
+    p_refresh.add_argument("tables", nargs="*", help="subtables whose views to refresh (default: all)")
+    p_write = sub.add_parser("write-sql", help="write the extraction queries")
+    p_write.add_argument("--out", default=SQL_MV_DIR)
+    sub.add_parser("status", help="list the views and how they can be refreshed")
+    args = parser.parse_args(argv)
+
+    if not args.conn:
+        parser.error("set CONNECT_STRING or pass --conn")
+    tables = solr_etl.read_table_list()
+    conn = solr_etl.connect(args.conn)
+    try:
+        if args.command == "refresh":
+            refresh(conn, [VIEW_PREFIX + t for t in (args.tables or tables)])
+            return 0
+        with conn.cursor() as cur:
+            plans = plan_views(introspect(cur, tables, args.schema), tables)
+        if args.command == "sql":
+            for plan in plans:
+                for stmt in create_sql(plan):
+                    print(stmt + ";")
+                print()
+        elif args.command == "create":
+            with conn.cursor() as cur:
+                for plan in plans:
+                    for stmt in create_sql(plan, replace=args.replace):
+                        cur.execute(stmt)
+                    if not plan.key:
+                        print(f"{plan.view}: no primary key on {plan.table}; refreshes cannot be concurrent",
+                              file=sys.stderr)
+            conn.commit()
+            print(f"{len(plans)} views created (empty until refreshed)")
+        elif args.command == "write-sql":
+            os.makedirs(args.out, exist_ok=True)
+            for plan in plans:
+                with open(os.path.join(args.out, f"{plan.table}.sql"), "w", encoding="utf-8") as f:
+                    f.write(extract_sql(plan))
+            print(f"wrote {len(plans)} queries to {args.out}")
+        else:
+            with conn.cursor() as cur:
+                for plan in plans:
+                    exists, populated, unique = view_state(cur, plan.view)
+                    state = "missing" if not exists else ("populated" if populated else "empty")
+                    print(f"{plan.view}\t{state}\t{'concurrent' if unique else 'blocking'} refresh")
+        conn.commit()
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
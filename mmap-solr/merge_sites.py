@@ -25,10 +25,30 @@ The output file is "|" separated as well.
 
 Usage:
     python merge_sites.py mmap-dbsites.csv mmap-site-photos.csv merged_sites.csv
+
+Streaming mode (--stream) does the same merge without holding the photo
+inventory in memory: photos and sites are sorted in bounded runs spilled to
+temporary files, then merge-joined site by site. Only one site's photos are
+in memory at a time. Rows are ordered by the trimmed site_name_s (the
+default mode sorts the untrimmed value; the two only differ for names with
+leading or trailing blanks).
+
+With --state FILE, a digest of every merged site row is kept between runs;
+sites that are new or whose row changed (e.g. photos added to their
+directories) are listed in --changed-out, and --changed-only limits the
+output to those rows for an incremental reload.
 """
 
+import argparse
 import csv
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import pickle
 import sys
+import tempfile
 from collections import defaultdict
 
 IN_DELIM = "\t"   # input files are tab-separated
@@ -80,7 +100,7 @@ def read_photo_data(photos_path):
     return type_order, photos_by_site_type
 
 
-def merge_sites(sites_path, photos_path, out_path):
+def merge_sites(sites_path, photos_path, out_path, changes=None):
     # 1. Read photo data and aggregate by site and type
     type_order, photos_by_site_type = read_photo_data(photos_path)
 
@@ -129,15 +149,25 @@ def merge_sites(sites_path, photos_path, out_path):
         writer = csv.DictWriter(f_out, fieldnames=out_fieldnames, delimiter=OUT_DELIM)
         writer.writeheader()
         for row in merged_rows:
-            writer.writerow(row)
+            if changes is None or changes.track(row, out_fieldnames):
+                writer.writerow(row)
 
     # 6. Report mismatches, including site names
     extra_sites_in_photos = sorted(photo_site_names - main_site_names)
     uncovered_sites_in_main = sorted(main_site_names - photo_site_names)
 
+    report_mismatches(
+        sites_path, photos_path, len(site_rows),
+        sum(len(photos_by_site_type[s]) for s in photos_by_site_type),
+        type_order, uncovered_sites_in_main, extra_sites_in_photos,
+    )
+
+
+def report_mismatches(sites_path, photos_path, n_site_rows, n_site_type_entries,
+                      type_order, uncovered_sites_in_main, extra_sites_in_photos):
     sys.stderr.write(
-        f"Read {len(site_rows)} site rows from {sites_path}\n"
-        f"Read {sum(len(photos_by_site_type[s]) for s in photos_by_site_type)} "
+        f"Read {n_site_rows} site rows from {sites_path}\n"
+        f"Read {n_site_type_entries} "
         f"sites-with-photos entries from {photos_path}\n"
         f"Found TYPE_s values (in order): {', '.join(type_order)}\n"
         f"Sites with no photos (present in database only): {len(uncovered_sites_in_main)}\n"
@@ -156,19 +186,234 @@ def merge_sites(sites_path, photos_path, out_path):
             sys.stderr.write(f"    {s}\n")
 
 
-def main(argv=None):
-    if argv is None:
-        argv = sys.argv[1:]
+# --- streaming mode ---------------------------------------------------------
+
+def _spill(records, tmpdir):
+    """Write sorted records to a temp file; return its path."""
+    fd, path = tempfile.mkstemp(dir=tmpdir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        for rec in records:
+            pickle.dump(rec, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def external_sort(records, run_size, tmpdir):
+    """Sort an iterable of tuples holding at most ``run_size`` of them in memory.
 
-    if len(argv) != 3:
+    Records are sorted in runs that are spilled to ``tmpdir`` and then
+    lazily k-way merged with heapq.merge. Tuples must be totally ordered;
+    callers include the input position so ties keep file order.
+    """
+    runs = []
+    buf = []
+    for rec in records:
+        buf.append(rec)
+        if len(buf) >= run_size:
+            buf.sort()
+            runs.append(_spill(buf, tmpdir))
+            buf = []
+    buf.sort()
+    if not runs:
+        return iter(buf)
+    if buf:
+        runs.append(_spill(buf, tmpdir))
+    return heapq.merge(*(_read_run(p) for p in runs))
+
+
+def scan_photos(photos_path, type_order):
+    """Yield (site, position, type, filename, thumbnail) for every usable photo row.
+
+    Applies the same TYPE_s checks as read_photo_data and fills ``type_order``
+    as a side effect; it is complete once the generator is exhausted.
+    """
+    seen_types = set()
+    with open(photos_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f, delimiter=IN_DELIM)
+        for pos, row in enumerate(reader):
+            site = (row.get("SITE_s") or "").strip()
+            t = (row.get("TYPE_s") or "").strip()
+
+            if t and t not in seen_types:
+                if 'JPG' in t or '200' in t:
+                    print(f'bad type: {t}, from: {row}')
+                    continue
+                seen_types.add(t)
+                type_order.append(t)
+
+            if site and t:
+                yield (site, pos, t,
+                       (row.get("FILENAME_s") or "").strip(),
+                       (row.get("THUMBNAIL_ss") or "").strip())
+
+
+def scan_sites(sites_path, fieldnames):
+    """Yield (site_name, position, row) for every site row; fills ``fieldnames``."""
+    with open(sites_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f, delimiter=IN_DELIM)
+        fieldnames.extend(reader.fieldnames or [])
+        for pos, row in enumerate(reader):
+            yield (row.get("site_name_s") or "").strip(), pos, row
+
+
+def merge_sites_streaming(sites_path, photos_path, out_path, run_size=50000,
+                          tmpdir=None, changes=None):
+    """Same output as merge_sites, with memory bounded by ``run_size`` and the largest site."""
+    with tempfile.TemporaryDirectory(prefix="merge_sites_", dir=tmpdir) as work:
+        # 1. Sort photos by site, spilling runs; TYPE_s order is known afterwards
+        type_order = []
+        photos = external_sort(scan_photos(photos_path, type_order), run_size, work)
+        photos_by_site = itertools.groupby(photos, key=lambda rec: rec[0])
+
+        # 2. Sort sites the same way
+        site_fieldnames = []
+        sites = external_sort(scan_sites(sites_path, site_fieldnames), run_size, work)
+
+        out_fieldnames = list(site_fieldnames)
+        for t in type_order:
+            out_fieldnames.append(f"{t}_FILENAME_ss")
+            out_fieldnames.append(f"{t}_THUMBNAILS_ss")
+
+        # 3. Merge-join: advance the photo groups alongside the sorted sites
+        n_site_rows = 0
+        n_site_type_entries = 0
+        uncovered, extra = [], []
+        photo_site, photo_group = next(photos_by_site, (None, None))
+        current_site, current_types = None, {}
+
+        with open(out_path, "w", newline="", encoding="utf-8") as f_out:
+            writer = csv.DictWriter(f_out, fieldnames=out_fieldnames, delimiter=OUT_DELIM)
+            writer.writeheader()
+            for site_name, _, row in sites:
+                n_site_rows += 1
+                if site_name != current_site:
+                    while photo_site is not None and photo_site < site_name:
+                        extra.append(photo_site)
+                        n_site_type_entries += len({rec[2] for rec in photo_group})
+                        photo_site, photo_group = next(photos_by_site, (None, None))
+                    current_site, current_types = site_name, {}
+                    if photo_site == site_name:
+                        for _, _, t, filename, thumb in photo_group:
+                            files, thumbs = current_types.setdefault(t, ([], []))
+                            files.append(filename)
+                            thumbs.append(thumb)
+                        n_site_type_entries += len(current_types)
+                        photo_site, photo_group = next(photos_by_site, (None, None))
+                    else:
+                        uncovered.append(site_name)
+
+                for t in type_order:
+                    files, thumbs = current_types.get(t, ((), ()))
+                    row[f"{t}_FILENAME_ss"] = JOIN_DELIM.join(f for f in files if f)
+                    row[f"{t}_THUMBNAILS_ss"] = JOIN_DELIM.join(th for th in thumbs if th)
+                if changes is None or changes.track(row, out_fieldnames):
+                    writer.writerow(row)
+
+            while photo_site is not None:
+                extra.append(photo_site)
+                n_site_type_entries += len({rec[2] for rec in photo_group})
+                photo_site, photo_group = next(photos_by_site, (None, None))
+
+    report_mismatches(sites_path, photos_path, n_site_rows, n_site_type_entries,
+                      type_order, uncovered, extra)
+
+
+class SiteChanges:
+    """Per-site digests of merged rows, compared with the previous run's.
+
+    The state file maps site_name_s to a SHA-1 of the merged row, so a site
+    counts as changed when its database row or any of its photo columns did.
+    A repeated site name is stored as "<name>#2", "<name>#3", ...
+    """
+
+    def __init__(self, state_path, changed_only=False):
+        self.state_path = state_path
+        self.changed_only = changed_only
+        self.previous = {}
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self.previous = json.load(f)
+        self.current = {}
+        self.changed = []
+
+    def track(self, row, fieldnames):
+        """Record ``row``; return True if it should be written."""
+        site = (row.get("site_name_s") or "").strip()
+        key, n = site, 1
+        while key in self.current:
+            n += 1
+            key = f"{site}#{n}"
+        h = hashlib.sha1()
+        for name in fieldnames:
+            h.update(str(row.get(name) or "").encode("utf-8"))
+            h.update(b"\x1f")
+        self.current[key] = h.hexdigest()
+        is_changed = self.previous.get(key) != self.current[key]
+        if is_changed and site not in self.changed:
+            self.changed.append(site)
+        return is_changed or not self.changed_only
+
+    def removed(self):
+        return sorted(set(self.previous) - set(self.current))
+
+    def save(self, changed_out=None):
+        if changed_out:
+            with open(changed_out, "w", encoding="utf-8") as f:
+                for site in self.changed:
+                    f.write(site + "\n")
+        if self.state_path:
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.current, f, sort_keys=True, indent=0)
+            os.replace(tmp, self.state_path)
         sys.stderr.write(
-            "Usage: python merge_sites.py "
-            "mmap-dbsites.csv mmap-site-photos.csv merged_sites.csv\n"
+            f"Sites changed since last run: {len(self.changed)}; "
+            f"no longer present: {len(self.removed())}\n"
         )
-        sys.exit(1)
+        for s in self.removed():
+            sys.stderr.write(f"    removed: {s}\n")
 
-    sites_path, photos_path, out_path = argv
-    merge_sites(sites_path, photos_path, out_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge site records with per-site photo records, grouped by TYPE_s.")
+    parser.add_argument("sites", help="tab-separated site table (mmap-dbsites.csv)")
+    parser.add_argument("photos", help="tab-separated photo list (mmap-site-photos.csv)")
+    parser.add_argument("out", help="merged output file")
+    parser.add_argument("--stream", action="store_true",
+                        help="sort/spill to disk and merge-join instead of loading everything into memory")
+    parser.add_argument("--run-size", type=int, default=50000,
+                        help="rows per sorted run in --stream mode (default: 50000)")
+    parser.add_argument("--tmpdir", default=None, help="directory for --stream spill files")
+    parser.add_argument("--state", default=None,
+                        help="JSON file of per-site digests from the previous run (updated in place)")
+    parser.add_argument("--changed-out", default=None,
+                        help="write names of new or changed sites here, one per line (needs --state)")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="only write rows for new or changed sites (needs --state)")
+    args = parser.parse_args(argv)
+
+    if (args.changed_out or args.changed_only) and not args.state:
+        parser.error("--changed-out and --changed-only need --state")
+
+    changes = SiteChanges(args.state, args.changed_only) if args.state else None
+
+    if args.stream:
+        merge_sites_streaming(args.sites, args.photos, args.out,
+                              run_size=max(args.run_size, 1), tmpdir=args.tmpdir, changes=changes)
+    else:
+        merge_sites(args.sites, args.photos, args.out, changes=changes)
+
+    if changes is not None:
+        changes.save(args.changed_out)
 
 
 if __name__ == "__main__":
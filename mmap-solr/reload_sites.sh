@@ -10,7 +10,8 @@ perl -i -pe 'if (/Site_Name/) {s/\t/_s\t/g;s/$/_s/;s/Record_No_s/id/;tr/A-Z/a-z/
 grep site_name mmap-dbsites.csv | perl -pe 's/ +/_/g' > mmap-dbsites.header.csv
 
 # make a list of the site images and prep it for solr
-find "${DERIVATIVES}" -type f | grep -v DS_Store | grep -v extra_maps > sites0.tmp
+# (_variants holds resized copies made by derivatives.py --sizes, not site photos)
+find "${DERIVATIVES}" -type f | grep -v DS_Store | grep -v extra_maps | grep -v /_variants/ > sites0.tmp
 perl -ne '
 next if /Old-/i;
 chomp ;
@@ -39,10 +40,10 @@ perl -ne '@x=split/\t/;print if (@x[3] =~ / /)' sites1.tmp | cut -f1 | perl -pe
 perl -ne '@x=split/\t/;next if @x[3] =~ /( |JPG)/; print if /\.(jpg|jpeg|tif|gif|png|webp)/i' sites1.tmp > sites2.tmp
 cat mmap-site-photos.header.csv sites2.tmp > mmap-site-photos.csv
 perl -pe 's/\t/\n/g;s/\r//g;' mmap-site-photos.header.csv > mmap-site-photos.fields.txt
-python3 evaluate.py mmap-site-photos.csv sites3.tmp
+python3 evaluate.py mmap-site-photos.csv
 
 # merge them
-python merge_sites.py mmap-dbsites.csv mmap-site-photos.csv mmap-sites.csv
+python merge_sites.py --stream mmap-dbsites.csv mmap-site-photos.csv mmap-sites.csv
 head -1 mmap-sites.csv | perl -pe 's/\t/\n/g;s/\r//g;' > mmap-sites.fields.txt
 
 # load the whole shebang into solr core mmap-sites
@@ -1,4 +1,27 @@
-from typing import Dict, List, Tuple
+"""
+Labels of the site report, and the layout of its metadata column compiled
+for fast rendering.
+
+label_to_field lists the metadata column in order: an entry whose field is
+"heading" starts a section, the others are rows (an empty field is a row
+not in the data yet, and is skipped). section_plan(lang) turns it into an
+immutable tuple of Sections, once per language, with the label and heading
+HTML already escaped, so rendering a site is a loop over the slots that
+only escapes the site's own values.
+
+TRANSLATIONS holds, per language code, translated labels, headings and the
+report's other fixed text, keyed by the English text (load_translations
+adds them from a JSON file); anything missing stays in English. Text with
+a count in it is keyed by its template, e.g. "all {n} images"; its
+translation must use the same {fields}.
+"""
+
+import html
+import json
+import string
+import sys
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 # === LABEL → FIELD MAPPING ====================================================
 label_to_field: Dict[str, str] = {
@@ -7,6 +30,7 @@ label_to_field: Dict[str, str] = {
     "Site:": "site_name_s",
     "Description:": "sitedesc_s",
     "Date Recorded:": "year_recorded_s",
+    "Visit date:": "site_date_s",
     "Access:": "acces_s",
     "Nearest Village:": "vill_name_s",
     "Closest River:": "nrprimrv_s",
@@ -57,11 +81,100 @@ label_to_field: Dict[str, str] = {
     "Artifact Comments:": "artcomm_s",
 }
 
+GEO_HEADING = "Geographic Info"  # rendered with the map thumbnail and locator beside it
+OVERVIEW_TITLE = "All sites"  # title of sitemaps.py's overview SVG, translated where the report inlines it
+
+# language code -> {English label or heading: translation}
+TRANSLATIONS: Dict[str, Dict[str, str]] = {}
+
 
 # Image types (Map handled separately)
 IMAGE_TYPES: List[Tuple[str, str]] = [
     ("General view", "General_view_THUMBNAILS_ss"),
-    ("Artifacts", "Artifacts_THUMBNAILS_ss"),
+    ("Environment", "Environment_THUMBNAILS_ss"),
+    ("Feature", "Feature_THUMBNAILS_ss"),
+    ("Artifacts on site", "Artifacts_on_site_THUMBNAILS_ss"),
+    ("Action-process", "Action_process_THUMBNAILS_ss"),
+    ("Studio bag shot", "Studio_bag_shot_THUMBNAILS_ss"),
+    ("Studio artifact shot", "Studio_artifact_shot_THUMBNAILS_ss"),
+    ("Miscellaneous", "Miscellaneous_THUMBNAILS_ss"),
+    ("Speleothem", "Speleothem_THUMBNAILS_ss"),
+    ("Documents", "Documents_THUMBNAILS_ss"),
     ("Misc", "Misc_THUMBNAILS_ss"),
+    ("Artifacts", "Artifacts_THUMBNAILS_ss"),
     ("People", "People_THUMBNAILS_ss"),
 ]
+
+
+class Slot(NamedTuple):
+    field: str
+    row_html: str  # "<tr><th ...>label</th><td class='meta-value'>", the value and "</td></tr>" follow
+
+
+class Section(NamedTuple):
+    heading_html: str
+    geo: bool
+    slots: Tuple[Slot, ...]
+
+
+def escape(s: str) -> str:
+    return html.escape(s or "", quote=True)
+
+
+def translate(text: str, lang: str = "en") -> str:
+    return TRANSLATIONS.get(lang, {}).get(text, text)
+
+
+def compile_plan(mapping: Dict[str, str], lang: str = "en") -> Tuple[Section, ...]:
+    sections = []
+    heading, slots = None, []
+    for label, field in list(mapping.items()) + [(None, "heading")]:
+        if field == "heading":
+            if heading is not None and slots:
+                sections.append(Section(
+                    f'<h3 class="sec-heading">{escape(translate(heading, lang))}</h3>',
+                    heading == GEO_HEADING,
+                    tuple(slots),
+                ))
+            heading, slots = label, []
+        elif field and heading is not None:
+            slots.append(Slot(field, f"<tr><th class='meta-label'>{escape(translate(label, lang))}</th>"
+                                     "<td class='meta-value'>"))
+    return tuple(sections)
+
+
+@lru_cache(maxsize=None)
+def section_plan(lang: str = "en") -> Tuple[Section, ...]:
+    """The compiled layout of label_to_field for ``lang``."""
+    return compile_plan(label_to_field, lang)
+
+
+def template_fields(text: str) -> Optional[Tuple[str, ...]]:
+    """The {fields} of a str.format template, sorted; None if it is not a valid one."""
+    try:
+        return tuple(sorted(f for _, f, _, _ in string.Formatter().parse(text) if f is not None))
+    except ValueError:
+        return None
+
+
+def load_translations(path: Optional[str], warn: bool = True) -> None:
+    """Add the translations in a JSON file, {"lo": {"Site Info": "...", ...}, ...}.
+
+    A translation whose {fields} differ from its English text's would break
+    the .format() it goes through, so it is skipped (with a message unless
+    ``warn`` is false) and the English is used.
+    """
+    if not path:
+        return
+    with open(path, encoding="utf-8") as f:
+        for lang, table in json.load(f).items():
+            good = {}
+            for en, text in table.items():
+                if not isinstance(text, str) or template_fields(text) != template_fields(en):
+                    if warn:
+                        print(f"{path}: {lang}: skipping translation of {en!r}: {text!r} "
+                              f"does not have the same {{fields}}", file=sys.stderr)
+                    continue
+                good[en] = text
+            TRANSLATIONS.setdefault(lang, {}).update(good)
+    section_plan.cache_clear()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+sitemaps.py
+
+Static maps for the site report, made offline from the sites' point_x_s /
+point_y_s: one overview of all the sites, and a small locator per site, as
+SVG. make_report.py --site-maps DIR uses them in place of a live Google
+Maps iframe per site and the (script-drawn) all-sites map; the live maps
+are still there, loaded only when a reader clicks a locator or asks for the
+interactive overview.
+
+    python sitemaps.py mmap-sites.csv site_maps [--basemap rivers.geojson ...]
+
+The basemap is vector data read from local GeoJSON files (country or
+province borders, rivers, ...), so nothing is fetched while building and
+the maps print sharply at any size. Polygons are drawn filled, lines as
+lines. Without --basemap the maps show a graticule and the sites only.
+
+DIR gets:
+
+    overview.svg                   all the sites, each linking to #<site anchor>
+    sites/<lat>_<lon>.<hash>.svg   a locator per distinct coordinate pair
+    manifest.json                  {"overview": "overview.svg",
+                                    "sites": {"<point_y_s>,<point_x_s>": "sites/..."}}
+
+Locators are keyed by the coordinates as they appear in the sites file, so
+sites sharing a location share a locator. The file names carry a hash of
+their content, so a web server can let browsers cache them for good;
+locators no longer listed are deleted.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from make_report import make_site_anchor, read_rows, site_name, write_if_changed
+from report_i18n import OVERVIEW_TITLE
+
+OVERVIEW_WIDTH = 1000
+LOCATOR_SIZE = 160
+LOCATOR_RADIUS = 0.5   # degrees of latitude from the site to the locator's edge
+PAD = 0.05             # margin around the sites on the overview, as a fraction of their extent
+
+STYLE = ("<style>.sm-land{fill:#eef0ea;stroke:#9a9a8e;stroke-width:0.6}"
+         ".sm-line{fill:none;stroke:#7aa6c2;stroke-width:0.8}"
+         ".sm-grid{fill:none;stroke:#ddd;stroke-width:0.5}"
+         ".sm-grid-label{font:10px sans-serif;fill:#999}"
+         ".sm-site{fill:#c0392b;stroke:#fff;stroke-width:0.8}"
+         ".sm-other{fill:#888;stroke:none}"
+         ".sm-here{fill:#c0392b;stroke:#fff;stroke-width:1.5}"
+         ".sm-ring{fill:none;stroke:#c0392b;stroke-width:1.5}</style>")
+
+
+def xml_escape(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+class Site:
+    __slots__ = ("key", "name", "anchor", "lat", "lon")
+
+    def __init__(self, key, name, anchor, lat, lon):
+        self.key, self.name, self.anchor, self.lat, self.lon = key, name, anchor, lat, lon
+
+
+def read_sites(path: str) -> List[Site]:
+    """Sites with usable coordinates (the same ones make_report.py maps)."""
+    sites = []
+    for row in read_rows(path):
+        lat_raw = (row.get("point_y_s") or "").strip()
+        lon_raw = (row.get("point_x_s") or "").strip()
+        if not lat_raw or not lon_raw:
+            continue
+        try:
+            lat, lon = float(lat_raw), float(lon_raw)
+        except ValueError:
+            continue
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            continue
+        name = site_name(row)
+        sites.append(Site(f"{lat_raw},{lon_raw}", name, make_site_anchor(row), lat, lon))
+    return sites
+
+
+# --- Basemap -----------------------------------------------------------------
+
+Ring = List[Tuple[float, float]]
+
+
+def geometry_parts(geom: Optional[dict]) -> Iterator[Tuple[str, Ring]]:
+    """("land" | "line", [(lon, lat), ...]) for each ring/line of a GeoJSON geometry."""
+    if not geom:
+        return
+    kind, coords = geom.get("type"), geom.get("coordinates")
+    if kind == "LineString":
+        yield "line", coords
+    elif kind == "MultiLineString":
+        for line in coords:
+            yield "line", line
+    elif kind == "Polygon":
+        for ring in coords:
+            yield "land", ring
+    elif kind == "MultiPolygon":
+        for poly in coords:
+            for ring in poly:
+                yield "land", ring
+    elif kind == "GeometryCollection":
+        for g in geom.get("geometries", []):
+            yield from geometry_parts(g)
+
+
+def load_basemap(paths: List[str]) -> List[Tuple[str, Ring, Tuple[float, float, float, float]]]:
+    """Every ring/line of the GeoJSON files, with its bounding box (lon0, lat0, lon1, lat1)."""
+    parts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("type") == "FeatureCollection":
+            geoms = [feat.get("geometry") for feat in data.get("features", [])]
+        elif data.get("type") == "Feature":
+            geoms = [data.get("geometry")]
+        else:
+            geoms = [data]
+        for geom in geoms:
+            for kind, ring in geometry_parts(geom):
+                if len(ring) < 2:
+                    continue
+                lons = [p[0] for p in ring]
+                lats = [p[1] for p in ring]
+                parts.append((kind, [(p[0], p[1]) for p in ring], (min(lons), min(lats), max(lons), max(lats))))
+    return parts
+
+
+# --- Drawing -----------------------------------------------------------------
+
+class View:
+    """Equirectangular projection of a lon/lat box onto a width x height canvas."""
+
+    def __init__(self, lon0: float, lat0: float, lon1: float, lat1: float, width: float, height: Optional[float] = None):
+        self.kx = math.cos(math.radians((lat0 + lat1) / 2))
+        span_x = max((lon1 - lon0) * self.kx, 1e-9)
+        span_y = max(lat1 - lat0, 1e-9)
+        if height is None:
+            height = round(width * span_y / span_x)
+        self.scale = min(width / span_x, height / span_y)
+        # centre the box on the canvas
+        self.lon_c, self.lat_c = (lon0 + lon1) / 2, (lat0 + lat1) / 2
+        self.width, self.height = width, height
+        self.bbox = (self.lon_c - width / 2 / self.scale / self.kx, self.lat_c - height / 2 / self.scale,
+                     self.lon_c + width / 2 / self.scale / self.kx, self.lat_c + height / 2 / self.scale)
+
+    def xy(self, lon: float, lat: float) -> Tuple[float, float]:
+        return (round(self.width / 2 + (lon - self.lon_c) * self.kx * self.scale, 1),
+                round(self.height / 2 - (lat - self.lat_c) * self.scale, 1))
+
+    def path(self, ring: Ring, closed: bool) -> str:
+        """SVG path data; points that round to the previous one are dropped."""
+        out, last = [], None
+        for lon, lat in ring:
+            p = self.xy(lon, lat)
+            if p != last:
+                out.append(f"{p[0]:g},{p[1]:g}")
+                last = p
+        if len(out) < 2:
+            return ""
+        return "M" + "L".join(out) + ("Z" if closed else "")
+
+
+def overlaps(a, b) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def draw_basemap(view: View, basemap) -> List[str]:
+    out = []
+    for kind, ring, bbox in basemap:
+        if overlaps(bbox, view.bbox):
+            d = view.path(ring, kind == "land")
+            if d:
+                out.append(f'<path class="sm-{kind}" d="{d}"/>')
+    return out
+
+
+def draw_graticule(view: View, labels: bool) -> List[str]:
+    lon0, lat0, lon1, lat1 = view.bbox
+    step = 1.0 if max(lon1 - lon0, lat1 - lat0) > 2 else 0.25
+    out = []
+    lon = math.ceil(lon0 / step) * step
+    while lon <= lon1:
+        x, _ = view.xy(lon, lat0)
+        out.append(f'<path class="sm-grid" d="M{x:g},0V{view.height:g}"/>')
+        if labels:
+            out.append(f'<text class="sm-grid-label" x="{x + 2:g}" y="{view.height - 3:g}">{lon:g}°E</text>')
+        lon += step
+    lat = math.ceil(lat0 / step) * step
+    while lat <= lat1:
+        _, y = view.xy(lon0, lat)
+        out.append(f'<path class="sm-grid" d="M0,{y:g}H{view.width:g}"/>')
+        if labels:
+            out.append(f'<text class="sm-grid-label" x="2" y="{y - 2:g}">{lat:g}°N</text>')
+        lat += step
+    return out
+
+
+def svg(view: View, body: List[str], title: str) -> str:
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {view.width:g} {view.height:g}" '
+            f'width="{view.width:g}" height="{view.height:g}" role="img">'
+            f"<title>{xml_escape(title)}</title>{STYLE}"
+            + "".join(body) + "</svg>\n")
+
+
+def render_overview(sites: List[Site], basemap, width: int = OVERVIEW_WIDTH) -> str:
+    """All the sites on one map; each dot links to the site's entry in the report."""
+    lons = [s.lon for s in sites]
+    lats = [s.lat for s in sites]
+    pad = max(max(lons) - min(lons), max(lats) - min(lats), 0.1) * PAD
+    view = View(min(lons) - pad, min(lats) - pad, max(lons) + pad, max(lats) + pad, width)
+    body = draw_basemap(view, basemap) + draw_graticule(view, labels=True)
+    for s in sites:
+        x, y = view.xy(s.lon, s.lat)
+        body.append(f'<a href="#{xml_escape(s.anchor)}"><circle class="sm-site" cx="{x:g}" cy="{y:g}" r="3.5">'
+                    f"<title>{xml_escape(s.name)}</title></circle></a>")
+    return svg(view, body, OVERVIEW_TITLE)
+
+
+def render_locator(site: Site, sites: List[Site], basemap, size: int = LOCATOR_SIZE,
+                   radius: float = LOCATOR_RADIUS) -> str:
+    """A small map centred on one site, with its neighbours in grey."""
+    kx = math.cos(math.radians(site.lat))
+    view = View(site.lon - radius / kx, site.lat - radius, site.lon + radius / kx, site.lat + radius, size, size)
+    body = draw_basemap(view, basemap) + draw_graticule(view, labels=False)
+    for s in sites:
+        if s.key != site.key and overlaps((s.lon, s.lat, s.lon, s.lat), view.bbox):
+            x, y = view.xy(s.lon, s.lat)
+            body.append(f'<circle class="sm-other" cx="{x:g}" cy="{y:g}" r="2"/>')
+    x, y = view.xy(site.lon, site.lat)
+    body.append(f'<circle class="sm-ring" cx="{x:g}" cy="{y:g}" r="9"/>')
+    body.append(f'<circle class="sm-here" cx="{x:g}" cy="{y:g}" r="4"/>')
+    return svg(view, body, site.name)
+
+
+def locator_name(site: Site, content: str) -> str:
+    slug = f"{site.lat:.5f}_{site.lon:.5f}".replace("-", "m")
+    return f"sites/{slug}.{hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]}.svg"
+
+
+def build(sites_file: str, out_dir: str, basemap_files: List[str], size: int = LOCATOR_SIZE,
+          radius: float = LOCATOR_RADIUS) -> dict:
+    sites = read_sites(sites_file)
+    if not sites:
+        raise SystemExit(f"{sites_file}: no sites with coordinates")
+    basemap = load_basemap(basemap_files)
+    os.makedirs(os.path.join(out_dir, "sites"), exist_ok=True)
+
+    write_if_changed(os.path.join(out_dir, "overview.svg"), render_overview(sites, basemap))
+    locators: Dict[str, str] = {}
+    written = 0
+    for site in sites:
+        if site.key in locators:
+            continue
+        content = render_locator(site, sites, basemap, size, radius)
+        name = locator_name(site, content)
+        written += write_if_changed(os.path.join(out_dir, name), content)
+        locators[site.key] = name
+
+    keep = {os.path.basename(p) for p in locators.values()}
+    removed = 0
+    for name in os.listdir(os.path.join(out_dir, "sites")):
+        if name.endswith(".svg") and name not in keep:
+            os.remove(os.path.join(out_dir, "sites", name))
+            removed += 1
+
+    manifest = {"overview": "overview.svg", "sites": dict(sorted(locators.items()))}
+    write_if_changed(os.path.join(out_dir, "manifest.json"), json.dumps(manifest, indent=1, ensure_ascii=False) + "\n")
+    print(f"{len(sites)} sites, {len(locators)} locators ({written} written, {removed} removed) in {out_dir}")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Static overview and locator maps for the site report.")
+    parser.add_argument("sites", help="merged sites file, e.g. mmap-sites.csv")
+    parser.add_argument("out_dir", help="where to write the maps, e.g. site_maps")
+    parser.add_argument("--basemap", action="append", default=[], metavar="GEOJSON",
+                        help="GeoJSON file to draw under the sites (repeatable: borders, rivers, ...)")
+    parser.add_argument("--locator-size", type=int, default=LOCATOR_SIZE, help="locator width and height, in pixels")
+    parser.add_argument("--locator-radius", type=float, default=LOCATOR_RADIUS,
+                        help="degrees of latitude from a site to the edge of its locator")
+    args = parser.parse_args(argv)
+    try:
+        build(args.sites, args.out_dir, args.basemap, args.locator_size, args.locator_radius)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
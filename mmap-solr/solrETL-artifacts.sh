@@ -17,67 +17,45 @@ CORE="public"
 # e.g. export CONNECT_STRING="postgresql://localhost:5432/mmap"
 CONNECT_STRING=${CONNECT_STRING}
 ##############################################################################
-# clear out the existing data
-##############################################################################
-curl -S -s "http://localhost:8983/solr/${TENANT}-${CORE}/update" --data '<delete><query>*:*</query></delete>' -H 'Content-type:text/xml; charset=utf-8'
-curl -S -s "http://localhost:8983/solr/${TENANT}-${CORE}/update" --data '<commit/>' -H 'Content-type:text/xml; charset=utf-8'
-
-##############################################################################
-# extract metadata
+# extract metadata and load it into solr
 ##############################################################################
+# solr_etl.py runs solr_sql/<table>.sql for each table through a server-side
+# cursor, cleans the rows (what the psql | perl | awk steps used to do) and
+# streams them straight to /update/csv. --delete-all clears the core first;
+# --keep leaves a copy of what was posted in solr_data for the steps below.
+#
+# with SOLR_BLUE_GREEN=1 the tables are loaded into a shadow core instead
+# (emptied first), which is swapped with the live one only if its document
+# count checks out; the live core keeps serving (and stays as it was on
+# failure). The shadow is only created the first time: a swap exchanges the
+# cores' names, not their directories, so from then on "<core>-shadow" lives
+# in the live core's old instance directory and cannot be deleted and
+# re-created under that name. To change the schema, recreate both cores.
+#
+# with SOLR_MATVIEWS=1 the rows are read from the pre-joined materialized
+# views (matviews.py create + write-sql, done once) after refreshing them.
 source export_tables.sh
+SQL_DIR=solr_sql
+if [[ "${SOLR_MATVIEWS}" == "1" ]]; then
+  time python3 matviews.py --conn "$CONNECT_STRING" refresh || exit 1
+  SQL_DIR=solr_sql_mv
+fi
+if [[ "${SOLR_BLUE_GREEN}" == "1" ]]; then
+  python3 solr_client.py exists "${TENANT}-${CORE}-shadow" || \
+    ./makesolrcores.sh "${TENANT}-${CORE}-shadow" "${TENANT}-${CORE}"
+  time python3 solr_etl.py "${TENANT}-${CORE}" "${tables[@]}" --conn "$CONNECT_STRING" --sql-dir ${SQL_DIR} --blue-green --keep solr_data
+else
+  time python3 solr_etl.py "${TENANT}-${CORE}" "${tables[@]}" --conn "$CONNECT_STRING" --sql-dir ${SQL_DIR} --delete-all --keep solr_data
+fi
 for table in "${tables[@]}"
 do
-  echo "table: solr_data/${table}"
-  time psql -R"@@" -A -d "$CONNECT_STRING" -f solr_sql/${table}.sql | \
-    perl -pe 's/[\r\n\t]/ /g;s/\|/\t/g;s/\@\@/\n/g' > solr_data/${table}.csv
-  perl -i -pe 's/ 00:00:00//g;s#Q:.##g;' solr_data/${table}.csv
-  ##############################################################################
-  #  compute a boolean: hascoords = yes/no
-  ##############################################################################
-  # check that all rows have the same number of fields as the header
-  ##############################################################################
-  export NUMCOLS=$(grep Record_No solr_data/${table}.csv | perl -pe 's/\t/\n/g' | wc -l)
-  export NUMCOLS=$(($NUMCOLS+0))
-  echo "numcols $NUMCOLS"
-  awk -F'\t' -v NUMCOLS=$NUMCOLS 'NF == NUMCOLS' solr_data/${table}.csv | \
-    perl -pe 's/\\/\//g;s/\t"/\t/g;s/"\t/\t/g;' > solr_data/4solr.${table}.csv &
-  awk -F'\t' -v NUMCOLS=$NUMCOLS 'NF != NUMCOLS' solr_data/${table}.csv | \
-    perl -pe 's/\\/\//g' > solr_data/errors.${table}.csv &
-  wait
-  # recover the solr header and put it back at the top of the file
-  grep Record_No solr_data/4solr.${table}.csv > solr_data/${table}.header4Solr.csv
-  perl -i -pe 's/\t/_s\t/g;s/$/_s/;s/Record_No_s/id/;tr/A-Z/a-z/;s/ /_/g;s/\?//g;' solr_data/${table}.header4Solr.csv
   ##############################################################################
   # generate solr schema <copyField> elements, just in case.
-  # also generate parameters for POST to solr (to split _ss fields properly)
   ##############################################################################
   ./genschema.sh solr_data/${table}
-  grep -v "Record_No" solr_data/4solr.${table}.csv > d8.csv
-  cat solr_data/${table}.header4Solr.csv d8.csv | perl -pe 's/␥/|/g' > d9.csv
-  #python capitalize.py d9.csv d10.csv 2 title
-  mv d9.csv d10.csv
-  ##############################################################################
-  # compute _i values for _dt values (to support BL date range searching)
-  ##############################################################################
-  #time python3 computeTimeIntegers.py d9.csv solr_data/4solr.${TENANT}.${CORE}.csv
-  # clean up some outstanding sins perpetuated by earlier scripts
-  #perl -i -pe 's/\r//g;s/\\/\//g;s/\t"/\t/g;s/"\t/\t/g;s/\"\"/"/g' solr_data/4solr.${TENANT}.${CORE}.csv
-  ##############################################################################
-  # ok, now let's load this into solr...
-  # clear out the existing data
-  ##############################################################################
-  mv d10.csv solr_data/4solr.${table}.csv
-  ##############################################################################
-  # this POSTs the csv to the Solr / update endpoint
-  # note, among other things, the overriding of the encapsulator with \
-  ##############################################################################
-  ss_string=`cat solr_data/${table}.uploadparms.txt`
-  time curl -X POST -S -s "http://localhost:8983/solr/${TENANT}-${CORE}/update/csv?commit=true&header=true&separator=%09&${ss_string}f.blob_ss.split=true&f.blob_ss.separator=,&encapsulator=\\" -T solr_data/4solr.${table}.csv -H 'Content-type:text/plain; charset=utf-8' &
-  time python3 evaluate.py solr_data/4solr.${table}.csv solr_data/temp.${table}.csv > solr_data/4solr.fields.${table}.counts.csv &
-  # wait for POSTs to Solr to finish
-  wait
+  python3 evaluate.py solr_data/4solr.${table}.csv > solr_data/4solr.fields.${table}.counts.csv &
 done
+wait
 ##############################################################################
 # wrap things up: make a gzipped version of what was loaded
 ##############################################################################
@@ -38,7 +38,7 @@ curl -S -s "http://localhost:8983/solr/${TENANT}-${CORE}/update" --data '<commit
 ##############################################################################
 ss_string=`cat uploadparms.${CORE}.txt`
 time curl -X POST -S -s "http://localhost:8983/solr/${TENANT}-${CORE}/update/csv?commit=true&header=true&separator=%09&${ss_string}f.blob_ss.split=true&f.blob_ss.separator=,&encapsulator=\\" -T 4solr.${TENANT}.${CORE}.csv -H 'Content-type:text/plain; charset=utf-8' &
-time python3 evaluate.py 4solr.${TENANT}.${CORE}.csv temp.${CORE}.csv > 4solr.fields.${TENANT}.${CORE}.counts.csv &
+time python3 evaluate.py 4solr.${TENANT}.${CORE}.csv > 4solr.fields.${TENANT}.${CORE}.counts.csv &
 # wait for POSTs to Solr to finish
 wait
 ##############################################################################
@@ -17,8 +17,30 @@ ss_string=$(cat ${TABLE}.uploadparms.txt)
 ##############################################################################
 # ok, now let's load this into solr...
 ##############################################################################
-# clear out the existing data
+# stop before touching the core if any row is malformed: Solr would
+# reject the whole upload after the old documents were already deleted.
+# Then count the distinct ids we are about to load, exactly: evaluate.py
+# only estimates ("~N") past csv_profile.EXACT_BELOW distinct values
 ##############################################################################
+time python3 evaluate.py ${TABLE}.csv > counts.${TABLE}.csv
+if grep -q "errors seen" counts.${TABLE}.csv; then
+  echo "${TABLE}.csv has malformed rows (see counts.${TABLE}.csv); not loading ${CORE}"
+  exit 1
+fi
+EXPECTED=$(awk -F'\t' 'NR == 1 {for (i = 1; i <= NF; i++) if ($i == "id") c = i; next}
+  c && $c != "" && !seen[$c]++ {n++} END {if (c) print n + 0}' ${TABLE}.csv)
+##############################################################################
+# with SOLR_BLUE_GREEN=1, load into a shadow core and swap it in at the end;
+# otherwise into the live core. Either way it is emptied first. The shadow is
+# only created if it does not exist yet: after a swap, "<core>-shadow" is the
+# previous live core, in the live core's old instance directory, and
+# "solr create" cannot make a core of that name again.
+##############################################################################
+LIVE_CORE=${CORE}
+if [[ "${SOLR_BLUE_GREEN}" == "1" ]]; then
+  CORE="${LIVE_CORE}-shadow"
+  python3 solr_client.py exists "${CORE}" || ./makesolrcores.sh "${CORE}" "${LIVE_CORE}"
+fi
 curl -S -s "http://localhost:8983/solr/${CORE}/update" --data '<delete><query>*:*</query></delete>' -H 'Content-type:text/xml; charset=utf-8'
 curl -S -s "http://localhost:8983/solr/${CORE}/update" --data '<commit/>' -H 'Content-type:text/xml; charset=utf-8'
 ##############################################################################
@@ -33,6 +55,14 @@ time curl -X POST -S -s \
   "http://localhost:8983/solr/${CORE}/update/csv?commit=true&header=true&separator=%09&${ss_string}f.blob_ss.split=true&f.blob_ss.separator=,&encapsulator=\\" \
   -H 'Content-type:text/plain; charset=utf-8' \
   -T ${TABLE}.csv
-time python3 evaluate.py ${TABLE}.csv tmp > counts.${TABLE}.csv
-rm tmp
+if [[ "${SOLR_BLUE_GREEN}" == "1" ]]; then
+  FOUND=$(python3 solr_client.py count "${CORE}")
+  if [[ -n "${EXPECTED}" && "${FOUND}" == "${EXPECTED}" ]]; then
+    python3 solr_client.py swap "${LIVE_CORE}" "${CORE}"
+    echo "swapped ${CORE} into ${LIVE_CORE} (${FOUND} documents)"
+  else
+    echo "not swapping: ${CORE} has ${FOUND} documents, expected ${EXPECTED}; ${LIVE_CORE} is unchanged"
+    exit 1
+  fi
+fi
 date
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+solr_client.py
+
+Minimal Solr HTTP helpers for the ETL scripts (standard library only).
+
+    post_csv(core_url, params, chunks)   stream a CSV body to /update/csv
+    update_xml(core_url, xml)            e.g. <delete><query>*:*</query></delete>
+    commit(core_url)
+    num_found(core_url, q="*:*")
+    doc_ids(core_url, q)                 ids of the matching documents
+    core_exists(name), swap(name, other)  CoreAdmin API
+
+It can also be run from shell scripts:
+
+    python solr_client.py count CORE
+    python solr_client.py swap CORE OTHER
+
+core_url is like http://localhost:8983/solr/mmap-public. Bodies given as an
+iterable of bytes are sent with chunked transfer encoding, so a table is
+never held in memory or written to disk just to be uploaded.
+"""
+
+import http.client
+import json
+import os
+import sys
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_SOLR_URL = os.environ.get("SOLR_URL", "http://localhost:8983/solr")
+
+
+class SolrError(RuntimeError):
+    pass
+
+
+def core_url(core, solr_url=None):
+    return f"{(solr_url or DEFAULT_SOLR_URL).rstrip('/')}/{core}"
+
+
+def request(url, method="GET", params=None, body=None, content_type=None, timeout=600):
+    """Send one request; return the decoded response body. Raise SolrError on non-2xx.
+
+    ``body`` may be bytes or an iterable of bytes (sent chunked).
+    """
+    parts = urlsplit(url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.hostname, parts.port, timeout=timeout)
+    path = parts.path or "/"
+    query = urlencode(params or [], safe=",")
+    if parts.query:
+        query = parts.query + ("&" + query if query else "")
+    if query:
+        path += "?" + query
+    headers = {}
+    if content_type:
+        headers["Content-Type"] = content_type
+    chunked = body is not None and not isinstance(body, (bytes, bytearray))
+    try:
+        conn.request(method, path, body=body, headers=headers, encode_chunked=chunked)
+        resp = conn.getresponse()
+        text = resp.read().decode("utf-8", errors="replace")
+    finally:
+        conn.close()
+    if not 200 <= resp.status < 300:
+        raise SolrError(f"{method} {url} -> HTTP {resp.status}: {text[:500]}")
+    return text
+
+
+def post_csv(core, params, chunks):
+    """POST CSV (bytes or an iterable of bytes) to <core>/update/csv."""
+    return request(f"{core}/update/csv", "POST", params=params, body=chunks,
+                   content_type="text/plain; charset=utf-8")
+
+
+def update_xml(core, xml):
+    return request(f"{core}/update", "POST", body=xml.encode("utf-8"),
+                   content_type="text/xml; charset=utf-8")
+
+
+def delete_all(core):
+    return update_xml(core, "<delete><query>*:*</query></delete>")
+
+
+def commit(core, soft=False):
+    if soft:
+        return request(f"{core}/update", "POST", params=[("softCommit", "true")],
+                       body=b"<commit/>", content_type="text/xml; charset=utf-8")
+    return update_xml(core, "<commit/>")
+
+
+def num_found(core, q="*:*"):
+    text = request(f"{core}/select", params=[("q", q), ("rows", "0"), ("wt", "json")])
+    return int(json.loads(text)["response"]["numFound"])
+
+
+def doc_ids(core, q, page=10000):
+    """The set of ids of the committed documents matching ``q``."""
+    ids, start = set(), 0
+    while True:
+        text = request(f"{core}/select", params=[("q", q), ("fl", "id"), ("sort", "id asc"),
+                                                 ("start", str(start)), ("rows", str(page)), ("wt", "json")])
+        docs = json.loads(text)["response"]["docs"]
+        ids.update(str(d["id"]) for d in docs)
+        if len(docs) < page:
+            return ids
+        start += page
+
+
+def core_admin(action, solr_url=None, **params):
+    url = f"{(solr_url or DEFAULT_SOLR_URL).rstrip('/')}/admin/cores"
+    text = request(url, params=[("action", action), ("wt", "json")] + list(params.items()))
+    return json.loads(text)
+
+
+def core_exists(name, solr_url=None):
+    status = core_admin("STATUS", solr_url, core=name).get("status", {})
+    return bool(status.get(name))
+
+
+def swap(name, other, solr_url=None):
+    """Atomically exchange two cores' names: searches on ``name`` hit ``other``'s index."""
+    return core_admin("SWAP", solr_url, core=name, other=other)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 2 and argv[0] == "count":
+        print(num_found(core_url(argv[1])))
+    elif len(argv) == 3 and argv[0] == "swap":
+        swap(argv[1], argv[2])
+    elif len(argv) == 2 and argv[0] == "exists":
+        return 0 if core_exists(argv[1]) else 1
+    else:
+        sys.stderr.write("Usage: python solr_client.py count CORE | swap CORE OTHER | exists CORE\n")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+solr_delta.py
+
+Incremental (delta) indexing of the artifacts core, driven by a change log
+that Postgres triggers maintain.
+
+    python solr_delta.py install            # change log table + triggers (once)
+    python solr_delta.py run mmap-public    # index what changed since last run
+    python solr_delta.py status
+    python solr_delta.py mark               # print the newest change number
+    python solr_delta.py clear --upto N     # forget changes <= N (after a full reload)
+
+install creates solr_changelog and an AFTER INSERT/UPDATE/DELETE row trigger
+on tblArtifact_Master and on every table in export_tables.sh. Each change
+logs the table name and the row's MMAP_Artifact_ID; for an UPDATE that
+moves a row to another artifact, both artifacts are logged.
+
+run reads the pending entries and works out the affected artifact ids. For
+those ids it notes the documents Solr has now, posts the rows re-extracted
+with each table's solr_sql/<table>.sql (restricted to those ids), which
+replace their documents by id, then deletes by id the noted documents that
+were not posted again, and commits. Solr's autoCommit may publish any part
+of this early, but every state it can publish is current rows plus, at
+worst, some stale ones still to be deleted; a failed run leaves those for
+the next one. It then deletes exactly the change log rows it handled, and
+records the high-water mark in solr_index_state. Entries that commit while
+a run is in progress are left for the next run. Deleted artifacts are just
+deleted.
+
+The full reload (solrETL-artifacts.sh) stays the fallback: it is what runs
+when run fails or finds more than --max-ids changed artifacts. Afterwards,
+`clear --upto <mark taken before it started>` drops the entries it covered.
+The sites core is not handled here; its photos come from the file system
+and it is always reloaded in full.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from xml.sax.saxutils import escape
+
+import solr_client
+import solr_etl
+
+ID_FIELD = "mmap_artifact_id_s"
+MASTER_TABLE = "tblArtifact_Master"
+LOCK_KEY = 0x4D4D4150  # "MMAP": one delta run at a time
+
+INSTALL_SQL = """
+CREATE TABLE IF NOT EXISTS solr_changelog (
+    seq         bigserial PRIMARY KEY,
+    table_name  text NOT NULL,
+    artifact_id text,
+    op          char(1) NOT NULL,
+    changed_at  timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS solr_index_state (
+    core        text PRIMARY KEY,
+    last_seq    bigint NOT NULL,
+    last_run    timestamptz NOT NULL DEFAULT now(),
+    artifacts   integer NOT NULL DEFAULT 0
+);
+CREATE OR REPLACE FUNCTION solr_changelog_capture() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    old_id text;
+    new_id text;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        old_id := to_jsonb(OLD) ->> 'MMAP_Artifact_ID';
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        new_id := to_jsonb(NEW) ->> 'MMAP_Artifact_ID';
+        INSERT INTO solr_changelog (table_name, artifact_id, op)
+        VALUES (TG_TABLE_NAME, new_id, left(TG_OP, 1));
+    END IF;
+    IF TG_OP = 'DELETE' OR old_id IS DISTINCT FROM new_id THEN
+        INSERT INTO solr_changelog (table_name, artifact_id, op)
+        VALUES (TG_TABLE_NAME, old_id, left(TG_OP, 1));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS solr_changelog ON {table};
+CREATE TRIGGER solr_changelog AFTER INSERT OR UPDATE OR DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION solr_changelog_capture();
+"""
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def restrict_sql(query):
+    """Limit an extraction query (solr_sql/<table>.sql) to a list of artifact ids.
+
+    The queries all select from "tblArtifact_Master" am with no WHERE clause,
+    so the restriction is appended. The result takes one parameter, a list.
+    """
+    bare = re.sub(r'"[^"]*"', '""', query)  # ignore quoted identifiers like "Where_cut"
+    if not re.search(r'FROM\s+"tblArtifact_Master"\s+am\b', query) or re.search(r"\bWHERE\b", bare, re.IGNORECASE):
+        raise ValueError("query cannot be restricted to artifact ids (expects FROM \"tblArtifact_Master\" am, no WHERE)")
+    return query.replace("%", "%%") + ' WHERE am."MMAP_Artifact_ID"::text = ANY(%s)'
+
+
+def artifacts_query(ids):
+    """Solr query for the documents of the artifacts ``ids`` (the terms parser takes the values verbatim)."""
+    return "{!terms f=%s}%s" % (ID_FIELD, ",".join(ids))
+
+
+def delete_docs_xml(doc_ids):
+    return "<delete>{}</delete>".format("".join(f"<id>{escape(i)}</id>" for i in sorted(doc_ids)))
+
+
+def restricted_queries(tables, sql_dir=solr_etl.SQL_DIR):
+    """{table: extraction query taking a list of artifact ids} for ``tables``."""
+    return {table: restrict_sql(solr_etl.read_sql(table, sql_dir)) for table in tables}
+
+
+def reindex(conn, core, ids, queries, batch=500, soft=False):
+    """Replace the documents of the artifacts ``ids`` in ``core``; return rows sent.
+
+    The re-extracted rows are posted first and overwrite their documents by
+    id; only then are the artifacts' other documents (rows since deleted or
+    moved) deleted by id. Nothing is deleted before its replacement is in,
+    so an autoCommit mid-run never publishes an artifact without its rows.
+    Ends with a commit (a soft commit with ``soft``).
+    """
+    rows = 0
+    for i in range(0, len(ids), batch):
+        chunk = list(ids[i:i + batch])
+        old = solr_client.doc_ids(core, artifacts_query(chunk))
+        sent = set()
+        for table, query in queries.items():
+            stream = solr_etl.TableStream(conn, table, query, ids=sent, params=(chunk,))
+            solr_client.post_csv(core, solr_etl.update_params(stream.header, commit=False), stream.chunks())
+            conn.commit()
+            rows += stream.rows
+        if old - sent:
+            solr_client.update_xml(core, delete_docs_xml(old - sent))
+    solr_client.commit(core, soft=soft)
+    return rows
+
+
+def install(conn, tables):
+    with conn.cursor() as cur:
+        cur.execute(INSTALL_SQL)
+        for table in [MASTER_TABLE] + list(tables):
+            cur.execute(TRIGGER_SQL.format(table=quote_ident(table)))
+    conn.commit()
+    print(f"change log installed; triggers on {len(tables) + 1} tables")
+
+
+def pending(cur):
+    """(seqs, artifact ids) of the change log rows visible now."""
+    cur.execute("SELECT seq, artifact_id FROM solr_changelog ORDER BY seq")
+    seqs, ids = [], set()
+    for seq, artifact_id in cur.fetchall():
+        seqs.append(int(seq))
+        if artifact_id is not None:
+            ids.add(artifact_id)
+    return seqs, sorted(ids)
+
+
+def run(conn, core, tables, sql_dir=solr_etl.SQL_DIR, max_ids=5000, batch=500):
+    """Index pending changes into ``core`` (a core URL). Returns an exit status."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_KEY,))
+        if cur.fetchone()[0] in (False, "f", "false"):
+            print("another delta run is in progress", file=sys.stderr)
+            return 1
+        seqs, ids = pending(cur)
+    conn.commit()
+    if not seqs:
+        print("no changes")
+        return 0
+    if len(ids) > max_ids:
+        print(f"{len(ids)} artifacts changed (more than --max-ids {max_ids}); do a full reload",
+              file=sys.stderr)
+        return 2
+
+    start = time.monotonic()
+    rows = reindex(conn, core, ids, restricted_queries(tables, sql_dir), batch=batch)
+
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM solr_changelog WHERE seq = ANY(%s)", (seqs,))
+        cur.execute(
+            "INSERT INTO solr_index_state (core, last_seq, last_run, artifacts) VALUES (%s, %s, now(), %s) "
+            "ON CONFLICT (core) DO UPDATE SET last_seq = EXCLUDED.last_seq, last_run = EXCLUDED.last_run, "
+            "artifacts = EXCLUDED.artifacts",
+            (core.rsplit("/", 1)[-1], max(seqs), len(ids)),
+        )
+    conn.commit()
+    print(f"{len(seqs)} change(s), {len(ids)} artifact(s), {rows} row(s) re-indexed "
+          f"in {time.monotonic() - start:.1f}s (up to change {max(seqs)})")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delta indexing of the artifacts core from a Postgres change log.")
+    parser.add_argument("--conn", default=os.environ.get("CONNECT_STRING"),
+                        help="Postgres connection string (default: $CONNECT_STRING)")
+    parser.add_argument("--solr-url", default=solr_client.DEFAULT_SOLR_URL)
+    parser.add_argument("--sql-dir", default=solr_etl.SQL_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("install", help="create the change log and the triggers")
+    p_run = sub.add_parser("run", help="index pending changes")
+    p_run.add_argument("core", help="Solr core, e.g. mmap-public")
+    p_run.add_argument("--max-ids", type=int, default=5000,
+                       help="give up (exit 2) and leave it to a full reload above this many artifacts")
+    sub.add_parser("status", help="show pending changes and the last run")
+    sub.add_parser("mark", help="print the newest change number (0 if none)")
+    p_clear = sub.add_parser("clear", help="drop change log entries up to a mark")
+    p_clear.add_argument("--upto", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    if not args.conn:
+        parser.error("set CONNECT_STRING or pass --conn")
+    tables = solr_etl.read_table_list()
+    conn = solr_etl.connect(args.conn)
+    try:
+        if args.command == "install":
+            install(conn, tables)
+            return 0
+        if args.command == "run":
+            return run(conn, solr_client.core_url(args.core, args.solr_url), tables,
+                       sql_dir=args.sql_dir, max_ids=args.max_ids)
+        with conn.cursor() as cur:
+            if args.command == "mark":
+                cur.execute("SELECT coalesce(max(seq), 0) FROM solr_changelog")
+                print(cur.fetchone()[0])
+            elif args.command == "clear":
+                cur.execute("DELETE FROM solr_changelog WHERE seq <= %s", (args.upto,))
+                print(f"cleared {cur.rowcount} change(s)")
+            else:
+                cur.execute("SELECT count(*), count(DISTINCT artifact_id), min(changed_at) FROM solr_changelog")
+                n, ids, oldest = cur.fetchone()
+                print(f"pending: {n} change(s), {ids} artifact(s), oldest {oldest or '-'}")
+                cur.execute("SELECT core, last_seq, last_run, artifacts FROM solr_index_state ORDER BY core")
+                for core, last_seq, last_run, artifacts in cur.fetchall():
+                    print(f"{core}: last run {last_run}, up to change {last_seq}, {artifacts} artifact(s)")
+        conn.commit()
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
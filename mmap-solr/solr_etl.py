@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+solr_etl.py
+
+Extract artifact tables from Postgres and load them into a Solr core in one
+pass per table, replacing the psql | perl | awk | curl pipeline that
+solrETL-artifacts.sh used to run.
+
+For each table, solr_sql/<table>.sql is run through a server-side cursor,
+every row is cleaned the way the shell pipeline did it, and the result is
+streamed as tab-separated CSV straight into <core>/update/csv:
+
+  - header:  "<col>_s", Record_No -> id, lowercased, blanks -> "_", "?" dropped
+  - values:  CR/LF/TAB -> blank; " 00:00:00" and "Q:<char>" dropped;
+             "\\" -> "/"; a leading '"' (all but the first field) and a
+             trailing '"' (all but the last field) dropped; "␥" -> "|"
+  - params:  f.<field>.split / f.<field>.separator=| for every *_ss field
+             except blob_ss (which splits on ","), tab separator, "\\" as
+             the encapsulator
+
+Values are fetched as the server's text output (no Python type conversion),
+so they look exactly like psql -A output did.
+
+Usage:
+    CONNECT_STRING=postgresql://... python solr_etl.py mmap-public tblBeads tblBells ...
+    python solr_etl.py mmap-public --all --delete-all --keep solr_data
+
+--keep DIR also writes DIR/4solr.<table>.csv and DIR/<table>.header4Solr.csv,
+the files genschema.sh and evaluate.py expect.
+
+Tables are processed concurrently: up to --extract-workers tables are read
+from Postgres at once (one connection each), each into a spooled temp file
+(in memory up to SPOOL_BYTES), and up to --post-workers finished tables are
+posted to Solr at once with commit=false. A single commit follows the last
+post, so searchers never see a half-loaded core mid-run. A per-table report
+of rows and extract/post times is printed at the end. With both worker
+counts at 1 tables are streamed one after another without spooling.
+
+--blue-green loads into a shadow core (<core>-shadow, created beforehand with
+./makesolrcores.sh <core>-shadow <core>) while <core> keeps serving. The
+shadow's document count must equal the number of distinct ids extracted
+(what evaluate.py reports as the "types" of id); only then are the two cores
+swapped with the CoreAdmin SWAP action. Otherwise the live core is left as
+it was and the exit status is non-zero.
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import solr_client
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solr_sql")
+EXPORT_TABLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export_tables.sh")
+FETCH_ROWS = 2000        # rows per server-side cursor round trip
+CHUNK_LINES = 1000       # CSV lines per HTTP chunk
+SPOOL_BYTES = 32 << 20   # per-table spool kept in memory before going to disk
+
+_WS_RE = re.compile(r"[\r\n\t]")
+_QCODE_RE = re.compile(r"Q:.")
+
+
+def read_table_list(path=EXPORT_TABLES):
+    """Table names from the bash array in export_tables.sh."""
+    with open(path, encoding="utf-8") as f:
+        return re.findall(r"'([^']+)'", f.read())
+
+
+def read_sql(table, sql_dir=SQL_DIR):
+    with open(os.path.join(sql_dir, f"{table}.sql"), encoding="utf-8") as f:
+        return f.read().strip().rstrip(";")
+
+
+# --- row and header cleanup --------------------------------------------------
+
+def clean_fields(fields):
+    """Apply the value rewrites to one row (header or data), field by field."""
+    last = len(fields) - 1
+    out = []
+    for i, v in enumerate(fields):
+        v = "" if v is None else v
+        v = _WS_RE.sub(" ", v)
+        v = v.replace(" 00:00:00", "")
+        v = _QCODE_RE.sub("", v)
+        v = v.replace("\\", "/")
+        if i > 0 and v.startswith('"'):
+            v = v[1:]
+        if i < last and v.endswith('"'):
+            v = v[:-1]
+        out.append(v.replace("␥", "|"))
+    return out
+
+
+def solr_header(columns):
+    """Solr field names for the query's columns (same rules as the shell's perl)."""
+    line = "\t".join(clean_fields(list(columns)))
+    line = line.replace("\t", "_s\t") + "_s"
+    line = line.replace("Record_No_s", "id", 1)
+    line = line.lower().replace(" ", "_").replace("?", "")
+    return line.split("\t")
+
+
+def split_params(header):
+    """f.<field>.split parameters for the multivalued fields in ``header``."""
+    params = []
+    for name in header:
+        if "_ss" in name and "blob" not in name:
+            params += [(f"f.{name}.split", "true"), (f"f.{name}.separator", "|")]
+    return params
+
+
+def update_params(header, commit=True):
+    """All /update/csv query parameters for a body with this header."""
+    return (
+        [("commit", "true" if commit else "false"), ("header", "true"), ("separator", "\t")]
+        + split_params(header)
+        + [("f.blob_ss.split", "true"), ("f.blob_ss.separator", ","), ("encapsulator", "\\")]
+    )
+
+
+# --- extraction --------------------------------------------------------------
+
+def connect(conn_str):
+    """Connect with psycopg (v3) or psycopg2; every column is returned as text."""
+    try:
+        import psycopg  # type: ignore
+        from psycopg.adapt import Loader  # type: ignore
+    except ImportError:
+        psycopg = None
+    if psycopg is not None:
+        class TextLoader(Loader):
+            def load(self, data):
+                return bytes(data).decode("utf-8")
+
+        conn = psycopg.connect(conn_str)
+        with conn.cursor() as cur:
+            cur.execute("SELECT oid FROM pg_type")
+            for (oid,) in cur.fetchall():
+                conn.adapters.register_loader(oid, TextLoader)
+        return conn
+
+    import psycopg2  # type: ignore
+    import psycopg2.extensions  # type: ignore
+    conn = psycopg2.connect(conn_str)
+    conn.set_client_encoding("UTF8")
+    with conn.cursor() as cur:
+        cur.execute("SELECT oid FROM pg_type")
+        oids = tuple(r[0] for r in cur.fetchall())
+    as_text = psycopg2.extensions.new_type(oids, "MMAP_TEXT", lambda value, cur: value)
+    psycopg2.extensions.register_type(as_text, conn)
+    return conn
+
+
+def extract(conn, query, name="solr_etl", params=None):
+    """Yield the column names, then every row as a tuple of strings (or None)."""
+    cur = conn.cursor(name=name)
+    cur.itersize = FETCH_ROWS
+    try:
+        cur.execute(query, params)
+        first = cur.fetchmany(FETCH_ROWS)
+        yield [d[0] for d in cur.description]
+        while first:
+            yield from first
+            first = cur.fetchmany(FETCH_ROWS)
+    finally:
+        cur.close()
+
+
+class TableStream:
+    """Cleaned CSV lines for one table, as HTTP body chunks.
+
+    ``header`` is available once the query has started; ``rows`` counts the
+    data lines produced so far. With ``keep`` the exact body is also written
+    to <keep>/4solr.<table>.csv.
+    """
+
+    def __init__(self, conn, table, query, keep=None, ids=None, params=None):
+        self.table = table
+        self.ids = ids
+        self._rows_iter = extract(conn, query, name=re.sub(r"\W", "_", f"etl_{table.lower()}")[:63],
+                                  params=params)
+        self.columns = next(self._rows_iter)
+        self.header = solr_header(self.columns)
+        self.rows = 0
+        self.keep = keep
+        if keep:
+            os.makedirs(keep, exist_ok=True)
+            with open(os.path.join(keep, f"{table}.header4Solr.csv"), "w", encoding="utf-8") as f:
+                f.write("\t".join(self.header) + "\n")
+
+    def chunks(self):
+        kept = open(os.path.join(self.keep, f"4solr.{self.table}.csv"), "w", encoding="utf-8") if self.keep else None
+        try:
+            lines = ["\t".join(self.header)]
+            id_pos = self.header.index("id") if self.ids is not None and "id" in self.header else None
+            for row in self._rows_iter:
+                fields = clean_fields(row)
+                lines.append("\t".join(fields))
+                self.rows += 1
+                if id_pos is not None:
+                    self.ids.add(fields[id_pos])
+                if len(lines) >= CHUNK_LINES:
+                    data = "\n".join(lines) + "\n"
+                    if kept:
+                        kept.write(data)
+                    yield data.encode("utf-8")
+                    lines = []
+            if lines:
+                data = "\n".join(lines) + "\n"
+                if kept:
+                    kept.write(data)
+                yield data.encode("utf-8")
+        finally:
+            if kept:
+                kept.close()
+
+
+def load_table(conn, core, table, sql_dir=SQL_DIR, keep=None, commit=True, ids=None):
+    """Extract ``table`` and stream it into ``core``; return the number of rows sent.
+
+    If ``ids`` is a set, the id of every row sent is added to it.
+    """
+    stream = TableStream(conn, table, read_sql(table, sql_dir), keep=keep, ids=ids)
+    solr_client.post_csv(core, update_params(stream.header, commit=commit), stream.chunks())
+    conn.commit()
+    return stream.rows
+
+
+@dataclass
+class TableResult:
+    table: str
+    rows: int = 0
+    extract_seconds: float = 0.0
+    wait_seconds: float = 0.0       # extracted, waiting for a post slot
+    post_seconds: float = 0.0
+    error: str = ""
+
+
+def _read_blocks(f, size=1 << 20):
+    for block in iter(lambda: f.read(size), b""):
+        yield block
+
+
+class Scheduler:
+    """Extract and post tables concurrently with separate bounds.
+
+    Each table job holds an extract slot while it reads the table into a
+    spool, then trades it for a post slot. Connections are opened per
+    worker thread and reused for the tables that thread handles.
+    """
+
+    def __init__(self, conn_str, core, sql_dir=SQL_DIR, keep=None,
+                 extract_workers=4, post_workers=2, ids=None):
+        self.conn_str = conn_str
+        self.ids = ids
+        self.core = core
+        self.sql_dir = sql_dir
+        self.keep = keep
+        self.extract_slots = threading.BoundedSemaphore(max(extract_workers, 1))
+        self.post_slots = threading.BoundedSemaphore(max(post_workers, 1))
+        self.workers = max(extract_workers, 1) + max(post_workers, 1)
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.conn_str)
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def run_table(self, table):
+        result = TableResult(table)
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES, mode="w+b")
+        try:
+            with self.extract_slots:
+                start = time.monotonic()
+                conn = self._conn()
+                try:
+                    stream = TableStream(conn, table, read_sql(table, self.sql_dir), keep=self.keep, ids=self.ids)
+                    for chunk in stream.chunks():
+                        spool.write(chunk)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                result.rows = stream.rows
+                result.extract_seconds = time.monotonic() - start
+            ready = time.monotonic()
+            with self.post_slots:
+                start = time.monotonic()
+                result.wait_seconds = start - ready
+                spool.seek(0)
+                solr_client.post_csv(self.core, update_params(stream.header, commit=False), _read_blocks(spool))
+                result.post_seconds = time.monotonic() - start
+        except Exception as e:
+            result.error = str(e) or e.__class__.__name__
+        finally:
+            spool.close()
+        status = f"FAILED: {result.error}" if result.error else f"{result.rows} rows"
+        print(f"table: {table} {status}", file=sys.stderr)
+        return result
+
+    def run(self, tables):
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(self.run_table, tables))
+        finally:
+            for conn in self._conns:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        solr_client.commit(self.core)
+        return results
+
+
+def print_report(results, elapsed, out=sys.stdout):
+    out.write(f"{'table':<24} {'rows':>8} {'extract':>8} {'wait':>8} {'post':>8}\n")
+    for r in sorted(results, key=lambda r: r.extract_seconds + r.wait_seconds + r.post_seconds, reverse=True):
+        if r.error:
+            out.write(f"{r.table:<24} FAILED: {r.error}\n")
+            continue
+        out.write(f"{r.table:<24} {r.rows:>8} {r.extract_seconds:>7.1f}s "
+                  f"{r.wait_seconds:>7.1f}s {r.post_seconds:>7.1f}s\n")
+    total = sum(r.rows for r in results)
+    serial = sum(r.extract_seconds + r.post_seconds for r in results)
+    out.write(f"{len(results)} tables, {total} rows in {elapsed:.1f}s "
+              f"(extract + post time summed over tables: {serial:.1f}s)\n")
+
+
+def load_tables(args, core, tables, ids=None):
+    """Load ``tables`` into ``core`` (concurrently unless both worker counts are 1).
+
+    Returns True if every table was loaded.
+    """
+    if args.extract_workers > 1 or args.post_workers > 1:
+        start = time.monotonic()
+        results = Scheduler(args.conn, core, sql_dir=args.sql_dir, keep=args.keep,
+                            extract_workers=args.extract_workers,
+                            post_workers=args.post_workers, ids=ids).run(tables)
+        print_report(results, time.monotonic() - start)
+        return not any(r.error for r in results)
+
+    conn = connect(args.conn)
+    failed = []
+    try:
+        for table in tables:
+            start = time.monotonic()
+            try:
+                n = load_table(conn, core, table, sql_dir=args.sql_dir, keep=args.keep, ids=ids)
+            except Exception as e:
+                conn.rollback()
+                failed.append(table)
+                print(f"table: {table} FAILED: {e}", file=sys.stderr)
+                continue
+            print(f"table: {table} {n} rows in {time.monotonic() - start:.1f}s")
+    finally:
+        conn.close()
+    if failed:
+        print(f"{len(failed)} table(s) failed: {', '.join(failed)}", file=sys.stderr)
+    return not failed
+
+
+def blue_green(args, tables):
+    """Load into the shadow core, check it, then swap it with the live core."""
+    live = args.core
+    shadow = args.shadow_core or f"{live}-shadow"
+    if not solr_client.core_exists(shadow, args.solr_url):
+        print(f"shadow core {shadow} does not exist; create it with ./makesolrcores.sh {shadow} {live}",
+              file=sys.stderr)
+        return 1
+    shadow_url = solr_client.core_url(shadow, args.solr_url)
+    solr_client.delete_all(shadow_url)
+    solr_client.commit(shadow_url)
+
+    ids = set()
+    ok = load_tables(args, shadow_url, tables, ids=ids)
+    solr_client.commit(shadow_url)
+    if not ok:
+        print(f"not swapping: some tables failed; {live} is unchanged", file=sys.stderr)
+        return 1
+    found = solr_client.num_found(shadow_url)
+    print(f"{shadow}: {found} documents, {len(ids)} distinct ids extracted")
+    if found != len(ids) or found == 0:
+        print(f"not swapping: document count does not match; {live} is unchanged", file=sys.stderr)
+        return 1
+    solr_client.swap(live, shadow, args.solr_url)
+    print(f"swapped {shadow} into {live} (previous index is now {shadow})")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract artifact tables from Postgres into a Solr core.")
+    parser.add_argument("core", help="Solr core name, e.g. mmap-public")
+    parser.add_argument("tables", nargs="*", help="tables to load (solr_sql/<table>.sql)")
+    parser.add_argument("--all", action="store_true", help="load every table listed in export_tables.sh")
+    parser.add_argument("--conn", default=os.environ.get("CONNECT_STRING"),
+                        help="Postgres connection string (default: $CONNECT_STRING)")
+    parser.add_argument("--solr-url", default=solr_client.DEFAULT_SOLR_URL,
+                        help="Solr base URL (default: $SOLR_URL or http://localhost:8983/solr)")
+    parser.add_argument("--sql-dir", default=SQL_DIR)
+    parser.add_argument("--delete-all", action="store_true", help="empty the core before loading")
+    parser.add_argument("--keep", metavar="DIR", help="also write the CSV that was posted for each table to DIR")
+    parser.add_argument("--extract-workers", type=int, default=4,
+                        help="tables read from Postgres at the same time (default: 4)")
+    parser.add_argument("--post-workers", type=int, default=2,
+                        help="tables posted to Solr at the same time (default: 2)")
+    parser.add_argument("--blue-green", action="store_true",
+                        help="load into a shadow core, verify it, then swap it with CORE")
+    parser.add_argument("--shadow-core", default=None, help="shadow core name (default: CORE-shadow)")
+    args = parser.parse_args(argv)
+
+    if not args.conn:
+        parser.error("set CONNECT_STRING or pass --conn")
+    tables = read_table_list() if args.all else args.tables
+    if not tables:
+        parser.error("no tables given (list them or use --all)")
+
+    if args.blue_green:
+        return blue_green(args, tables)
+
+    core = solr_client.core_url(args.core, args.solr_url)
+    if args.delete_all:
+        solr_client.delete_all(core)
+        solr_client.commit(core)
+    return 0 if load_tables(args, core, tables) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
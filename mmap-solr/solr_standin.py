@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+solr_standin.py
+
+A tiny in-memory stand-in for Solr, for trying the ETL scripts without a
+real Solr (it is not a search engine). It understands just what the
+scripts send:
+
+    POST /solr/<core>/update/csv    tab/comma CSV with header=true,
+                                    separator, encapsulator, f.<field>.split
+                                    and f.<field>.separator parameters
+    POST /solr/<core>/update        <delete><query>*:*</query></delete>,
+                                    <delete><id>..</id></delete>,
+                                    <delete><query>field:value</query></delete>,
+                                    <commit/>, <rollback/>, and JSON document lists
+    GET  /solr/<core>/select        q=*:*, q=field:value or q={!terms f=field}v1,v2;
+                                    numFound, and the ids of rows docs from start
+    GET  /solr/admin/cores          action=STATUS|CREATE|UNLOAD|SWAP|RELOAD
+
+Documents are keyed by "id". Uncommitted documents are not visible to
+/select until a commit (commit=true, <commit/>, softCommit=true).
+
+Usage:
+    python solr_standin.py [--port 8983]
+
+or from Python:
+
+    server = start(port=0)          # background thread, random port
+    url = f"http://127.0.0.1:{server.server_port}/solr"
+    ...
+    server.shutdown()
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class Core:
+    def __init__(self, name):
+        self.name = name
+        self.committed = {}
+        self.pending = None     # None = no uncommitted changes
+        self.lock = threading.Lock()
+
+    def _working(self):
+        if self.pending is None:
+            self.pending = dict(self.committed)
+        return self.pending
+
+    def add(self, docs):
+        with self.lock:
+            work = self._working()
+            for doc in docs:
+                work[str(doc.get("id"))] = doc
+
+    def delete_ids(self, ids):
+        with self.lock:
+            work = self._working()
+            for i in ids:
+                work.pop(str(i), None)
+
+    def delete_query(self, q):
+        with self.lock:
+            work = self._working()
+            for key in [k for k, doc in work.items() if matches(doc, q)]:
+                del work[key]
+
+    def rollback(self):
+        with self.lock:
+            self.pending = None
+
+    def commit(self):
+        with self.lock:
+            if self.pending is not None:
+                self.committed, self.pending = self.pending, None
+
+    def ids(self, q):
+        with self.lock:
+            return sorted(k for k, doc in self.committed.items() if matches(doc, q))
+
+
+def matches(doc, q):
+    q = (q or "*:*").strip()
+    if q == "*:*":
+        return True
+    m = re.fullmatch(r"\{!terms f=(\w+)\}(.*)", q)
+    if m:
+        field, values = m.group(1), m.group(2).split(",")
+        v = doc.get(field)
+        return any(str(x) in values for x in (v if isinstance(v, list) else [v]) if x is not None)
+    m = re.fullmatch(r'(\w+):"?(.*?)"?', q)
+    if not m:
+        raise ValueError(f"stand-in only supports *:* and field:value queries, not {q!r}")
+    field, value = m.groups()
+    value = re.sub(r"\\(.)", r"\1", value)
+    v = doc.get(field)
+    if isinstance(v, list):
+        return value in v or value == "*"
+    return v is not None and (value == "*" or str(v) == value)
+
+
+def parse_csv(body, params):
+    """Documents from a /update/csv body, honouring the split parameters."""
+    sep = params.get("separator", ",")
+    encap = params.get("encapsulator")
+    reader = csv.reader(
+        io.StringIO(body), delimiter=sep,
+        quotechar=encap or '"', quoting=csv.QUOTE_MINIMAL if encap else csv.QUOTE_NONE,
+    )
+    header = next(reader, [])
+    docs = []
+    for row in reader:
+        if not row:
+            continue
+        doc = {}
+        for name, value in zip(header, row):
+            if value == "":
+                continue
+            if params.get(f"f.{name}.split") == "true":
+                doc[name] = value.split(params.get(f"f.{name}.separator", ","))
+            else:
+                doc[name] = value
+        docs.append(doc)
+    return docs
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "SolrStandIn/0.1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    # --- plumbing
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(parts)
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        segs = [s for s in parts.path.split("/") if s]
+        if not segs or segs[0] != "solr":
+            return None, None, params
+        return segs[1:2], segs[2:], params
+
+    def _core(self, name):
+        core = self.server.cores.get(name)
+        if core is None:
+            self._reply(404, {"error": {"msg": f"no such core: {name}", "code": 404}})
+        return core
+
+    # --- verbs
+
+    def do_GET(self):
+        head, rest, params = self._route()
+        if head == ["admin"] and rest == ["cores"]:
+            return self._admin(params)
+        if head and rest == ["select"]:
+            core = self._core(head[0])
+            if core:
+                ids = core.ids(params.get("q"))
+                start, rows = int(params.get("start", 0)), int(params.get("rows", 10))
+                docs = [{"id": i} for i in ids[start:start + rows]]
+                self._reply(200, {"response": {"numFound": len(ids), "start": start, "docs": docs}})
+            return
+        self._reply(404, {"error": {"msg": "not found", "code": 404}})
+
+    def do_POST(self):
+        head, rest, params = self._route()
+        body = self._body().decode("utf-8")
+        if not head or not rest or rest[0] != "update":
+            return self._reply(404, {"error": {"msg": "not found", "code": 404}})
+        core = self._core(head[0])
+        if core is None:
+            return
+        try:
+            if rest[1:] == ["csv"]:
+                core.add(parse_csv(body, params))
+            elif body.lstrip().startswith(("[", "{")):
+                payload = json.loads(body)
+                core.add(payload if isinstance(payload, list) else [payload])
+            elif body.strip():
+                self._xml(core, body)
+        except (ValueError, ET.ParseError, csv.Error) as e:
+            return self._reply(400, {"error": {"msg": str(e), "code": 400}})
+        if params.get("commit") == "true" or params.get("softCommit") == "true":
+            core.commit()
+        self._reply(200, {"responseHeader": {"status": 0}})
+
+    do_PUT = do_POST
+
+    def _xml(self, core, body):
+        root = ET.fromstring(body)
+        if root.tag == "commit":
+            core.commit()
+        elif root.tag == "rollback":
+            core.rollback()
+        elif root.tag == "delete":
+            ids = [e.text or "" for e in root.findall("id")]
+            if ids:
+                core.delete_ids(ids)
+            for q in root.findall("query"):
+                core.delete_query(q.text)
+        else:
+            raise ValueError(f"unsupported update command <{root.tag}>")
+
+    def _admin(self, params):
+        action = params.get("action", "STATUS").upper()
+        cores = self.server.cores
+        with self.server.admin_lock:
+            if action == "STATUS":
+                name = params.get("core")
+                names = [name] if name else sorted(cores)
+                return self._reply(200, {"status": {n: ({"name": n} if n in cores else {}) for n in names}})
+            if action == "CREATE":
+                name = params["name"]
+                cores.setdefault(name, Core(name))
+            elif action == "UNLOAD":
+                cores.pop(params["core"], None)
+            elif action == "SWAP":
+                a, b = params["core"], params["other"]
+                if a not in cores or b not in cores:
+                    return self._reply(400, {"error": {"msg": "both cores must exist", "code": 400}})
+                cores[a], cores[b] = cores[b], cores[a]
+                cores[a].name, cores[b].name = a, b
+            elif action != "RELOAD":
+                return self._reply(400, {"error": {"msg": f"unsupported action {action}", "code": 400}})
+        self._reply(200, {"responseHeader": {"status": 0}})
+
+
+def start(host="127.0.0.1", port=0, cores=(), verbose=False):
+    """Run the stand-in on a background thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.cores = {name: Core(name) for name in cores}
+    server.admin_lock = threading.Lock()
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-memory Solr stand-in for the ETL scripts.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8983)
+    parser.add_argument("--core", action="append", default=[],
+                        help="core to create at startup (repeatable; default: mmap-public, mmap-sites)")
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.cores = {name: Core(name) for name in (args.core or ["mmap-public", "mmap-sites"])}
+    server.admin_lock = threading.Lock()
+    server.verbose = True
+    print(f"Solr stand-in on http://{args.host}:{server.server_port}/solr "
+          f"(cores: {', '.join(sorted(server.cores))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
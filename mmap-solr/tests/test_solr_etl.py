@@ -0,0 +1,128 @@
+"""solr_etl / solr_client / solr_delta against the in-memory Solr stand-in (no Postgres or Solr required)."""
+from __future__ import annotations
+
+import pytest
+
+import solr_client
+import solr_delta
+import solr_etl
+import solr_standin
+
+
+class FakeCursor:
+    """Server-side cursor over canned rows, as solr_etl.extract uses it."""
+
+    def __init__(self, columns, rows):
+        self.columns, self.rows = columns, rows
+        self.description = None
+
+    def execute(self, query, params=None):
+        self.description = [(c,) for c in self.columns]
+        self._left = list(self.rows)
+        if params:  # restricted to a list of artifact ids, as solr_delta.restrict_sql does
+            self._left = [r for r in self._left if r[1] in params[0]]
+
+    def fetchmany(self, n):
+        out, self._left = self._left[:n], self._left[n:]
+        return out
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, columns, rows):
+        self.columns, self.rows = columns, rows
+
+    def cursor(self, name=None):
+        return FakeCursor(self.columns, self.rows)
+
+    def commit(self):
+        pass
+
+
+COLUMNS = ["Record_No", "MMAP_Artifact_ID", "Bead Colour?", "Materials_ss", "blob"]
+
+
+@pytest.fixture
+def solr():
+    server = solr_standin.start(cores=["mmap-public"])
+    yield server, f"http://127.0.0.1:{server.server_port}/solr/mmap-public"
+    server.shutdown()
+    server.server_close()
+
+
+def committed(server):
+    return server.cores["mmap-public"].committed
+
+
+def test_clean_fields_applies_the_shell_rewrites():
+    row = ['"a\tb', "2020-01-02 00:00:00", "Q:xvalue", "c:\\dir", 'q"', 'x␥y"']
+    assert solr_etl.clean_fields(row) == ['"a b', "2020-01-02", "value", "c:/dir", "q", 'x|y"']
+    assert solr_etl.clean_fields([None, '"z']) == ["", "z"]
+
+
+def test_solr_header_renames_columns():
+    assert solr_etl.solr_header(COLUMNS) == [
+        "id", "mmap_artifact_id_s", "bead_colour_s", "materials_ss_s", "blob_s"]
+    assert solr_etl.solr_header(["Site Name", "Beads_ss"]) == ["site_name_s", "beads_ss_s"]
+
+
+def test_split_params_cover_multivalued_fields_but_not_blobs():
+    params = solr_etl.split_params(["id", "tags_ss", "blob_ss", "name_s"])
+    assert params == [("f.tags_ss.split", "true"), ("f.tags_ss.separator", "|")]
+    update = dict(solr_etl.update_params(["id", "tags_ss"], commit=False))
+    assert update["commit"] == "false" and update["separator"] == "\t"
+    assert update["f.blob_ss.separator"] == ","
+
+
+def test_load_table_round_trip(solr, tmp_path):
+    server, core = solr
+    (tmp_path / "tblBeads.sql").write_text('SELECT * FROM "tblArtifact_Master" am;\n')
+    conn = FakeConn(["Record_No", "MMAP_Artifact_ID", "Colour?", "tags_ss", "blob_ss"], [
+        ("1", "A1", "red 00:00:00", "glass␥stone", "a.jpg,b.jpg"),
+        ("2", "A2", "Q:xblue", None, None),
+    ])
+    ids = set()
+    assert solr_etl.load_table(conn, core, "tblBeads", sql_dir=str(tmp_path), ids=ids) == 2
+    assert ids == {"1", "2"}
+    assert solr_client.num_found(core) == 2
+    docs = committed(server)
+    assert docs["1"]["colour_s"] == "red"
+    assert docs["1"]["tags_ss_s"] == ["glass", "stone"]  # "␥" became "|", then the split separator
+    assert docs["1"]["blob_ss_s"] == "a.jpg,b.jpg"
+    assert docs["2"]["colour_s"] == "blue"
+    assert "tags_ss_s" not in docs["2"]
+
+
+def test_split_fields_become_lists(solr):
+    server, core = solr
+    header = ["id", "tags_ss", "blob_ss"]
+    body = "\t".join(header) + "\n" + "\t".join(["7", "a|b", "x.jpg,y.jpg"]) + "\n"
+    solr_client.post_csv(core, solr_etl.update_params(header), body.encode("utf-8"))
+    doc = committed(server)["7"]
+    assert doc["tags_ss"] == ["a", "b"]
+    assert doc["blob_ss"] == ["x.jpg", "y.jpg"]
+
+
+def test_uncommitted_posts_are_not_searchable(solr):
+    server, core = solr
+    header = ["id", "name_s"]
+    solr_client.post_csv(core, solr_etl.update_params(header, commit=False), b"id\tname_s\n1\tx\n")
+    assert solr_client.num_found(core) == 0
+    solr_client.commit(core)
+    assert solr_client.num_found(core) == 1
+
+
+def test_reindex_replaces_an_artifacts_documents(solr):
+    server, core = solr
+    header = "id\tmmap_artifact_id_s\tname_s\n"
+    solr_client.post_csv(core, solr_etl.update_params(["id"]),
+                         (header + "1\tA1\told\n2\tA1\tgone\n3\tB2\tother\n").encode("utf-8"))
+    conn = FakeConn(["Record_No", "MMAP_Artifact_ID", "name"], [("1", "A1", "new"), ("4", "A1", "added")])
+    queries = {"tblBeads": 'SELECT * FROM "tblArtifact_Master" am'}
+
+    assert solr_delta.reindex(conn, core, ["A1"], queries) == 2
+    assert solr_client.doc_ids(core, "*:*", page=2) == {"1", "3", "4"}
+    assert committed(server)["1"]["name_s"] == "new"
+    assert committed(server)["3"]["name_s"] == "other"
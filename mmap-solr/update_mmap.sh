@@ -7,17 +7,39 @@ source /home/ubuntu/.profile
 cd /home/ubuntu/blacklight-mmap/mmap-solr/
 
 # update derivatives
-time ./make_derivatives.sh ${PHOTO_DIR}/originals ${PHOTO_DIR}/derivatives >> mmap-derivatives.txt 2>&1
+# (incremental: only originals added or changed since the last run are converted;
+#  --adopt records derivatives left by the old shell loop instead of rebuilding them;
+#  --sizes/--lqip keep the smaller copies and placeholders the site catalog uses)
+time python3 derivatives.py --adopt --sizes 160,320 --lqip ${PHOTO_DIR}/originals ${PHOTO_DIR}/derivatives >> mmap-derivatives.txt 2>&1
 
 # concatenate all tablet GIS files together and process into postgres
 cat /mnt/images/MMAP_GIS_data/* > csvtoload.csv
 time ./loadpostgres.sh csvtoload.csv "$CONNECT_STRING" mapping-tablet-to-postgres.csv >> mmap-loadpostgres.txt 2>&1
 
+# reload the solr cores into shadow cores and swap them in when verified,
+# so search stays up (and complete) during the reload
+export SOLR_BLUE_GREEN=1
+
 # reload artifacts solr core
-time ./solrETL-artifacts.sh mmap >> mmap-reload-artifacts.txt 2>&1
+# with SOLR_DELTA=1 only artifacts changed since the last run are re-indexed
+# (needs "python3 solr_delta.py install" once); if that fails, or too much
+# changed, fall back to the full reload, then drop the change log entries
+# the full reload covered.
+if [[ "${SOLR_DELTA}" == "1" ]] && time python3 solr_delta.py run mmap-public >> mmap-reload-artifacts.txt 2>&1; then
+  echo "artifacts: delta indexing done" >> mmap-reload-artifacts.txt
+else
+  MARK=$(python3 solr_delta.py mark 2>/dev/null)
+  time ./solrETL-artifacts.sh mmap >> mmap-reload-artifacts.txt 2>&1 && \
+    [[ -n "${MARK}" ]] && python3 solr_delta.py clear --upto "${MARK}" >> mmap-reload-artifacts.txt 2>&1
+fi
 
 # reload sites solr core
 time ./reload_sites.sh ${PHOTO_DIR}/derivatives >> mmap-reload-sites.txt 2>&1
 
+# static site maps (add --basemap FILE.geojson for borders/rivers under the sites)
+python3 sitemaps.py mmap-sites.csv site_maps
+
 # regenerate site catalog, but leave it in the runtime directory
-python make_report.py mmap-sites.csv aws > site_report.html
+# (site cards whose data did not change are reused from report_cache)
+python make_report.py mmap-sites.csv aws --output site_report.html --cache-dir report_cache \
+  --variants ${PHOTO_DIR}/derivatives/_variants/manifest.json --lqip --site-maps site_maps
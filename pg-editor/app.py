@@ -1,11 +1,12 @@
 from __future__ import annotations
 import json
+import time
 from datetime import timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from flask import (
-    Flask, abort, flash, redirect, render_template, request, session, url_for
+    Flask, abort, flash, g, redirect, render_template, request, session, url_for
 )
 from flask_session import Session
 from sqlalchemy import text
@@ -14,8 +15,12 @@ from sqlalchemy.exc import SQLAlchemyError
 import config as cfg
 from crosswalk import ColumnMeta, load_crosswalk, save_crosswalk
 from introspect import load_schema
-from db import DbCreds, get_engine, make_db_url, test_connection
-from forms import input_type_for_pg, normalize_value_for_db
+from cache import TTLCache
+from db import DbCreds, EngineRegistry, make_db_url, test_connection
+from forms import group_row_updates, input_type_for_pg, normalize_value_for_db
+from paging import load_boundaries, locate_page, neighbour_pks, page_query
+from reindex import ARTIFACT_ID, Reindexer, ReindexQueue, solr_indexer, touched_artifacts
+from rowcount import RowCount, count_rows
 
 PK_NAME = "Record_No"
 
@@ -53,6 +58,35 @@ def create_app() -> Flask:
     # and cached here, keyed by the connection URL.
     app.config["SCHEMA_CACHE"] = {}
 
+    # Pooled engines shared across requests, keyed by the connection URL.
+    app.config["ENGINES"] = EngineRegistry(
+        pool_size=int(getattr(cfg, "ENGINE_POOL_SIZE", 5)),
+        max_overflow=int(getattr(cfg, "ENGINE_MAX_OVERFLOW", 10)),
+        pool_recycle=int(getattr(cfg, "ENGINE_POOL_RECYCLE", 1800)),
+        pool_timeout=float(getattr(cfg, "ENGINE_POOL_TIMEOUT", 30)),
+        idle_seconds=float(getattr(cfg, "ENGINE_IDLE_SECONDS", 900)),
+    )
+
+    # Sparse primary-key indexes used to jump to arbitrary pages, keyed by
+    # (db_url, table, step).
+    app.config["PAGE_INDEX"] = TTLCache(ttl=float(getattr(cfg, "PAGE_INDEX_TTL", 300)))
+    # Row counts (exact or estimated), keyed by (db_url, table).
+    app.config["ROW_COUNTS"] = TTLCache(ttl=float(getattr(cfg, "ROW_COUNT_TTL", 60)))
+
+    # Optional write-through Solr reindexing: saves queue the artifacts they
+    # touched and a background worker re-indexes them with soft commits.
+    app.config["REINDEXER"] = None
+    if getattr(cfg, "SOLR_REINDEX_CORE", None):
+        mmap_solr_dir = str(_resolve(getattr(cfg, "MMAP_SOLR_DIR", "../mmap-solr")))
+        reindexer = Reindexer(
+            ReindexQueue(str(_resolve(getattr(cfg, "SOLR_REINDEX_QUEUE", "instance/solr_reindex.sqlite")))),
+            solr_indexer(cfg.SOLR_REINDEX_CORE, mmap_solr_dir),
+            batch=int(getattr(cfg, "SOLR_REINDEX_BATCH", 200)),
+            interval=float(getattr(cfg, "SOLR_REINDEX_INTERVAL", 2)),
+        )
+        reindexer.start()
+        app.config["REINDEXER"] = reindexer
+
     # Ensure config file exists
     _resolve(getattr(cfg, "TABLE_CONFIG_FILE", "instance/table_config.json")).parent.mkdir(parents=True, exist_ok=True)
 
@@ -137,7 +171,7 @@ def create_app() -> Flask:
         if not session.get("db_url"):
             return None, require_login()
         try:
-            eng = get_engine(session["db_url"])
+            eng = app.config["ENGINES"].get(session["db_url"])
             return eng, None
         except Exception as e:
             flash(f"Could not create DB engine: {e}", "danger")
@@ -180,6 +214,84 @@ def create_app() -> Flask:
     def qtable(schema: str, table: str) -> str:
         return f"{qident(schema)}.{qident(table)}"
 
+    def fetch_page_rows(conn, table_name: str, cols: List[str], page: int, limit: int,
+                        after: Any = None, before: Any = None) -> List[Any]:
+        """Fetch one page of ``cols`` ordered by the primary key.
+
+        In keyset mode (the default) sequential paging seeks from the
+        previous page's last/first key (``after``/``before``), and a direct
+        jump to page N seeks from a cached sparse index of page boundaries,
+        so the cost no longer grows with the page number. With
+        ``PAGINATION = 'offset'`` plain LIMIT/OFFSET is used.
+        """
+        schema = getattr(cfg, "DEFAULT_SCHEMA", "public")
+        tbl_sql = qtable(schema, table_name)
+        pk_sql = qident(PK_NAME)
+        select_sql = f"SELECT {', '.join(qident(c) for c in cols)} FROM {tbl_sql}"
+        offset = (page - 1) * limit
+        start = None
+        if getattr(cfg, "PAGINATION", "keyset") != "keyset":
+            after = before = None
+        elif after is None and before is None:
+            stride = max(int(getattr(cfg, "PAGE_INDEX_STRIDE", 10)), 1)
+            if page > stride:
+                key = (session.get("db_url"), table_name, limit * stride)
+                index = app.config["PAGE_INDEX"]
+                bounds = index.get(key)
+                if bounds is None:
+                    bounds = load_boundaries(conn, tbl_sql, pk_sql, limit * stride)
+                    index.set(key, bounds)
+                start, offset = locate_page(bounds, page, limit, stride)
+        stmt, params, reverse = page_query(select_sql, pk_sql, after=after, before=before,
+                                           start=start, offset=offset)
+        params["limit"] = limit
+        rows = conn.execute(stmt, params).mappings().all()
+        return list(reversed(rows)) if reverse else list(rows)
+
+    def get_row_count(conn, table_name: str) -> RowCount:
+        """Cached row count; large tables use the planner's estimate."""
+        key = (session.get("db_url"), table_name)
+        cache = app.config["ROW_COUNTS"]
+        rc = cache.get(key)
+        if rc is None:
+            schema = getattr(cfg, "DEFAULT_SCHEMA", "public")
+            rc = count_rows(conn, schema, table_name, qtable(schema, table_name),
+                            exact_below=int(getattr(cfg, "ROW_COUNT_EXACT_BELOW", 100_000)))
+            cache.set(key, rc)
+        return rc
+
+    def table_changed(table_name: str, resized: bool = True) -> None:
+        """Forget cached per-table facts after the table was written to.
+
+        Page boundaries only move when rows are added or removed, so plain
+        updates (``resized=False``) keep the page index.
+        """
+        key = (session.get("db_url"), table_name)
+        app.config["ROW_COUNTS"].discard_prefix(*key)
+        if resized:
+            app.config["PAGE_INDEX"].discard_prefix(*key)
+
+    def reindex_later(conn, table_name: str, columns: List[ColumnMeta], pks: List[Any]) -> None:
+        """Note the artifacts behind rows ``pks`` for Solr re-indexing.
+
+        Called inside the write transaction (before a delete, before and
+        after an update, after an insert); the ids are queued only once the
+        request has finished, i.e. after the commit.
+        """
+        if app.config["REINDEXER"] is None or not any(c.name == ARTIFACT_ID for c in columns):
+            return
+        schema = getattr(cfg, "DEFAULT_SCHEMA", "public")
+        pk_type = next((c.data_type for c in columns if c.name == PK_NAME), "text")
+        ids = touched_artifacts(conn, qtable(schema, table_name), qident(PK_NAME), pks, pk_type)
+        g.setdefault("reindex_ids", set()).update(ids)
+
+    @app.after_request
+    def queue_reindex(response):
+        ids = g.pop("reindex_ids", None)
+        if ids and app.config["REINDEXER"] is not None:
+            app.config["REINDEXER"].enqueue(session.get("db_url"), sorted(ids))
+        return response
+
     @app.get("/")
     def home():
         return redirect(url_for("tables"))
@@ -208,8 +320,10 @@ def create_app() -> Flask:
         creds = DbCreds(host=host, port=port, dbname=dbname, user=user, password=password)
         db_url = make_db_url(creds)
 
+        engines = app.config["ENGINES"]
+        shared = db_url in engines  # other sessions may be using this pool
         try:
-            eng = get_engine(db_url)
+            eng = engines.get(db_url)
             test_connection(eng)
 
             # Capture connection identity for debugging and to detect when the user
@@ -227,6 +341,11 @@ def create_app() -> Flask:
                 )).mappings().first()
                 session["db_ident"] = dict(ident_row) if ident_row else {}
         except Exception as e:
+            # Don't keep a pool around for credentials that don't work; one
+            # that was already there worked for someone, and idle eviction
+            # retires it if that has changed.
+            if not shared:
+                engines.dispose(db_url)
             flash(f"Login failed: {e}", "danger")
             return redirect(url_for("login"))
 
@@ -277,11 +396,15 @@ def create_app() -> Flask:
             return redirect(url_for("login", next=url_for("whoami")))
         ident = session.get("db_ident") or {}
         schema_info = session.get("schema_info") or {}
-        return render_template("whoami.html", ident=ident, schema_info=schema_info)
+        engines = app.config["ENGINES"]
+        pool_stats = dict(engines.stats.as_dict(), engines=len(engines))
+        return render_template("whoami.html", ident=ident, schema_info=schema_info,
+                               pool_stats=pool_stats)
 
     @app.get("/logout")
     def logout():
-        # Drop this connection's cached schema too.
+        # Drop this connection's cached schema too. Its engine is shared with
+        # every session on the same URL; the registry retires it once idle.
         app.config["SCHEMA_CACHE"].pop(session.get("db_url"), None)
         for k in ("db_url", "dbname", "crosswalk_path", "schema_info", "db_ident"):
             session.pop(k, None)
@@ -367,12 +490,14 @@ def create_app() -> Flask:
             page = max(int(request.args.get("page", "1")), 1)
         except Exception:
             page = 1
-        offset = (page - 1) * page_size
+        # Keyset cursors: the first/last primary key of the neighbouring page.
+        after = request.args.get("after") or None
+        before = request.args.get("before") or None
 
         rows = []
         total = None
+        total_estimated = False
         last_page = None
-        pk_values = []
         prev_pk = None
         next_pk = None
         first_pk = None
@@ -383,19 +508,12 @@ def create_app() -> Flask:
         if tab == "view":
             try:
                 cols = [PK_NAME] + [c for c in view_cols if c != PK_NAME]
-                select_cols_sql = ", ".join(qident(c) for c in cols)
-                tbl_sql = qtable(schema, table_name)
-                q = text(
-                    f"SELECT {select_cols_sql} FROM {tbl_sql} "
-                    f"ORDER BY {qident(PK_NAME)} LIMIT :limit OFFSET :offset"
-                )
-                q_count = text(f"SELECT count(*) AS cnt FROM {tbl_sql}")
 
                 with eng.connect() as conn:
-                    rows = conn.execute(q, {"limit": page_size, "offset": offset}).mappings().all()
-                    total = conn.execute(q_count).scalar_one()
-                    if total is not None:
-                        last_page = max((int(total) + page_size - 1) // page_size, 1)
+                    rows = fetch_page_rows(conn, table_name, cols, page, page_size, after, before)
+                    rc = get_row_count(conn, table_name)
+                total, total_estimated = rc.value, rc.estimated
+                last_page = max((total + page_size - 1) // page_size, 1)
             except Exception as e:
                 flash(f"View failed: {e}", "danger")
 
@@ -423,32 +541,21 @@ def create_app() -> Flask:
 
         if tab == "edit" and editmode == "grid":
             try:
-                tbl_sql = qtable(schema, table_name)
                 grid_cols = [PK_NAME] + [c for c in edit_cols if c != PK_NAME]
-                select_cols_sql = ", ".join(qident(c) for c in grid_cols)
                 grid_offset = (page - 1) * per_page
-                q = text(
-                    f"SELECT {select_cols_sql} FROM {tbl_sql} "
-                    f"ORDER BY {qident(PK_NAME)} LIMIT :limit OFFSET :offset"
-                )
-                q_count = text(f"SELECT count(*) AS cnt FROM {tbl_sql}")
                 with eng.connect() as conn:
-                    grid_rows = conn.execute(q, {"limit": per_page, "offset": grid_offset}).mappings().all()
-                    grid_total = conn.execute(q_count).scalar_one()
-                if grid_total is not None:
-                    grid_pages = max((int(grid_total) + per_page - 1) // per_page, 1)
-                    grid_start = grid_offset + 1 if grid_rows else 0
-                    grid_end = grid_offset + len(grid_rows)
+                    grid_rows = fetch_page_rows(conn, table_name, grid_cols, page, per_page, after, before)
+                    rc = get_row_count(conn, table_name)
+                grid_total, total_estimated = rc.value, rc.estimated
+                grid_pages = max((grid_total + per_page - 1) // per_page, 1)
+                grid_start = grid_offset + 1 if grid_rows else 0
+                grid_end = grid_offset + len(grid_rows)
             except Exception as e:
                 flash(f"Edit (table) load failed: {e}", "danger")
 
         elif tab == "edit":
             try:
                 tbl_sql = qtable(schema, table_name)
-                q_pks = text(
-                    f"SELECT {qident(PK_NAME)} FROM {tbl_sql} "
-                    f"ORDER BY {qident(PK_NAME)} LIMIT 2000"
-                )
 
                 # Only fetch columns we actually edit (+ PK for display)
                 edit_fetch_cols = [PK_NAME] + [c for c in edit_cols if c != PK_NAME]
@@ -459,27 +566,25 @@ def create_app() -> Flask:
                 )
 
                 with eng.connect() as conn:
-                    pk_values = conn.execute(q_pks).scalars().all()
-                    if pk_values:
-                        first_pk = pk_values[0]
-                        last_pk = pk_values[-1]
-
                     if record_no:
                         record = conn.execute(q_record, {"pk": record_no}).mappings().first()
-
-                    # prev/next helpers for UX
-                    if record_no is not None and record_no != "":
-                        try:
-                            idx = [str(v) for v in pk_values].index(str(record_no))
-                            if idx > 0:
-                                prev_pk = pk_values[idx - 1]
-                            if idx < (len(pk_values) - 1):
-                                next_pk = pk_values[idx + 1]
-                        except ValueError:
-                            pass
+                        if record is None:
+                            flash(f"No record with {PK_NAME}={record_no}.", "warning")
+
+                    # first/last/prev/next for the navigation buttons: four
+                    # index seeks, valid for any table size (a missing record
+                    # still gets its nearest neighbours)
+                    nav = neighbour_pks(conn, tbl_sql, qident(PK_NAME), record_no or None)
+                    first_pk, last_pk = nav["first_pk"], nav["last_pk"]
+                    prev_pk, next_pk = nav["prev_pk"], nav["next_pk"]
             except Exception as e:
                 flash(f"Edit load failed: {e}", "danger")
 
+        # Keyset cursors for the Previous/Next links of whichever page is shown.
+        page_rows = grid_rows if (tab == "edit" and editmode == "grid") else rows
+        page_first_pk = page_rows[0][PK_NAME] if page_rows else None
+        page_last_pk = page_rows[-1][PK_NAME] if page_rows else None
+
         # CONFIGURE
         return render_template(
             "table.html",
@@ -491,6 +596,7 @@ def create_app() -> Flask:
             edit_cols=edit_cols,
             rows=rows,
             total=total,
+            total_estimated=total_estimated,
             last_page=last_page,
             page=page,
             page_size=page_size,
@@ -501,9 +607,12 @@ def create_app() -> Flask:
             grid_pages=grid_pages,
             grid_start=grid_start,
             grid_end=grid_end,
-            pk_values=pk_values,
             record_no=record_no,
             record=record,
+            after=after,
+            before=before,
+            page_first_pk=page_first_pk,
+            page_last_pk=page_last_pk,
             prev_pk=prev_pk,
             next_pk=next_pk,
             first_pk=first_pk,
@@ -548,6 +657,7 @@ def create_app() -> Flask:
 
         tbl_sql = qtable(schema, table_name)
 
+        resized = None  # set by a write; table_changed waits for the commit
         try:
             with eng.begin() as conn:
                 if pk:
@@ -558,8 +668,10 @@ def create_app() -> Flask:
                         )
                         params = dict(values)
                         params["__pk"] = pk
+                        reindex_later(conn, table_name, columns, [pk])
                         res = conn.execute(stmt, params)
-                        flash(f"Updated {res.rowcount} row(s).", "success")
+                        reindex_later(conn, table_name, columns, [pk])
+                        resized = False
                     else:
                         flash("Nothing to update.", "warning")
                 else:
@@ -570,17 +682,25 @@ def create_app() -> Flask:
                             f"INSERT INTO {tbl_sql} ({cols_sql}) VALUES ({vals_sql}) RETURNING {qident(PK_NAME)}"
                         )
                         new_pk = conn.execute(stmt, values).scalar_one_or_none()
-                        flash(f"Inserted new row (Record_No={new_pk}).", "success")
-                        return redirect(url_for("table_page", table_name=table_name, tab="edit", record=new_pk))
+                        reindex_later(conn, table_name, columns, [new_pk])
+                        resized = True
                     else:
                         # allow inserting a row with only defaults
                         stmt = text(
                             f"INSERT INTO {tbl_sql} DEFAULT VALUES RETURNING {qident(PK_NAME)}"
                         )
                         new_pk = conn.execute(stmt).scalar_one_or_none()
-                        flash(f"Inserted new row (Record_No={new_pk}).", "success")
-                        return redirect(url_for("table_page", table_name=table_name, tab="edit", record=new_pk))
+                        reindex_later(conn, table_name, columns, [new_pk])
+                        resized = True
+            if resized is not None:
+                table_changed(table_name, resized=resized)
+            if resized:
+                flash(f"Inserted new row (Record_No={new_pk}).", "success")
+                return redirect(url_for("table_page", table_name=table_name, tab="edit", record=new_pk))
+            if resized is False:
+                flash(f"Updated {res.rowcount} row(s).", "success")
         except SQLAlchemyError as e:
+            g.pop("reindex_ids", None)
             flash(f"Save failed: {e}", "danger")
 
         return redirect(url_for("table_page", table_name=table_name, tab="edit", record=pk or ""))
@@ -591,6 +711,8 @@ def create_app() -> Flask:
 
         Each cell input is named ``row-<pk>-<col>`` with a matching hidden
         ``orig-<pk>-<col>``; only cells whose value actually changed are written.
+        Rows that changed the same columns are written with one executemany
+        batch, so the number of round trips does not grow with the page size.
         """
         eng, resp = get_engine_or_redirect()
         if resp:
@@ -611,51 +733,67 @@ def create_app() -> Flask:
         pks = request.form.getlist("pk")
         rows_updated = 0
         cells_updated = 0
+        batch_notes: List[str] = []
 
         try:
+            changes_by_pk: Dict[str, Dict[str, Any]] = {}
+            for pk in pks:
+                changes: Dict[str, Any] = {}
+                for c in edit_col_names:
+                    meta = col_meta.get(c)
+                    if not meta:
+                        continue
+                    field = f"row-{pk}-{c}"
+                    orig_field = f"orig-{pk}-{c}"
+                    itype = input_type_for_pg(meta.data_type)
+                    if itype == "checkbox":
+                        new_raw = "on" if request.form.get(field) == "on" else ""
+                    else:
+                        if field not in request.form:
+                            continue  # column not present in this submission
+                        new_raw = request.form.get(field, "")
+                    orig_raw = request.form.get(orig_field, "")
+                    if (new_raw or "") == (orig_raw or ""):
+                        continue  # unchanged
+                    changes[c] = normalize_value_for_db(meta.data_type, new_raw)
+                if changes:
+                    changes_by_pk[pk] = changes
+
             with eng.begin() as conn:
-                for pk in pks:
-                    changes: Dict[str, Any] = {}
-                    for c in edit_col_names:
-                        meta = col_meta.get(c)
-                        if not meta:
-                            continue
-                        field = f"row-{pk}-{c}"
-                        orig_field = f"orig-{pk}-{c}"
-                        itype = input_type_for_pg(meta.data_type)
-                        if itype == "checkbox":
-                            new_raw = "on" if request.form.get(field) == "on" else ""
-                        else:
-                            if field not in request.form:
-                                continue  # column not present in this submission
-                            new_raw = request.form.get(field, "")
-                        orig_raw = request.form.get(orig_field, "")
-                        if (new_raw or "") == (orig_raw or ""):
-                            continue  # unchanged
-                        changes[c] = normalize_value_for_db(meta.data_type, new_raw)
-
-                    if changes:
-                        set_sql = ", ".join(f"{qident(k)} = :{k}" for k in changes)
-                        stmt = text(
-                            f"UPDATE {tbl_sql} SET {set_sql} WHERE {qident(PK_NAME)} = :__pk"
-                        )
-                        params = dict(changes)
-                        params["__pk"] = pk
-                        conn.execute(stmt, params)
-                        rows_updated += 1
-                        cells_updated += len(changes)
+                reindex_later(conn, table_name, columns, list(changes_by_pk))
+                for cols, batch in group_row_updates(changes_by_pk).items():
+                    set_sql = ", ".join(f"{qident(k)} = :{k}" for k in cols)
+                    stmt = text(
+                        f"UPDATE {tbl_sql} SET {set_sql} WHERE {qident(PK_NAME)} = :__pk"
+                    )
+                    t0 = time.perf_counter()
+                    conn.execute(stmt, batch)
+                    ms = (time.perf_counter() - t0) * 1000
+                    rows_updated += len(batch)
+                    cells_updated += len(cols) * len(batch)
+                    batch_notes.append(f"{len(batch)} row(s) × {len(cols)} field(s) in {ms:.1f} ms")
+                reindex_later(conn, table_name, columns, list(changes_by_pk))
 
             if rows_updated:
-                flash(f"Updated {cells_updated} field(s) across {rows_updated} record(s).", "success")
+                table_changed(table_name, resized=False)
+                flash(
+                    f"Updated {cells_updated} field(s) across {rows_updated} record(s) "
+                    f"in {len(batch_notes)} batch(es): {'; '.join(batch_notes)}.",
+                    "success",
+                )
             else:
                 flash("No changes to save.", "info")
         except SQLAlchemyError as e:
+            g.pop("reindex_ids", None)
             flash(f"Save failed: {e}", "danger")
 
         page = request.form.get("page", "1")
         per_page = request.form.get("per_page") or None
+        after = request.form.get("after") or None
+        before = request.form.get("before") or None
         return redirect(url_for("table_page", table_name=table_name, tab="edit",
-                                editmode="grid", page=page, per_page=per_page))
+                                editmode="grid", page=page, per_page=per_page,
+                                after=after, before=before))
 
     @app.post("/table/<table_name>/delete")
     def table_delete(table_name: str):
@@ -681,12 +819,15 @@ def create_app() -> Flask:
         tbl_sql = qtable(schema, table_name)
         try:
             with eng.begin() as conn:
+                reindex_later(conn, table_name, tables_meta[table_name], [record_no])
                 stmt = text(
                     f"DELETE FROM {tbl_sql} WHERE {qident(PK_NAME)} = :pk"
                 )
                 res = conn.execute(stmt, {"pk": record_no})
+            table_changed(table_name)
             flash(f"Deleted {res.rowcount} row(s).", "success")
         except SQLAlchemyError as e:
+            g.pop("reindex_ids", None)
             flash(f"Delete failed: {e}", "danger")
 
         return redirect(url_for("table_page", table_name=table_name, tab="edit"))
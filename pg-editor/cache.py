@@ -0,0 +1,50 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """A small thread-safe dict whose entries expire after ``ttl`` seconds.
+
+    Used for per-(database, table) facts that are expensive to recompute on
+    every page view but may go stale, e.g. pagination boundaries.
+    """
+
+    def __init__(self, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        now = self._clock()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if now >= expires:
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+
+    def discard_where(self, pred: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``pred``; returns how many."""
+        with self._lock:
+            doomed = [k for k in self._data if pred(k)]
+            for k in doomed:
+                del self._data[k]
+        return len(doomed)
+
+    def discard_prefix(self, *prefix: Hashable) -> int:
+        """Drop tuple keys starting with ``prefix``, e.g. (db_url, table)."""
+        n = len(prefix)
+        return self.discard_where(lambda k: isinstance(k, tuple) and k[:n] == prefix)
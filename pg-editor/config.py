@@ -26,6 +26,19 @@ TABLE_CONFIG_FILE = 'instance/table_config.json'
 
 # Pagination
 PAGE_SIZE = 25
+# 'keyset' seeks by Record_No (WHERE "Record_No" > last key seen), so deep pages
+# cost the same as the first one; 'offset' uses plain LIMIT/OFFSET.
+PAGINATION = 'keyset'
+# Jumping straight to page N uses a cached index holding the first Record_No of
+# every PAGE_INDEX_STRIDE-th page; it is rebuilt after PAGE_INDEX_TTL seconds
+# or when rows are added or deleted through the app.
+PAGE_INDEX_STRIDE = 10
+PAGE_INDEX_TTL = 300
+# Row totals: tables whose catalog estimate (pg_class.reltuples) is at least
+# ROW_COUNT_EXACT_BELOW rows show "~N rows" instead of running count(*).
+# Counts are cached for ROW_COUNT_TTL seconds and dropped when the app saves.
+ROW_COUNT_EXACT_BELOW = 100000
+ROW_COUNT_TTL = 60
 
 # Database connection defaults for the login form (optional)
 DB_DEFAULTS = dict(
@@ -35,5 +48,25 @@ DB_DEFAULTS = dict(
     user='postgres',
 )
 
+# Connection pooling
+# One pooled SQLAlchemy engine is kept per database URL and shared by all
+# requests, so page views reuse open connections instead of logging in again.
+ENGINE_POOL_SIZE = 5                 # connections kept open per engine
+ENGINE_MAX_OVERFLOW = 10             # extra connections allowed under load
+ENGINE_POOL_RECYCLE = 1800           # seconds; reconnect connections older than this
+ENGINE_POOL_TIMEOUT = 30             # seconds to wait for a free connection
+ENGINE_IDLE_SECONDS = 900            # dispose engines unused for this long
+
 # Safety: allow DELETE operations?
 ALLOW_DELETES = True
+
+# Write-through Solr reindexing (optional)
+# When SOLR_REINDEX_CORE is set, saves and deletes on tables with an
+# MMAP_Artifact_ID column queue the affected artifacts in a local SQLite file;
+# a background thread re-extracts them with the mmap-solr queries
+# (MMAP_SOLR_DIR/solr_sql/<table>.sql) and pushes them with soft commits.
+SOLR_REINDEX_CORE = None             # e.g. 'http://localhost:8983/solr/mmap-public'
+SOLR_REINDEX_QUEUE = 'instance/solr_reindex.sqlite'
+MMAP_SOLR_DIR = '../mmap-solr'
+SOLR_REINDEX_BATCH = 200             # artifacts per Solr update
+SOLR_REINDEX_INTERVAL = 2            # seconds between queue polls
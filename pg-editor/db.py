@@ -1,8 +1,12 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
 from urllib.parse import quote_plus
 from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
 
 @dataclass
 class DbCreds:
@@ -18,9 +22,165 @@ def make_db_url(creds: DbCreds) -> str:
     password = quote_plus(creds.password)
     return f"postgresql+psycopg2://{user}:{password}@{creds.host}:{creds.port}/{creds.dbname}"
 
-def get_engine(db_url: str) -> Engine:
-    # pool_pre_ping helps avoid stale connections
-    return create_engine(db_url, pool_pre_ping=True, future=True)
+def normalize_db_url(db_url: str) -> str:
+    """Canonical form of a DB URL, used as the engine registry key.
+
+    Host names are case-insensitive and the default Postgres port is implied,
+    so ``...@LocalHost/db`` and ``...@localhost:5432/db`` share one engine.
+    """
+    url = make_url(db_url)
+    url = url.set(
+        host=(url.host or "").lower() or None,
+        port=url.port or 5432,
+    )
+    return url.render_as_string(hide_password=False)
+
+@dataclass
+class PoolStats:
+    """Counters shared by every engine in an :class:`EngineRegistry`."""
+    hits: int = 0                 # get() reused a pooled engine
+    misses: int = 0               # get() had to create an engine
+    evictions: int = 0            # idle engines disposed
+    checkouts: int = 0            # connections handed out by a pool
+    checkout_wait_total: float = 0.0   # seconds spent waiting for them
+    checkout_wait_max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            if seconds > self.checkout_wait_max:
+                self.checkout_wait_max = seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg = self.checkout_wait_total / self.checkouts if self.checkouts else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "checkouts": self.checkouts,
+            "checkout_wait_avg_ms": round(avg * 1000, 3),
+            "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+        }
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection.
+
+    The wait includes opening a new connection when the pool is not yet full,
+    which is exactly the handshake cost the registry is meant to amortize.
+    """
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.record_checkout(time.perf_counter() - start)
+
+def get_engine(db_url: str, **pool_options: Any) -> Engine:
+    """Create a new Engine. Prefer :meth:`EngineRegistry.get`, which reuses them."""
+    # pool_pre_ping helps avoid stale connections.
+    # values_plus_batch makes executemany() UPDATEs go through psycopg2's
+    # execute_batch, i.e. one round trip per 100 parameter sets instead of one
+    # per row (100 is also the largest grid page size).
+    return create_engine(
+        db_url, pool_pre_ping=True, future=True,
+        executemany_mode="values_plus_batch", executemany_batch_page_size=100,
+        **pool_options,
+    )
+
+class EngineRegistry:
+    """Process-wide cache of Engines keyed by the normalized DB URL.
+
+    Building an Engine is cheap, but every new Engine starts with an empty
+    connection pool, so creating one per request means a fresh TCP + auth
+    handshake per page view. The registry keeps one pooled Engine per
+    database/user and disposes engines that have not been used for
+    ``idle_seconds``.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_recycle: int = 1800,
+        pool_timeout: float = 30,
+        idle_seconds: float = 900,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pool_options = dict(
+            poolclass=TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_timeout=pool_timeout,
+        )
+        self.idle_seconds = idle_seconds
+        self.stats = PoolStats()
+        self._clock = clock
+        self._engines: Dict[str, Engine] = {}
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def __contains__(self, db_url: str) -> bool:
+        return normalize_db_url(db_url) in self._engines
+
+    def get(self, db_url: str) -> Engine:
+        key = normalize_db_url(db_url)
+        now = self._clock()
+        with self._lock:
+            stale = self._pop_idle(now, keep=key)
+            eng = self._engines.get(key)
+            if eng is None:
+                self.stats.misses += 1
+                eng = get_engine(db_url, **self.pool_options)
+                eng.pool.stats = self.stats
+                self._engines[key] = eng
+            else:
+                self.stats.hits += 1
+            self._last_used[key] = now
+        for old in stale:
+            old.dispose()
+        return eng
+
+    def dispose(self, db_url: Optional[str]) -> bool:
+        """Close and forget the engine for ``db_url``; True if one existed."""
+        if not db_url:
+            return False
+        key = normalize_db_url(db_url)
+        with self._lock:
+            eng = self._engines.pop(key, None)
+            self._last_used.pop(key, None)
+        if eng is None:
+            return False
+        eng.dispose()
+        return True
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+            self._last_used.clear()
+        for eng in engines:
+            eng.dispose()
+
+    def _pop_idle(self, now: float, keep: str) -> list:
+        """Remove engines idle for longer than ``idle_seconds`` (lock held)."""
+        if self.idle_seconds is None or self.idle_seconds < 0:
+            return []
+        stale = []
+        for key, last in list(self._last_used.items()):
+            if key != keep and now - last > self.idle_seconds:
+                stale.append(self._engines.pop(key))
+                del self._last_used[key]
+                self.stats.evictions += 1
+        return stale
 
 def test_connection(engine: Engine) -> None:
     with engine.connect() as conn:
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
 def input_type_for_pg(pg_type: str) -> str:
     t = (pg_type or "").lower().strip()
@@ -41,3 +41,20 @@ def normalize_value_for_db(pg_type: str, raw: Any) -> Any:
 
     # numbers: keep as string and let Postgres cast, unless it's clearly int
     return raw
+
+def group_row_updates(changes: Dict[str, Dict[str, Any]], pk_param: str = "__pk") -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    """Group per-row changes by the set of columns that changed.
+
+    ``changes`` maps primary key -> {column: value}. Rows that changed the
+    same columns share one UPDATE statement, so each group can be sent as a
+    single executemany batch. Each parameter dict carries the key as
+    ``pk_param``. Groups and rows keep their submission order.
+    """
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for pk, cols in changes.items():
+        if not cols:
+            continue
+        params = dict(cols)
+        params[pk_param] = pk
+        groups.setdefault(tuple(cols), []).append(params)
+    return groups
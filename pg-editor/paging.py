@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+def page_query(
+    select_sql: str,
+    pk_sql: str,
+    *,
+    after: Optional[Any] = None,
+    before: Optional[Any] = None,
+    start: Optional[Any] = None,
+    offset: int = 0,
+) -> Tuple[TextClause, Dict[str, Any], bool]:
+    """Build the statement for one page of rows ordered by the primary key.
+
+    Returns (statement, params, reverse). The caller binds ``limit`` and, if
+    ``reverse`` is true, reverses the fetched rows.
+
+    - ``after``:  keyset seek forward, ``WHERE pk > :after``
+    - ``before``: keyset seek backward, ``WHERE pk < :before`` read in
+      descending order (hence ``reverse``)
+    - ``start``:  seek to a known page boundary, then skip ``offset`` rows
+      (always less than one stride of pages, see :func:`locate_page`)
+    - otherwise plain ``LIMIT/OFFSET`` from the start of the table.
+    """
+    params: Dict[str, Any] = {}
+    if after is not None:
+        sql = f"{select_sql} WHERE {pk_sql} > :after ORDER BY {pk_sql} LIMIT :limit"
+        params["after"] = after
+        return text(sql), params, False
+    if before is not None:
+        sql = f"{select_sql} WHERE {pk_sql} < :before ORDER BY {pk_sql} DESC LIMIT :limit"
+        params["before"] = before
+        return text(sql), params, True
+    if start is not None:
+        sql = f"{select_sql} WHERE {pk_sql} >= :start ORDER BY {pk_sql} LIMIT :limit OFFSET :offset"
+        params.update(start=start, offset=offset)
+        return text(sql), params, False
+    sql = f"{select_sql} ORDER BY {pk_sql} LIMIT :limit OFFSET :offset"
+    params["offset"] = offset
+    return text(sql), params, False
+
+
+def boundary_query(tbl_sql: str, pk_sql: str) -> TextClause:
+    """Primary keys of rows 1, step+1, 2*step+1, ... in key order.
+
+    One pass over the primary-key index yields a sparse index from which any
+    page can be reached with a bounded seek.
+    """
+    return text(
+        f"SELECT pk FROM ("
+        f"SELECT {pk_sql} AS pk, row_number() OVER (ORDER BY {pk_sql}) AS rn FROM {tbl_sql}"
+        f") s WHERE (s.rn - 1) % :step = 0 ORDER BY s.pk"
+    )
+
+
+def load_boundaries(conn, tbl_sql: str, pk_sql: str, step: int) -> List[Any]:
+    return list(conn.execute(boundary_query(tbl_sql, pk_sql), {"step": step}).scalars())
+
+
+def locate_page(
+    boundaries: Sequence[Any], page: int, page_size: int, stride: int
+) -> Tuple[Optional[Any], int]:
+    """Map a 1-based page number to (start_pk, offset) using a sparse index.
+
+    ``boundaries[i]`` is the key of the first row of page ``i * stride + 1``.
+    Pages past the end of the index seek from the last boundary, which simply
+    yields an empty page.
+    """
+    if not boundaries:
+        return None, (page - 1) * page_size
+    i = min((page - 1) // stride, len(boundaries) - 1)
+    return boundaries[i], (page - 1 - i * stride) * page_size
+
+
+def neighbour_query(tbl_sql: str, pk_sql: str) -> TextClause:
+    """First, last, previous and next primary key around ``:pk`` in one round trip.
+
+    Each scalar subquery is an ``ORDER BY pk LIMIT 1`` seek on the primary-key
+    index, so the cost does not depend on the table size or on where the
+    record sits in it. ``:pk`` may be NULL (new record): prev/next are then NULL.
+    """
+    return text(
+        f"SELECT "
+        f"(SELECT {pk_sql} FROM {tbl_sql} ORDER BY {pk_sql} LIMIT 1) AS first_pk, "
+        f"(SELECT {pk_sql} FROM {tbl_sql} ORDER BY {pk_sql} DESC LIMIT 1) AS last_pk, "
+        f"(SELECT {pk_sql} FROM {tbl_sql} WHERE {pk_sql} < :pk ORDER BY {pk_sql} DESC LIMIT 1) AS prev_pk, "
+        f"(SELECT {pk_sql} FROM {tbl_sql} WHERE {pk_sql} > :pk ORDER BY {pk_sql} LIMIT 1) AS next_pk"
+    )
+
+
+def neighbour_pks(conn, tbl_sql: str, pk_sql: str, pk: Optional[Any]) -> Dict[str, Any]:
+    """Return {first_pk, last_pk, prev_pk, next_pk} for record ``pk``."""
+    row = conn.execute(neighbour_query(tbl_sql, pk_sql), {"pk": pk}).mappings().first()
+    return dict(row) if row else dict(first_pk=None, last_pk=None, prev_pk=None, next_pk=None)
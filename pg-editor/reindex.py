@@ -0,0 +1,208 @@
+from __future__ import annotations
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+log = logging.getLogger(__name__)
+
+ARTIFACT_ID = "MMAP_Artifact_ID"
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    db_url      TEXT NOT NULL,
+    artifact_id TEXT NOT NULL,
+    queued      REAL NOT NULL,
+    UNIQUE (db_url, artifact_id)
+)
+"""
+
+
+class ReindexQueue:
+    """Durable queue of artifact ids waiting to be re-indexed in Solr (SQLite).
+
+    Queuing an id that is already waiting gives it a new sequence number, so
+    an edit made while the worker is indexing that id is not lost when the
+    worker acknowledges the batch it took.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(QUEUE_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM pending").fetchone()[0]
+
+    def put(self, db_url: str, artifact_ids: Iterable[str]) -> int:
+        rows = [(db_url, str(a), time.time()) for a in artifact_ids if a is not None and str(a) != ""]
+        if rows:
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO pending (db_url, artifact_id, queued) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def take(self, limit: int) -> Tuple[Optional[str], List[int], List[str]]:
+        """Oldest waiting batch for one database: (db_url, seqs, artifact ids)."""
+        with self._lock:
+            first = self._db.execute("SELECT db_url FROM pending ORDER BY seq LIMIT 1").fetchone()
+            if first is None:
+                return None, [], []
+            rows = self._db.execute(
+                "SELECT seq, artifact_id FROM pending WHERE db_url = ? ORDER BY seq LIMIT ?",
+                (first[0], limit)).fetchall()
+        return first[0], [r[0] for r in rows], [r[1] for r in rows]
+
+    def ack(self, seqs: List[int]) -> None:
+        with self._lock:
+            self._db.executemany("DELETE FROM pending WHERE seq = ?", [(s,) for s in seqs])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class Reindexer:
+    """Background thread draining a ReindexQueue in batches.
+
+    ``index(db_url, artifact_ids)`` does the actual work (see solr_indexer).
+    A failed batch stays queued and is retried after a growing pause, up to
+    ``max_backoff`` seconds.
+    """
+
+    def __init__(
+        self,
+        queue: ReindexQueue,
+        index: Callable[[str, List[str]], object],
+        batch: int = 200,
+        interval: float = 2.0,
+        max_backoff: float = 300,
+    ):
+        self.queue = queue
+        self.index = index
+        self.batch = batch
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, db_url: str, artifact_ids: Iterable[str]) -> int:
+        n = self.queue.put(db_url, artifact_ids)
+        if n:
+            self._wake.set()
+        return n
+
+    def run_once(self) -> int:
+        """Index one batch; returns how many ids were indexed (0 if none waiting)."""
+        db_url, seqs, ids = self.queue.take(self.batch)
+        if not seqs:
+            return 0
+        self.index(db_url, ids)
+        self.queue.ack(seqs)
+        return len(ids)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="solr-reindex", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                busy = self.run_once()
+                self.failures = 0
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                log.warning("Solr reindex failed (attempt %d): %s", self.failures, e)
+                busy = 0
+            if busy:
+                continue
+            delay = self.interval
+            if self.failures:
+                delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+
+# --- Postgres side -----------------------------------------------------------
+
+# information_schema data_type values that can be written as a cast target
+CASTABLE_TYPE = re.compile(r"[a-z][a-z0-9 ]*")
+
+
+def touched_artifacts_sql(tbl_sql: str, pk_sql: str, pk_type: str) -> str:
+    """The keys arrive as text[]; casting the array (not the column) keeps the pk index usable."""
+    t = (pk_type or "").lower().strip()
+    if CASTABLE_TYPE.fullmatch(t) and t != "array":
+        match = f"{pk_sql} = ANY(CAST(:pks AS {t}[]))"
+    else:  # USER-DEFINED, ARRAY: no type name to cast to
+        match = f"{pk_sql}::text = ANY(:pks)"
+    return f'SELECT DISTINCT "{ARTIFACT_ID}"::text FROM {tbl_sql} WHERE {match}'
+
+
+def touched_artifacts(conn, tbl_sql: str, pk_sql: str, pks: List[str], pk_type: str = "integer") -> List[str]:
+    """Artifact ids of the rows ``pks`` of a table that has an MMAP_Artifact_ID column."""
+    if not pks:
+        return []
+    rows = conn.execute(text(touched_artifacts_sql(tbl_sql, pk_sql, pk_type)), {"pks": [str(p) for p in pks]})
+    return [r[0] for r in rows if r[0] is not None]
+
+
+def libpq_url(db_url: str) -> str:
+    """postgresql+psycopg2://... -> postgresql://... (for solr_etl.connect)."""
+    return make_url(db_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def solr_indexer(core_url: str, mmap_solr_dir: str, sql_dir: Optional[str] = None) -> Callable[[str, List[str]], int]:
+    """index(db_url, artifact_ids) that re-extracts and soft-commits via mmap-solr.
+
+    Uses the same solr_sql/<table>.sql queries and row cleanup as the nightly
+    load (solr_etl.py / solr_delta.py), restricted to the given artifacts.
+    One text-typed connection per database is kept open between batches.
+    """
+    if mmap_solr_dir not in sys.path:
+        sys.path.insert(0, mmap_solr_dir)
+    import solr_delta  # type: ignore
+    import solr_etl  # type: ignore
+
+    queries = solr_delta.restricted_queries(solr_etl.read_table_list(), sql_dir or solr_etl.SQL_DIR)
+    conns: Dict[str, object] = {}
+
+    def index(db_url: str, artifact_ids: List[str]) -> int:
+        conn = conns.get(db_url)
+        if conn is None:
+            conn = conns[db_url] = solr_etl.connect(libpq_url(db_url))
+        try:
+            return solr_delta.reindex(conn, core_url, sorted(artifact_ids), queries, soft=True)
+        except Exception:
+            conns.pop(db_url, None)
+            try:
+                conn.close()
+            except Exception:
+                pass
+            raise
+
+    return index
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+
+
+@dataclass(frozen=True)
+class RowCount:
+    value: int
+    estimated: bool = False
+
+
+# Planner statistics: reltuples is maintained by VACUUM/ANALYZE (-1 if the
+# table has never been analyzed on Postgres 14+), n_live_tup by the
+# statistics collector. Both are free to read compared to count(*).
+ESTIMATE_SQL = text(
+    """
+    SELECT c.reltuples::bigint AS reltuples, s.n_live_tup
+    FROM pg_class AS c
+    JOIN pg_namespace AS n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables AS s ON s.relid = c.oid
+    WHERE n.nspname = :schema AND c.relname = :table
+    """
+)
+
+
+def estimate_rows(conn, schema: str, table: str) -> Optional[int]:
+    """Best available row estimate from the catalog, or None if there is none."""
+    row = conn.execute(ESTIMATE_SQL, {"schema": schema, "table": table}).mappings().first()
+    if not row:
+        return None
+    if row["reltuples"] is not None and row["reltuples"] > 0:
+        return int(row["reltuples"])
+    if row["n_live_tup"] is not None and row["n_live_tup"] > 0:
+        return int(row["n_live_tup"])
+    return None
+
+
+def count_rows(conn, schema: str, table: str, tbl_sql: str, exact_below: int = 100_000) -> RowCount:
+    """Row count for ``table``: estimated for big tables, exact for small ones.
+
+    If the catalog estimate is missing or below ``exact_below`` the table is
+    cheap enough to count exactly with ``count(*)``.
+    """
+    est = estimate_rows(conn, schema, table)
+    if est is not None and est >= exact_below:
+        return RowCount(est, estimated=True)
+    exact = conn.execute(text(f"SELECT count(*) AS cnt FROM {tbl_sql}")).scalar_one()
+    return RowCount(int(exact), estimated=False)
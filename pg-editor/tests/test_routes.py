@@ -8,6 +8,7 @@ from __future__ import annotations
 import pytest
 
 from app import create_app
+from db import DbCreds, make_db_url
 
 
 @pytest.fixture
@@ -75,3 +76,31 @@ def test_whoami_redirects_when_logged_out(client):
     resp = client.get("/whoami")
     assert resp.status_code == 302
     assert "/login" in resp.headers["Location"]
+
+
+def _login(client, port):
+    return client.post("/login", data={"host": "127.0.0.1", "port": str(port), "dbname": "x",
+                                       "user": "x", "password": "x"})
+
+
+def test_failed_login_disposes_only_the_engine_it_created(client):
+    engines = client.application.config["ENGINES"]
+    _login(client, 1)  # nothing listens there: connection refused
+    assert len(engines) == 0
+
+    db_url = make_db_url(DbCreds("127.0.0.1", 1, "x", "x", "x"))
+    shared = engines.get(db_url)  # as if another session had logged in
+    _login(client, 1)
+    assert engines.get(db_url) is shared
+
+
+def test_logout_leaves_the_shared_engine_to_the_registry(client):
+    engines = client.application.config["ENGINES"]
+    db_url = make_db_url(DbCreds("127.0.0.1", 1, "x", "x", "x"))
+    eng = engines.get(db_url)
+    with client.session_transaction() as sess:
+        sess["db_url"] = db_url
+    client.get("/logout")
+    with client.session_transaction() as sess:
+        assert "db_url" not in sess
+    assert engines.get(db_url) is eng